@@ -22,7 +22,7 @@ setup(
     },
     entry_points={
         'console_scripts': [
-            'start-simulation=auto_driving_car_simulation.main:main',
+            'start-simulation=auto_driving_car_simulation.main:cli',
         ],
     },
     classifiers=[
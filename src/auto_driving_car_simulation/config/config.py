@@ -8,9 +8,65 @@ class Config:
 
     # Car settings
     CAR_COMMANDS = 'LRF'
-    CAR_DIRECTIONS = ['N', 'E', 'S', 'W']
+    CAR_DIRECTIONS = ('N', 'E', 'S', 'W')
+    CAR_LIST_PAGE_SIZE = 20
 
+    # Number of distinct compiled command programs kept in memory
+    PROGRAM_CACHE_SIZE = 1024
 
+    # Occupancy settings. A dense occupancy takes two 4-byte integers per cell of the field, while
+    # a sparse one takes about 100 bytes per car for its hash entry, key and list of names, so the
+    # dense arrays are only smaller up to about 12 cells per car.
+    OCCUPANCY_DENSE_CELLS_PER_CAR = 12
+    OCCUPANCY_DENSE_MAX_CELLS = 1 << 24
 
+    # Monte Carlo settings
+    MONTE_CARLO_BATCH_SIZE = 64
+    MONTE_CARLO_CONFIDENCE = 0.95
 
+    # Number of steps between the checkpoints of an incremental simulation
+    CHECKPOINT_INTERVAL = 64
 
+    # Number of seconds between writes of the metrics file
+    METRICS_INTERVAL = 10.0
+
+    # Simulation engine: a registered engine name, or 'auto' to choose one from the scenario size.
+    # The environment variable overrides it and the --engine option overrides both.
+    SIMULATION_ENGINE = 'reference'
+    ENGINE_ENVIRONMENT_VARIABLE = 'SIMULATION_ENGINE'
+    ENGINE_PARALLEL_MIN_CARS = 200000
+
+    # Number of car commands between two budget checks of a run
+    BUDGET_CHECK_COMMANDS = 1 << 16
+
+    # Default distance metric of near-miss detection
+    NEAR_MISS_METRIC = 'chebyshev'
+
+    # Largest field, in cells, whose traffic analytics are kept in dense arrays
+    ANALYTICS_DENSE_MAX_CELLS = 1 << 20
+
+    # Number of most visited cells listed after exporting traffic analytics
+    ANALYTICS_HOT_CELLS = 3
+
+    # Result cache: the directory of the environment variable is used when no --cache is given
+    RESULT_CACHE_ENVIRONMENT_VARIABLE = 'SIMULATION_CACHE'
+    RESULT_CACHE_MAX_BYTES = 256 << 20
+    RESULT_CACHE_EXPAND_COMMANDS = 4096
+
+    # Side, in cells, of the tiles in which the sweep engine compares space-time segments
+    SWEEP_TILE_CELLS = 16
+
+    # Size of the chunks of car lines parsed by a worker process, and size of the text scenario
+    # files from which batch runs parse with worker processes
+    INGEST_CHUNK_BYTES = 16 << 20
+    INGEST_PARALLEL_MIN_BYTES = 64 << 20
+
+    # Distributed batches: scenarios per shard, seconds between worker heartbeats, seconds of
+    # silence before a shard is handed to another worker, attempts per shard, coordinator polling
+    # and seconds a coordinator waits for a whole batch
+    DISTRIBUTED_SHARD_SIZE = 16
+    DISTRIBUTED_HEARTBEAT_INTERVAL = 1.0
+    DISTRIBUTED_HEARTBEAT_TIMEOUT = 10.0
+    DISTRIBUTED_MAX_ATTEMPTS = 3
+    DISTRIBUTED_POLL_INTERVAL = 0.1
+    DISTRIBUTED_BATCH_TIMEOUT = 3600.0
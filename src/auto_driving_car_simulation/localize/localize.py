@@ -1,14 +1,19 @@
 import yaml
 import importlib.resources
+from functools import lru_cache
+from types import MappingProxyType
 from ..config.config import Config
 
 
+@lru_cache(maxsize=None)
 def load_translations(language_code=Config.DEFAULT_LOCALIZATION_LANGUAGE):
+    """
+    Loads the translations of a language once and returns them as a read-only mapping,
+    so they can be shared by simulations running in several threads.
+    """
     with importlib.resources.files('auto_driving_car_simulation.localize').joinpath(f'{language_code}.yaml').open('r') as file:
         localization = yaml.safe_load(file)
-    return localization
+    return MappingProxyType(localization)
 
 
 localizations = load_translations()
-
-
@@ -1,9 +1,29 @@
+import argparse
+import os
+import sys
+from contextlib import nullcontext
 from .simulation.field import Field
 from .simulation.car import Car
 from .simulation.simulation import Simulation
+from .simulation.program import Program
+from .simulation.scenario import Scenario
+from .simulation.binary_scenario import BinaryScenario
+from .simulation.ingest import ColumnarScenario
+from .simulation.monte_carlo import MonteCarloEstimator
+from .simulation.engines import AUTO_ENGINE, ENGINES, select_engine
+from .simulation.budget import RunBudget
+from .simulation.near_miss import CHEBYSHEV, MANHATTAN, NearMissDetector
+from .simulation.analytics import TrafficAnalytics
+from .simulation.result_cache import ResultCache
+from .simulation.query import run_query
+from .simulation.open_world import BOUNDARY, FINISHED, OpenWorldSimulation, SpawnStream
+from .simulation.distributed import Coordinator, run_worker, start_local_workers, stop_local_workers
+from .simulation.digest import StateDigest
 from .localize.localize import localizations
 from .config.config import Config
 from .utils.logger import Logger
+from .utils.memory import MemoryReport
+from .utils.metrics import MetricsExporter
 
 
 logger = Logger.setup_logger('MAIN')
@@ -46,7 +66,125 @@ def add_car_to_simulation(simulation):
     car = Car(name, x, y, direction)
     car.set_commands(commands)
     simulation.add_car(car)
-    simulation.display_initial_car_positions()
+    simulation.display_car(car)
+    print(localizations['car_count_summary'].format(count=len(simulation.cars)))
+
+
+def add_car_from_line(simulation: Simulation, line: str):
+    """
+    Adds a car given in the batch ``name x y Direction [commands]`` format to the simulation.
+
+    Parameters:
+    -----------
+    simulation : Simulation
+        The simulation object to which the car will be added.
+    line : str
+        The car line.
+
+    Raises:
+    -------
+    ValueError
+        If the car is invalid, its name is taken or its position is occupied.
+    """
+    name, x, y, direction, commands = Scenario.parse_car(line, simulation.field.width, simulation.field.height)
+    if simulation.has_car(name):
+        raise ValueError(localizations['duplicate_car_name_error'].format(name=name))
+    if simulation.is_position_taken(x, y):
+        raise ValueError(localizations['initial_collides_error'].format(x=x, y=y))
+    car = Car(name, x, y, direction)
+    car.set_commands(commands)
+    simulation.add_car(car)
+
+
+def add_car_lines(simulation: Simulation, lines: list, source: str = None, first: int = 1) -> int:
+    """
+    Adds the valid car lines of a source, reporting the invalid ones with their line number and skipping them.
+
+    Parameters:
+    -----------
+    simulation : Simulation
+        The simulation object to which the cars will be added.
+    lines : list
+        The car lines. Empty lines and lines starting with '#' are ignored.
+    source : str, optional
+        The file the lines were read from, named in the errors, or None for pasted lines.
+    first : int
+        The line number of the first line in its source.
+
+    Returns:
+    --------
+    int
+        The number of cars added.
+    """
+    added = 0
+    for number, line in enumerate(lines, start=first):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            add_car_from_line(simulation, line)
+            added += 1
+        except ValueError as error:
+            if source is None:
+                print(localizations['scenario_line_error'].format(line=number, error=error))
+            else:
+                print(localizations['file_line_error'].format(file=source, line=number, error=error))
+    return added
+
+
+def add_cars_in_bulk(simulation: Simulation):
+    """
+    Prompts the user to paste car lines, or @file to import the car lines of a file, until an empty line.
+
+    Invalid lines are reported with their line number and skipped, the valid ones are added. Pasted
+    lines are numbered in the order they were entered, the lines of an imported file within the file.
+
+    Parameters:
+    -----------
+    simulation : Simulation
+        The simulation object to which the cars will be added.
+    """
+    print(localizations['bulk_cars_prompt'])
+    added = 0
+    number = 0
+    while True:
+        line = input().strip()
+        number += 1
+        if not line:
+            break
+        if line.startswith('@'):
+            path = line[1:].strip()
+            try:
+                with open(path, 'r') as file:
+                    lines = file.read().splitlines()
+            except OSError as error:
+                print(error)
+                continue
+            added += add_car_lines(simulation, lines, source=path)
+        else:
+            added += add_car_lines(simulation, [line], first=number)
+    print(localizations['cars_added_summary'].format(added=added, count=len(simulation.cars)))
+
+
+def list_cars(simulation: Simulation):
+    """
+    Displays the cars of the simulation one page at a time.
+
+    Parameters:
+    -----------
+    simulation : Simulation
+        The simulation object whose cars are listed.
+    """
+    print(localizations['current_car_list'])
+    page_size = Config.CAR_LIST_PAGE_SIZE
+    for start in range(0, len(simulation.cars), page_size):
+        for car in simulation.cars[start:start + page_size]:
+            simulation.display_car(car)
+        shown = min(start + page_size, len(simulation.cars))
+        if shown < len(simulation.cars):
+            answer = input(localizations['more_cars_prompt'].format(shown=shown, count=len(simulation.cars)))
+            if answer.strip().lower() == 'q':
+                break
 
 
 def get_valid_car_name(simulation: Simulation):
@@ -101,7 +239,7 @@ def get_valid_car_position(simulation, name: str):
             if not simulation.field.is_within_boundaries(x, y):
                 print(localizations['out_of_bounds_error'])
                 continue
-            if any(car.x == x and car.y == y for car in simulation.cars):
+            if simulation.is_position_taken(x, y):
                 print(localizations['initial_collides_error'].format(x=x, y=y))
                 continue
             return x, y, direction
@@ -122,20 +260,19 @@ def get_valid_car_commands(name: str):
     Returns:
     --------
     str
-        The valid commands for the car.
+        The valid commands for the car, optionally using the repeat syntax.
     """
     while True:
         try:
             commands = input(localizations['commands_prompt'].format(name=name))
-            if not all(c in Config.CAR_COMMANDS for c in commands):
-                raise ValueError(localizations['invalid_command_error'])
+            Program.parse(commands)
             return commands
         except ValueError:
             print(localizations['invalid_command_error'])
             continue
 
 
-def handle_post_simulation_options(simulation: Simulation):
+def handle_post_simulation_options(simulation: Simulation) -> bool:
     """
     Handles the options after the simulation has run.
 
@@ -144,23 +281,33 @@ def handle_post_simulation_options(simulation: Simulation):
     -----------
     simulation : Simulation
         The simulation object to reset or exit.
+
+    Returns:
+    --------
+    bool
+        True if the user chose to start over, False to exit.
     """
     while True:
         option = input(localizations['post_simulation_prompt'])
         if option == '1':
             simulation.reset()
-            main()  # Restart the main function
+            return True
         elif option == '2':
             print(localizations['exit_message'])
-            break
+            return False
         else:
             logger.debug("Invalid option after simulation.")
             print(localizations['invalid_option_warning'])
 
 
-def main():
+def run_session() -> Simulation:
     """
-    Main function to run the car simulation.
+    Runs one interactive session: sets up the field, adds cars and runs the simulation.
+
+    Returns:
+    --------
+    Simulation
+        The simulation that was run.
     """
     print(localizations['welcome_message'])
     field = setup_field()
@@ -172,15 +319,472 @@ def main():
         elif option == '2':
             if simulation.cars:
                 simulation.run_simulation()
-                break
+                return simulation
             else:
                 print(localizations['no_cars_error'])
                 continue
+        elif option == '3':
+            add_cars_in_bulk(simulation)
+        elif option == '4':
+            list_cars(simulation)
         else:
             logger.debug("Invalid option.")
-            print(localizations['invalid_option_warning'])
-    handle_post_simulation_options(simulation)
+            print(localizations['invalid_menu_option_warning'])
+
+
+def main():
+    """
+    Main function to run the car simulation. Starts a new session for as long as the user chooses to start over.
+    """
+    while handle_post_simulation_options(run_session()):
+        continue
+
+
+def run_batch(path: str, memory_report: bool = False, metrics_file: str = None, metrics_port: int = None,
+              metrics_interval: float = Config.METRICS_INTERVAL, engine: str = None, budget: RunBudget = None,
+              near_miss: NearMissDetector = None, analytics_file: str = None, cache_directory: str = None):
+    """
+    Runs the simulation described by a batch scenario file, in the text or the binary format.
+
+    Parameters:
+    -----------
+    path : str
+        The path of the scenario file.
+    memory_report : bool
+        Whether to trace memory usage and display a memory report after the results.
+    metrics_file : str, optional
+        The file the live metrics of the run are written to in the OpenMetrics format.
+    metrics_port : int, optional
+        The localhost port serving the live metrics of the run.
+    metrics_interval : float
+        The number of seconds between writes of the metrics file.
+    engine : str, optional
+        The name of the simulation engine, see select_engine.
+    budget : RunBudget, optional
+        The step and time limits and progress callback of the run.
+    near_miss : NearMissDetector, optional
+        The detector of the cars coming close to each other.
+    analytics_file : str, optional
+        The file the traffic analytics of the run are exported to.
+    cache_directory : str, optional
+        The directory of the result cache, defaults to the one named by the environment, if any.
+    """
+    report = MemoryReport() if memory_report else None
+    phase = report.phase if report else lambda name: nullcontext()
+    if report:
+        report.start()
+    scenario = None
+    try:
+        with phase('load'):
+            scenario = load_scenario(path)
+        with phase('build'):
+            simulation = scenario.build_simulation(select_engine(engine, len(scenario.cars)))
+            simulation.near_miss = near_miss
+            if analytics_file is not None:
+                simulation.analytics = TrafficAnalytics()
+        exporter = nullcontext()
+        if metrics_file is not None or metrics_port is not None:
+            exporter = MetricsExporter(simulation.metrics, metrics_file, metrics_port, metrics_interval)
+        cache_directory = cache_directory or os.environ.get(Config.RESULT_CACHE_ENVIRONMENT_VARIABLE)
+        with phase('run'), exporter:
+            if cache_directory:
+                ResultCache(cache_directory).run(simulation, budget=budget)
+            else:
+                simulation.run_simulation(budget=budget)
+    finally:
+        if isinstance(scenario, BinaryScenario):
+            scenario.close()
+        if report:
+            report.stop()
+    if analytics_file is not None:
+        simulation.analytics.export(analytics_file)
+        hot_cells = simulation.analytics.hot_cells(Config.ANALYTICS_HOT_CELLS)
+        print(localizations['analytics_written'].format(path=analytics_file, cells=', '.join(
+            localizations['analytics_hot_cell'].format(pos=pos, visits=visits) for pos, visits in hot_cells)))
+    if report:
+        report.measure(simulation)
+        report.display()
+
+
+def load_scenario(path: str):
+    """
+    Loads a scenario file in the text or the binary format.
+
+    Parameters:
+    -----------
+    path : str
+        The path of the scenario file.
+
+    Returns:
+    --------
+    Scenario, ColumnarScenario or BinaryScenario
+        The scenario. A BinaryScenario must be closed once its simulation is built.
+    """
+    return BinaryScenario.load(path) if BinaryScenario.is_binary(path) else load_text_scenario(path)
+
+
+def load_text_scenario(path: str):
+    """
+    Loads a scenario file in the text format, with worker processes if it is large.
+
+    Parameters:
+    -----------
+    path : str
+        The path of the scenario file.
+
+    Returns:
+    --------
+    Scenario or ColumnarScenario
+        The scenario, a ColumnarScenario from Config.INGEST_PARALLEL_MIN_BYTES on.
+    """
+    if os.path.getsize(path) >= Config.INGEST_PARALLEL_MIN_BYTES:
+        return ColumnarScenario.load(path)
+    return Scenario.load(path)
+
+
+def report_progress(step: int, active_cars: int):
+    """
+    Displays the progress of a run.
+
+    Parameters:
+    -----------
+    step : int
+        The number of steps simulated.
+    active_cars : int
+        The number of cars that have not stopped.
+    """
+    print(localizations['progress_report'].format(step=step, active=active_cars))
+
+
+def run_verify(path: str, engine: str):
+    """
+    Runs a scenario file with Simulation and another engine, both computing state digests,
+    and displays the first step at which they diverge.
+
+    Parameters:
+    -----------
+    path : str
+        The path of the scenario file.
+    engine : str
+        The name of the engine to check, a key of ENGINES.
+
+    Returns:
+    --------
+    int
+        The first step at which the digests differ, or None if they match.
+    """
+    scenario = load_scenario(path)
+    try:
+        simulations = [scenario.build_simulation(), scenario.build_simulation(ENGINES[engine])]
+    finally:
+        if isinstance(scenario, BinaryScenario):
+            scenario.close()
+    for simulation in simulations:
+        simulation.track_digests = True
+        simulation.run_simulation(display=False)
+    reference, candidate = (simulation.digest.steps for simulation in simulations)
+    step = StateDigest.first_divergence(reference, candidate)
+    if step is None:
+        print(localizations['digest_match'].format(engine=engine, steps=len(reference) - 1))
+    else:
+        print(localizations['digest_divergence'].format(engine=engine, step=step))
+    return step
+
+
+def convert_scenario(path: str, output: str):
+    """
+    Converts a scenario file in the batch text format to the binary format.
+
+    Parameters:
+    -----------
+    path : str
+        The path of the text scenario file.
+    output : str
+        The path of the binary scenario file to write.
+    """
+    BinaryScenario.write(load_text_scenario(path), output)
+
+
+def query_scenario(path: str, names: list, horizon: int = None, engine: str = None):
+    """
+    Simulates only the cars of a scenario file that can influence the given cars and displays their results.
+
+    Parameters:
+    -----------
+    path : str
+        The path of the scenario file.
+    names : list
+        The names of the queried cars.
+    horizon : int, optional
+        The number of steps to simulate, defaults to the whole programs.
+    engine : str, optional
+        The name of the engine simulating the cone, see select_engine.
+    """
+    scenario = load_scenario(path)
+    try:
+        simulation = scenario.build_simulation()
+    finally:
+        if isinstance(scenario, BinaryScenario):
+            scenario.close()
+    cone = run_query(simulation, names, horizon, select_engine(engine, len(simulation.cars)))
+    print(localizations['query_cone'].format(count=len(cone.cars), total=len(simulation.cars), cars=', '.join(names)))
+    cone.display_final_results(set(names))
+
+
+def run_stream(path: str, budget: RunBudget = None):
+    """
+    Runs an open world whose cars enter from a spawn stream file, displaying collisions and cars
+    leaving as they happen.
+
+    Parameters:
+    -----------
+    path : str
+        The path of the spawn stream file.
+    budget : RunBudget, optional
+        The step and time limits and progress callback of the run.
+    """
+
+    def report_collision(step: int, cars: list, pos: tuple):
+        for car in cars:
+            print(localizations['collides_with_car'].format(step=step, car1=car,
+                                                            car2=', '.join(c for c in cars if c != car), pos=pos))
+
+    def report_leave(step: int, name: str, reason: str, pos: tuple, direction: str):
+        if reason == FINISHED:
+            print(localizations['open_world_finished'].format(car=name, x=pos[0], y=pos[1], direction=direction,
+                                                              step=step))
+        elif reason == BOUNDARY:
+            print(localizations['out_of_bounds_warning'].format(car=name, x=pos[0], y=pos[1], direction=direction,
+                                                                step=step))
+
+    with open(path, 'r') as file:
+        stream = SpawnStream(file)
+        simulation = OpenWorldSimulation(Field(stream.width, stream.height))
+        print(localizations['simulation_results'])
+        simulation.run_simulation(stream, report_collision, report_leave, budget)
+    if simulation.interrupted:
+        print(localizations['simulation_interrupted'].format(
+            step=simulation.metrics.steps, reason=localizations[f'interrupted_{simulation.interrupted}']))
+        for name, x, y, direction in simulation.cars():
+            print(f"- {name} , ({x}, {y}), {direction}")
+    print(localizations['open_world_summary'].format(entered=simulation.entered, left=simulation.left,
+                                                     steps=simulation.metrics.steps, slots=simulation.capacity))
+
+
+def parse_address(address: str) -> tuple:
+    """
+    Parses a HOST:PORT address.
+
+    Parameters:
+    -----------
+    address : str
+        The address.
+
+    Returns:
+    --------
+    tuple
+        The host and the port.
+
+    Raises:
+    -------
+    ValueError
+        If the address is not a host and a port separated by a colon.
+    """
+    host, _, port = address.rpartition(':')
+    if not host or not port.isdigit():
+        raise ValueError(localizations['invalid_address_error'].format(address=address))
+    return host, int(port)
+
+
+def run_coordinator(paths: list, address: str, local_workers: int = 0, engine: str = None,
+                    timeout: float = Config.DISTRIBUTED_BATCH_TIMEOUT):
+    """
+    Shards the scenarios of many files across workers connecting over TCP and displays their results in order.
+
+    Parameters:
+    -----------
+    paths : list
+        The paths of the scenario files, in the text or the binary format.
+    address : str
+        The HOST:PORT to listen on, port 0 for any free port.
+    local_workers : int
+        The number of worker processes to start on this host.
+    engine : str, optional
+        The name of the engine the workers run, see select_engine.
+    timeout : float, optional
+        The maximum number of seconds to wait for the batch, None to wait for as long as it takes.
+    """
+    host, port = parse_address(address)
+    scenarios = [load_scenario(path) for path in paths]
+    try:
+        coordinator = Coordinator(scenarios, host, port, engine=engine)
+        print(localizations['coordinator_listening'].format(host=coordinator.address[0], port=coordinator.address[1]))
+        processes = start_local_workers(coordinator.address, local_workers)
+        try:
+            simulations = coordinator.run(timeout, processes)
+        finally:
+            stop_local_workers(processes)
+    finally:
+        for scenario in scenarios:
+            if isinstance(scenario, BinaryScenario):
+                scenario.close()
+    for path, simulation in zip(paths, simulations):
+        print(localizations['distributed_results'].format(path=path))
+        simulation.display_final_results()
+
+
+def run_monte_carlo(args):
+    """
+    Runs a Monte Carlo collision-risk estimate and displays it.
+
+    Parameters:
+    -----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+    """
+    width, height = args.field
+    estimator = MonteCarloEstimator(width, height, args.cars, args.program_length, seed=args.seed,
+                                    workers=args.workers)
+    estimator.run(args.monte_carlo, precision=args.precision).display()
+
+
+def cli(argv=None):
+    """
+    Command line entry point. Runs a batch scenario file if one is given, otherwise starts the interactive prompt.
+
+    Parameters:
+    -----------
+    argv : list, optional
+        The command line arguments, defaults to sys.argv.
+
+    Returns:
+    --------
+    int
+        The exit status.
+    """
+    parser = argparse.ArgumentParser(description='Auto Driving Car Simulation')
+    parser.add_argument('--input', metavar='FILE', help='run the scenario in FILE instead of prompting for cars')
+    parser.add_argument('--stream', metavar='FILE',
+                        help='run an open world whose cars enter at the steps given in FILE and leave when done')
+    parser.add_argument('--convert', metavar='OUTPUT',
+                        help='with --input, write the scenario to OUTPUT in the binary format instead of running it')
+    parser.add_argument('--engine', choices=sorted(ENGINES) + [AUTO_ENGINE],
+                        help=f'with --input, the simulation engine, overriding ${Config.ENGINE_ENVIRONMENT_VARIABLE} '
+                             f'and the configured {Config.SIMULATION_ENGINE!r}')
+    parser.add_argument('--verify', metavar='ENGINE', choices=sorted(ENGINES),
+                        help='with --input, compare the state digests of ENGINE with the reference engine at every step')
+    parser.add_argument('--memory-report', action='store_true',
+                        help='with --input, report memory usage per phase, per structure and per car')
+    limits = parser.add_argument_group('limits of a scenario or stream file run')
+    limits.add_argument('--max-steps', type=int, help='stop the run after this many steps')
+    limits.add_argument('--timeout', metavar='SECONDS', type=float,
+                        help='stop the run after this many seconds, or with --distribute fail the batch')
+    limits.add_argument('--progress', action='store_true', help='report the step and active cars during the run')
+    near_misses = parser.add_argument_group('near misses of a scenario file run')
+    near_misses.add_argument('--near-miss', metavar='RADIUS', type=int,
+                             help='report the cars coming within RADIUS cells of each other')
+    near_misses.add_argument('--near-miss-metric', choices=(CHEBYSHEV, MANHATTAN), default=Config.NEAR_MISS_METRIC,
+                             help='distance used for near misses')
+    parser.add_argument('--cache', metavar='DIRECTORY',
+                        help=f'with --input, reuse the results of identical scenarios cached in DIRECTORY, '
+                             f'overriding ${Config.RESULT_CACHE_ENVIRONMENT_VARIABLE}')
+    parser.add_argument('--analytics', metavar='FILE',
+                        help='with --input, export per-cell visits, collisions and flows per heading to FILE')
+    query = parser.add_argument_group('causal query of a scenario file')
+    query.add_argument('--query', metavar='NAME', nargs='+',
+                       help='simulate only the cars that can influence the named cars and display their results')
+    query.add_argument('--horizon', metavar='STEPS', type=int, help='with --query, simulate this many steps')
+    distributed = parser.add_argument_group('batch of scenario files sharded across workers over TCP')
+    distributed.add_argument('--distribute', metavar='FILE', nargs='+',
+                             help='coordinate a batch of scenario files, displaying their results in order')
+    distributed.add_argument('--listen', metavar='HOST:PORT', default='127.0.0.1:0',
+                             help='address the coordinator listens on, port 0 for any free port')
+    distributed.add_argument('--local-workers', metavar='N', type=int, default=0,
+                             help='worker processes the coordinator starts on this host')
+    distributed.add_argument('--worker', metavar='HOST:PORT', help='run shards for the coordinator at HOST:PORT')
+    metrics = parser.add_argument_group('live metrics of a scenario file run')
+    metrics.add_argument('--metrics-file', metavar='FILE', help='write OpenMetrics counters to FILE periodically')
+    metrics.add_argument('--metrics-port', metavar='PORT', type=int,
+                         help='serve OpenMetrics counters on http://127.0.0.1:PORT/')
+    metrics.add_argument('--metrics-interval', metavar='SECONDS', type=float, default=Config.METRICS_INTERVAL,
+                         help='seconds between writes of the metrics file')
+    monte_carlo = parser.add_argument_group('Monte Carlo collision-risk estimate')
+    monte_carlo.add_argument('--monte-carlo', metavar='TRIALS', type=int,
+                             help='estimate the collision rate of random fleets over at most TRIALS trials')
+    monte_carlo.add_argument('--field', nargs=2, type=int, metavar=('WIDTH', 'HEIGHT'), default=[10, 10],
+                             help='field size of every trial')
+    monte_carlo.add_argument('--cars', type=int, default=2, help='number of cars in every trial')
+    monte_carlo.add_argument('--program-length', type=int, default=10, help='number of commands of every car')
+    monte_carlo.add_argument('--seed', type=int, default=0, help='base seed of the trials')
+    monte_carlo.add_argument('--precision', type=float,
+                             help='stop once the collision rate is known within this half width')
+    monte_carlo.add_argument('--workers', type=int, help='number of worker processes')
+    args = parser.parse_args(argv)
+    if (args.max_steps is not None or args.progress) and not (args.input or args.stream):
+        parser.error('--max-steps and --progress require --input or --stream')
+    if args.timeout is not None and not (args.input or args.stream or args.distribute):
+        parser.error('--timeout requires --input, --stream or --distribute')
+    if args.stream and args.input:
+        parser.error('--stream cannot be combined with --input')
+    if args.max_steps is not None and args.max_steps < 0:
+        parser.error('--max-steps must not be negative')
+    if args.monte_carlo is not None and args.monte_carlo <= 0:
+        parser.error('--monte-carlo must be positive')
+    if args.near_miss is not None and not args.input:
+        parser.error('--near-miss requires --input')
+    if args.cache and not args.input:
+        parser.error('--cache requires --input')
+    if args.analytics and not args.input:
+        parser.error('--analytics requires --input')
+    if args.query and not args.input:
+        parser.error('--query requires --input')
+    if args.horizon is not None and not args.query:
+        parser.error('--horizon requires --query')
+    if args.horizon is not None and args.horizon < 0:
+        parser.error('--horizon must not be negative')
+    if args.engine and not (args.input or args.distribute):
+        parser.error('--engine requires --input or --distribute')
+    if args.verify and not args.input:
+        parser.error('--verify requires --input')
+    if args.convert and not args.input:
+        parser.error('--convert requires --input')
+    if args.memory_report and not args.input:
+        parser.error('--memory-report requires --input')
+    if (args.metrics_file or args.metrics_port is not None) and not args.input:
+        parser.error('--metrics-file and --metrics-port require --input')
+    try:
+        if args.monte_carlo is not None:
+            run_monte_carlo(args)
+        elif args.worker:
+            run_worker(*parse_address(args.worker))
+        elif args.stream:
+            run_stream(args.stream, RunBudget(args.max_steps, args.timeout,
+                                              progress=report_progress if args.progress else None))
+        elif args.distribute:
+            run_coordinator(args.distribute, args.listen, args.local_workers, args.engine,
+                            args.timeout if args.timeout is not None else Config.DISTRIBUTED_BATCH_TIMEOUT)
+        elif args.verify:
+            if run_verify(args.input, args.verify) is not None:
+                return 1
+        elif args.convert:
+            convert_scenario(args.input, args.convert)
+        elif args.query:
+            query_scenario(args.input, args.query, args.horizon, args.engine)
+        elif args.input:
+            run_batch(args.input, memory_report=args.memory_report, metrics_file=args.metrics_file,
+                      metrics_port=args.metrics_port, metrics_interval=args.metrics_interval, engine=args.engine,
+                      budget=RunBudget(args.max_steps, args.timeout,
+                                       progress=report_progress if args.progress else None),
+                      near_miss=NearMissDetector(args.near_miss, args.near_miss_metric)
+                      if args.near_miss is not None else None, analytics_file=args.analytics,
+                      cache_directory=args.cache)
+        else:
+            main()
+    except (OSError, ValueError) as error:
+        print(error)
+        return 1
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
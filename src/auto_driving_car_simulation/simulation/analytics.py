@@ -0,0 +1,206 @@
+import struct
+from array import array
+from collections import Counter
+from ..localize.localize import localizations
+from ..config.config import Config
+
+
+# Magic, version, width, height and number of cells stored.
+HEADER = struct.Struct('<4sIqqq')
+MAGIC = b'ADTA'
+VERSION = 1
+
+
+class TrafficAnalytics:
+    """
+    Per-cell traffic counters accumulated while a simulation runs.
+
+    Cells are keyed ``y * width + x`` and flows ``cell * 4 + heading``, the packed keys of the
+    occupancy and of the swap detection. Counters are dense int64 arrays when the field has at most
+    Config.ANALYTICS_DENSE_MAX_CELLS cells and sparse counters otherwise; both are updated with the
+    same single indexed increment, so a moving car costs a constant two increments per step.
+
+    Attributes:
+    -----------
+    width : int
+        The width of the field.
+    height : int
+        The height of the field.
+    visits : array or Counter
+        The number of times a car started in or entered each cell.
+    collisions : array or Counter
+        The number of collisions reported at each cell.
+    flow : array or Counter
+        The number of moves out of each cell, per heading.
+    """
+
+    def __init__(self):
+        """
+        Constructs empty analytics, sized by the field of the first run.
+        """
+        self.width = 0
+        self.height = 0
+        self.visits = Counter()
+        self.collisions = Counter()
+        self.flow = Counter()
+
+    @property
+    def dense(self) -> bool:
+        """Whether the counters are dense arrays."""
+        return isinstance(self.visits, array)
+
+    def start(self, field, cars: list, stopped_cars: set):
+        """
+        Clears the counters for a run and counts the start cells of the active cars as visits.
+
+        Parameters:
+        -----------
+        field : Field
+            The field on which the simulation runs.
+        cars : list
+            The cars of the simulation.
+        stopped_cars : set
+            The names of the stopped cars.
+        """
+        self.width, self.height = field.width, field.height
+        area = field.width * field.height
+        if area <= Config.ANALYTICS_DENSE_MAX_CELLS:
+            self.visits = array('q', bytes(8 * area))
+            self.collisions = array('q', bytes(8 * area))
+            self.flow = array('q', bytes(32 * area))
+        else:
+            self.visits, self.collisions, self.flow = Counter(), Counter(), Counter()
+        for car in cars:
+            if car.name not in stopped_cars:
+                self.visits[car.y * self.width + car.x] += 1
+
+    def move(self, previous_position: tuple, x: int, y: int, heading: int):
+        """
+        Counts a car moving forward from a cell to the next one.
+
+        Parameters:
+        -----------
+        previous_position : tuple
+            The (x, y) of the cell left.
+        x : int
+            The x-coordinate of the cell entered.
+        y : int
+            The y-coordinate of the cell entered.
+        heading : int
+            The heading index of the car.
+        """
+        self.flow[(previous_position[1] * self.width + previous_position[0]) * 4 + heading] += 1
+        self.visits[y * self.width + x] += 1
+
+    def collision(self, pos: tuple):
+        """
+        Counts a collision at a cell.
+
+        Parameters:
+        -----------
+        pos : tuple
+            The (x, y) position of the collision.
+        """
+        self.collisions[pos[1] * self.width + pos[0]] += 1
+
+    def cells(self):
+        """
+        Yields the counters of every cell visited or collided in, in key order.
+
+        Yields:
+        -------
+        tuple
+            The (x, y), visits, collisions and the tuple of flows per heading of a cell.
+        """
+        width = self.width
+        if self.dense:
+            keys = (key for key in range(len(self.visits)) if self.visits[key] or self.collisions[key])
+        else:
+            keys = sorted(set(self.visits) | set(self.collisions))
+        for key in keys:
+            yield ((key % width, key // width), self.visits[key], self.collisions[key],
+                   tuple(self.flow[key * 4 + heading] for heading in range(4)))
+
+    def hot_cells(self, count: int) -> list:
+        """
+        Returns the most visited cells.
+
+        Parameters:
+        -----------
+        count : int
+            The number of cells to return.
+
+        Returns:
+        --------
+        list
+            The ((x, y), visits) of the most visited cells, most visited first.
+        """
+        ranked = sorted(((visits, position) for position, visits, _, _ in self.cells()),
+                        key=lambda item: (-item[0], item[1][1], item[1][0]))
+        return [(position, visits) for visits, position in ranked[:count]]
+
+    def export(self, path: str):
+        """
+        Writes the counters of the cells visited or collided in to a compact array file.
+
+        After the header come int64 columns of the cell keys, visits and collisions, then the flows
+        of every cell, four int64 per cell. Cells never visited are left out.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the file.
+        """
+        keys, visits, collisions, flow = array('q'), array('q'), array('q'), array('q')
+        for (x, y), cell_visits, cell_collisions, cell_flow in self.cells():
+            keys.append(y * self.width + x)
+            visits.append(cell_visits)
+            collisions.append(cell_collisions)
+            flow.extend(cell_flow)
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.width, self.height, len(keys)))
+            for column in (keys, visits, collisions, flow):
+                file.write(column)
+
+    @staticmethod
+    def load(path: str):
+        """
+        Reads analytics written by ``export``, into sparse counters.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the file.
+
+        Returns:
+        --------
+        TrafficAnalytics
+            The analytics of the exported run.
+
+        Raises:
+        -------
+        ValueError
+            If the file is not an analytics file of a supported version.
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+        try:
+            magic, version, width, height, count = HEADER.unpack_from(data)
+            if magic != MAGIC or version != VERSION or len(data) != HEADER.size + 56 * count:
+                raise ValueError
+        except (struct.error, ValueError):
+            raise ValueError(localizations['invalid_analytics_file_error'].format(path=path))
+        columns = array('q')
+        columns.frombytes(data[HEADER.size:])
+        analytics = TrafficAnalytics()
+        analytics.width, analytics.height = width, height
+        keys = columns[:count]
+        for index, key in enumerate(keys):
+            if columns[count + index]:
+                analytics.visits[key] = columns[count + index]
+            if columns[2 * count + index]:
+                analytics.collisions[key] = columns[2 * count + index]
+            for heading in range(4):
+                if columns[3 * count + 4 * index + heading]:
+                    analytics.flow[key * 4 + heading] = columns[3 * count + 4 * index + heading]
+        return analytics
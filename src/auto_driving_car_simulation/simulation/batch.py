@@ -0,0 +1,252 @@
+from array import array
+from ..localize.localize import localizations
+from .car import Car
+from .program import OFFSETS
+from .simulation import Simulation
+from .digest import BOUNDARY, StateDigest, car_digest
+from .budget import STEP_LIMIT, RunBudget
+
+
+class BatchSimulation:
+    """
+    Runs many independent simulations together, one step of every simulation at a time.
+
+    The cars are packed into padded arrays with a leading batch dimension: the car ``c`` of the
+    simulation ``b`` lives in slot ``b * width + c``, where the batch width is the largest number
+    of cars, and padding slots are stopped from the start. Cells are keyed with an offset per
+    simulation, so cars of different simulations never meet. The per-car and per-step work of the
+    simulations is done in one loop, without going through Car objects, and results are unpacked
+    into every simulation as if it had been run on its own.
+
+    Attributes:
+    -----------
+    simulations : list
+        The simulations to run.
+    """
+
+    def __init__(self, simulations: list):
+        """
+        Packs the simulations to run together.
+
+        Parameters:
+        -----------
+        simulations : list
+            The simulations to run. Each one keeps its own field, cars and results.
+        """
+        self.simulations = simulations
+
+    def run_simulation(self, display: bool = False, budget: RunBudget = None):
+        """
+        Runs all the simulations and stores the results in each of them.
+
+        Parameters:
+        -----------
+        display : bool
+            Whether every simulation prints its initial car positions and final results.
+        budget : RunBudget, optional
+            The step and time limits, cancellation token and progress callback of the whole batch.
+
+        Raises:
+        -------
+        ValueError
+            If a simulation has a near-miss detector, which only the step loop of Simulation drives.
+        """
+        simulations = self.simulations
+        if any(simulation.near_miss is not None for simulation in simulations):
+            raise ValueError(localizations['batch_near_miss_error'])
+        if display:
+            for simulation in simulations:
+                simulation.display_initial_car_positions()
+        width = max((len(simulation.cars) for simulation in simulations), default=0)
+        size = len(simulations) * width
+        xs, ys = array('q', bytes(8 * size)), array('q', bytes(8 * size))
+        headings = bytearray(size)
+        stopped = bytearray(b'\x01') * size
+        programs = [None] * size
+        limits = []
+        bases = []
+        digests = []
+        analytics = [simulation.analytics for simulation in simulations]
+        metrics = [simulation.metrics for simulation in simulations]
+        base = 0
+        for batch, simulation in enumerate(simulations):
+            simulation.metrics.start(len(simulation.cars) - len(simulation.stopped_cars))
+            simulation.interrupted = None
+            limits.append((simulation.field.width, simulation.field.height))
+            bases.append(base)
+            base += simulation.field.width * simulation.field.height
+            simulation.digest = StateDigest(simulation.cars, simulation.stopped_cars) if simulation.track_digests else None
+            digests.append(simulation.digest)
+            if simulation.analytics is not None:
+                simulation.analytics.start(simulation.field, simulation.cars, simulation.stopped_cars)
+            for slot, car in enumerate(simulation.cars, batch * width):
+                xs[slot], ys[slot] = car.x, car.y
+                headings[slot] = Car.DIRECTIONS.index(car.direction)
+                stopped[slot] = car.name in simulation.stopped_cars
+                programs[slot] = car.program
+
+        keys = [0] * size
+        cells = {}
+        running = []
+        for slot in range(size):
+            if not stopped[slot]:
+                batch = slot // width
+                keys[slot] = bases[batch] + ys[slot] * limits[batch][0] + xs[slot]
+                cells.setdefault(keys[slot], []).append(slot)
+                running.append(slot)
+        max_steps = max((len(program) for program in programs if program is not None), default=0)
+        lengths = [max((len(car.program) for car in simulation.cars), default=0) for simulation in simulations]
+        tracked = [(digest, steps) for digest, steps in zip(digests, lengths) if digest is not None]
+        analysed = any(simulation_analytics is not None for simulation_analytics in analytics)
+
+        step_count, check_interval = max_steps, 0
+        if budget is not None:
+            step_count, check_interval = budget.start(max_steps, size)
+        interrupted = None
+        # Cars starting in the same cell collide at the first step of a simulation that runs one.
+        entered = [key for key, slots in cells.items() if len(slots) > 1 and lengths[slots[0] // width]]
+        for step in range(step_count):
+            running = [slot for slot in running if not stopped[slot] and step < len(programs[slot])]
+            if not running:
+                break
+            if check_interval and step % check_interval == 0:
+                interrupted = budget.check(step, sum(simulation_metrics.active_cars for simulation_metrics in metrics))
+                if interrupted:
+                    break
+            edges = {}
+            swaps = []
+            for slot in running:
+                command = programs[slot][step]
+                digest = digests[slot // width] if tracked else None
+                if digest is not None:
+                    before = car_digest(slot % width, xs[slot], ys[slot], headings[slot])
+                if command == 'L':
+                    headings[slot] = (headings[slot] - 1) % 4
+                    metrics[slot // width].turns += 1
+                elif command == 'R':
+                    headings[slot] = (headings[slot] + 1) % 4
+                    metrics[slot // width].turns += 1
+                else:
+                    batch = slot // width
+                    field_width, field_height = limits[batch]
+                    heading = headings[slot]
+                    dx, dy = OFFSETS[heading]
+                    x, y = xs[slot] + dx, ys[slot] + dy
+                    if not (0 <= x < field_width and 0 <= y < field_height):
+                        self._stop_at_boundary(slot, width, step, cells, keys, stopped)
+                        if digest is not None:
+                            digest.stop(slot % width)
+                            digest.event(step + 1, BOUNDARY, slot % width, xs[slot], ys[slot])
+                        continue
+                    previous = (xs[slot], ys[slot])
+                    xs[slot], ys[slot] = x, y
+                    old, new = keys[slot], bases[batch] + y * field_width + x
+                    self._remove(slot, cells, keys)
+                    keys[slot] = new
+                    cells.setdefault(new, []).append(slot)
+                    entered.append(new)
+                    metrics[batch].moves += 1
+                    if analysed and analytics[batch] is not None:
+                        analytics[batch].move(previous, x, y, heading)
+                    other = edges.get(new * 4 + (heading + 2) % 4)
+                    if other is not None:
+                        swaps.append(([other, slot], previous))
+                    edges[old * 4 + heading] = slot
+                if digest is not None:
+                    digest.change(car_digest(slot % width, xs[slot], ys[slot], headings[slot]) - before)
+            self._report_collisions(step, width, entered, swaps, cells, keys, stopped, xs, ys)
+            entered = []
+            for simulation_metrics, steps in zip(metrics, lengths):
+                if step < steps:
+                    simulation_metrics.steps += 1
+            for digest, steps in tracked:
+                if step < steps:
+                    digest.end_step()
+
+        for batch, simulation in enumerate(simulations):
+            for slot, car in enumerate(simulation.cars, batch * width):
+                car.x, car.y = xs[slot], ys[slot]
+                car.direction = Car.DIRECTIONS[headings[slot]]
+        for simulation, steps in zip(simulations, lengths):
+            if interrupted:
+                simulation.interrupted = interrupted
+                continue
+            # The batch stops once every car is done, while Simulation counts every step of its programs.
+            simulation.metrics.steps = min(steps, step_count)
+            if step_count < max_steps and RunBudget.truncated(simulation.cars, simulation.stopped_cars, step_count):
+                simulation.interrupted = STEP_LIMIT
+        for digest, steps in tracked:
+            if not interrupted:
+                digest.finish(min(steps, step_count))
+        if display:
+            for simulation in simulations:
+                simulation.display_final_results()
+
+    def _car(self, slot: int, width: int):
+        """Returns the simulation and the car of a slot."""
+        simulation = self.simulations[slot // width]
+        return simulation, simulation.cars[slot % width]
+
+    def _stop_at_boundary(self, slot: int, width: int, step: int, cells: dict, keys: list, stopped: bytearray):
+        """Records a boundary collision of the car of a slot and stops it."""
+        simulation, car = self._car(slot, width)
+        simulation.boundary_collisions.setdefault(car.name, []).append(step + 1)
+        simulation.stopped_cars.add(car.name)
+        simulation.metrics.boundary_hits += 1
+        simulation.metrics.active_cars = len(simulation.cars) - len(simulation.stopped_cars)
+        stopped[slot] = 1
+        self._remove(slot, cells, keys)
+
+    def _report_collisions(self, step: int, width: int, entered: list, swaps: list, cells: dict, keys: list,
+                           stopped: bytearray, xs, ys):
+        """
+        Reports the swaps and the collisions in the cells entered during the step to their simulations,
+        in the order Simulation.check_collisions reports them, and stops the cars involved.
+        """
+        groups = sorted(sorted(cells[key]) for key in dict.fromkeys(entered) if len(cells.get(key, ())) > 1)
+        for slots, position in swaps:
+            simulation = self.simulations[slots[0] // width]
+            simulation.report_collision([self._car(slot, width)[1].name for slot in slots], position, step,
+                                        swap=True)
+        for slots in groups:
+            simulation = self.simulations[slots[0] // width]
+            simulation.report_collision([self._car(slot, width)[1].name for slot in slots],
+                                        (xs[slots[0]], ys[slots[0]]), step)
+        for slots in [slots for slots, _ in swaps] + groups:
+            for slot in slots:
+                if not stopped[slot]:
+                    stopped[slot] = 1
+                    self._remove(slot, cells, keys)
+
+    @staticmethod
+    def _remove(slot: int, cells: dict, keys: list):
+        """Removes the car of a slot from its cell."""
+        group = cells[keys[slot]]
+        group.remove(slot)
+        if not group:
+            del cells[keys[slot]]
+
+
+class VectorizedSimulation(Simulation):
+    """
+    Simulation stepped with the flat arrays of BatchSimulation, as a batch of one.
+
+    It skips the Car objects and logging of Simulation during the run, and is about twice as fast
+    from tens to tens of thousands of cars.
+    """
+
+    def run_simulation(self, display: bool = True, budget: RunBudget = None):
+        """
+        Runs the simulation with the flat arrays of BatchSimulation.
+
+        Parameters:
+        -----------
+        display : bool
+            Whether to print the initial car positions and the final results.
+        budget : RunBudget, optional
+            The step and time limits, cancellation token and progress callback of the run.
+        """
+        if self.near_miss is not None:
+            # Near misses are only detected by the step loop of Simulation.
+            return Simulation.run_simulation(self, display, budget)
+        BatchSimulation([self]).run_simulation(display, budget)
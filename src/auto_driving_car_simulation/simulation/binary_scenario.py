@@ -0,0 +1,227 @@
+import mmap
+import struct
+from array import array
+from collections.abc import Sequence
+from ..localize.localize import localizations
+from ..config.config import Config
+from .field import Field
+from .car import Car
+from .program import Program
+from .simulation import Simulation
+
+
+# Magic, version, width, height and car count.
+HEADER = struct.Struct('<4sIqqq')
+MAGIC = b'ADCS'
+VERSION = 1
+
+
+class BinaryScenario:
+    """
+    A scenario in the columnar binary format, memory-mapped rather than parsed.
+
+    After the header come the start x and y int64 columns, the int64 offsets of the name string
+    table and of the command blob (one more than the number of cars), the int8 heading column, the
+    UTF-8 names and the commands in their compact repeat syntax. Loading maps the file and reads the
+    header only; columns are views into the mapping and cars are decoded on access.
+
+    Files are trusted as written by ``write``, which only accepts validated scenarios.
+
+    Attributes:
+    -----------
+    width : int
+        The width of the field.
+    height : int
+        The height of the field.
+    xs : memoryview
+        The start x-coordinate of each car.
+    ys : memoryview
+        The start y-coordinate of each car.
+    headings : memoryview
+        The start heading index of each car.
+    cars : Sequence
+        The cars as (name, x, y, direction, commands) tuples, decoded on access.
+    """
+
+    def __init__(self, path: str):
+        """
+        Memory-maps a binary scenario file.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the binary scenario file.
+
+        Raises:
+        -------
+        ValueError
+            If the file is not a binary scenario of a supported version.
+        """
+        with open(path, 'rb') as file:
+            try:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(localizations['invalid_binary_scenario_error'].format(path=path))
+        self._buffer = memoryview(self._mmap)
+        try:
+            magic, version, self.width, self.height, count = HEADER.unpack_from(self._buffer)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError
+            offset = HEADER.size
+            self.xs, offset = self._column('q', offset, count)
+            self.ys, offset = self._column('q', offset, count)
+            self._name_offsets, offset = self._column('q', offset, count + 1)
+            self._command_offsets, offset = self._column('q', offset, count + 1)
+            self.headings, offset = self._column('b', offset, count)
+            self._names = self._buffer[offset:offset + self._name_offsets[count]]
+            offset += self._name_offsets[count]
+            self._commands = self._buffer[offset:offset + self._command_offsets[count]]
+            if offset + self._command_offsets[count] != len(self._buffer):
+                raise ValueError
+        except (ValueError, struct.error):
+            self.close()
+            raise ValueError(localizations['invalid_binary_scenario_error'].format(path=path))
+        self.cars = _Cars(self)
+
+    def _column(self, typecode: str, offset: int, count: int) -> tuple:
+        """Returns a view of a column and the offset following it."""
+        end = offset + count * array(typecode).itemsize
+        if end > len(self._buffer):
+            raise ValueError
+        return self._buffer[offset:end].cast(typecode), end
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.xs)
+
+    def close(self):
+        """
+        Releases the views and unmaps the file.
+        """
+        for name in ('xs', 'ys', 'headings', '_name_offsets', '_command_offsets', '_names', '_commands',
+                     '_buffer'):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._mmap.close()
+
+    @staticmethod
+    def is_binary(path: str) -> bool:
+        """
+        Checks if a file starts with the binary scenario magic.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the file.
+
+        Returns:
+        --------
+        bool
+            True if the file is a binary scenario, False otherwise.
+        """
+        with open(path, 'rb') as file:
+            return file.read(len(MAGIC)) == MAGIC
+
+    @staticmethod
+    def load(path: str):
+        """
+        Memory-maps a binary scenario file.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the binary scenario file.
+
+        Returns:
+        --------
+        BinaryScenario
+            The mapped scenario, to be closed once the simulation has run.
+        """
+        return BinaryScenario(path)
+
+    @staticmethod
+    def write(scenario, path: str):
+        """
+        Writes a validated scenario in the binary format.
+
+        Parameters:
+        -----------
+        scenario : Scenario
+            The scenario to write, as read from the batch text format.
+        path : str
+            The path of the binary scenario file.
+        """
+        xs, ys, headings = array('q'), array('q'), array('b')
+        name_offsets, command_offsets = array('q', [0]), array('q', [0])
+        names, commands = bytearray(), bytearray()
+        for name, x, y, direction, source in scenario.cars:
+            xs.append(x)
+            ys.append(y)
+            headings.append(Config.CAR_DIRECTIONS.index(direction))
+            names += name.encode()
+            name_offsets.append(len(names))
+            commands += str(Program.parse(source)).encode('ascii')
+            command_offsets.append(len(commands))
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, scenario.width, scenario.height, len(xs)))
+            for column in (xs, ys, name_offsets, command_offsets, headings, names, commands):
+                file.write(column)
+
+    def name(self, index: int) -> str:
+        """Returns the name of a car."""
+        return str(self._names[self._name_offsets[index]:self._name_offsets[index + 1]], 'utf-8')
+
+    def commands(self, index: int) -> str:
+        """Returns the commands of a car in their compact repeat syntax."""
+        return str(self._commands[self._command_offsets[index]:self._command_offsets[index + 1]], 'ascii')
+
+    def build_simulation(self, engine=Simulation) -> Simulation:
+        """
+        Builds a simulation with the field and cars of the scenario.
+
+        Cars with the same commands share one compiled program.
+
+        Parameters:
+        -----------
+        engine : type
+            The Simulation class, or subclass, to build.
+
+        Returns:
+        --------
+        Simulation
+            The simulation ready to run.
+        """
+        simulation = engine(Field(self.width, self.height))
+        for name, x, y, direction, commands in self.cars:
+            car = Car(name, x, y, direction)
+            car.program = Program.parse(commands)
+            car.commands = commands
+            simulation.add_car(car)
+        return simulation
+
+
+class _Cars(Sequence):
+    """Read-only sequence decoding the cars of a binary or columnar scenario on access."""
+
+    def __init__(self, scenario: BinaryScenario):
+        self._scenario = scenario
+
+    def __len__(self):
+        return len(self._scenario)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[item] for item in range(*index.indices(len(self)))]
+        scenario = self._scenario
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return (scenario.name(index), scenario.xs[index], scenario.ys[index],
+                Config.CAR_DIRECTIONS[scenario.headings[index]], scenario.commands(index))
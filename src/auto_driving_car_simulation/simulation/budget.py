@@ -0,0 +1,145 @@
+import threading
+import time
+from ..config.config import Config
+
+
+# Reasons a run was interrupted.
+STEP_LIMIT = 'max_steps'
+TIMEOUT = 'timeout'
+CANCELLED = 'cancelled'
+
+
+class CancellationToken:
+    """
+    Flag asking a running simulation to stop at its next check, settable from any thread.
+    """
+
+    def __init__(self):
+        """
+        Constructs a token that is not cancelled.
+        """
+        self._event = threading.Event()
+
+    def cancel(self):
+        """
+        Asks the simulations checking this token to stop.
+        """
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the token was cancelled."""
+        return self._event.is_set()
+
+
+class RunBudget:
+    """
+    Limits of a simulation run and the callback reporting its progress.
+
+    The step limit only shortens the step loop. The clock, the token and the progress callback are
+    checked before a step once every few steps, about every Config.BUDGET_CHECK_COMMANDS car
+    commands, so checks cost nothing noticeable per step. An interrupted run stops between two
+    steps, so its result is the consistent state after the last completed step.
+
+    Attributes:
+    -----------
+    max_steps : int
+        The maximum number of steps to simulate, or None.
+    max_seconds : float
+        The maximum wall-clock duration of the run in seconds, or None.
+    token : CancellationToken
+        The token cancelling the run, or None.
+    progress : callable
+        Called with the current step and the number of active cars at every check, or None.
+    """
+
+    def __init__(self, max_steps: int = None, max_seconds: float = None, token: CancellationToken = None,
+                 progress=None):
+        """
+        Constructs all the necessary attributes for the budget object.
+
+        Parameters:
+        -----------
+        max_steps : int, optional
+            The maximum number of steps to simulate.
+        max_seconds : float, optional
+            The maximum wall-clock duration of the run in seconds.
+        token : CancellationToken, optional
+            The token cancelling the run.
+        progress : callable, optional
+            Called with the current step and the number of active cars at every check.
+        """
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.token = token
+        self.progress = progress
+        self._deadline = None
+
+    def start(self, step_count: int, car_count: int) -> tuple:
+        """
+        Starts the clock of a run.
+
+        Parameters:
+        -----------
+        step_count : int
+            The number of steps of the run without a budget.
+        car_count : int
+            The number of cars of the run.
+
+        Returns:
+        --------
+        tuple
+            The number of steps to simulate and the number of steps between checks, 0 for none.
+        """
+        if self.max_seconds is not None:
+            self._deadline = time.monotonic() + self.max_seconds
+        if self.max_steps is not None:
+            step_count = min(step_count, self.max_steps)
+        if self.max_seconds is None and self.token is None and self.progress is None:
+            return step_count, 0
+        return step_count, max(1, Config.BUDGET_CHECK_COMMANDS // max(car_count, 1))
+
+    def check(self, step: int, active_cars: int):
+        """
+        Reports progress and checks the token and the clock.
+
+        Parameters:
+        -----------
+        step : int
+            The number of steps simulated.
+        active_cars : int
+            The number of cars that have not stopped.
+
+        Returns:
+        --------
+        str
+            CANCELLED or TIMEOUT if the run must stop, None otherwise.
+        """
+        if self.progress is not None:
+            self.progress(step, active_cars)
+        if self.token is not None and self.token.cancelled:
+            return CANCELLED
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            return TIMEOUT
+        return None
+
+    @staticmethod
+    def truncated(cars: list, stopped_cars: set, step_count: int) -> bool:
+        """
+        Checks if a car still had commands to run when the step limit was reached.
+
+        Parameters:
+        -----------
+        cars : list
+            The cars of the simulation.
+        stopped_cars : set
+            The names of the stopped cars.
+        step_count : int
+            The number of steps simulated.
+
+        Returns:
+        --------
+        bool
+            True if an active car has more than step_count commands, False otherwise.
+        """
+        return any(len(car.program) > step_count for car in cars if car.name not in stopped_cars)
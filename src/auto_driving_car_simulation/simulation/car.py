@@ -1,4 +1,5 @@
 from .field import Field
+from .program import Program
 from ..localize.localize import localizations
 from ..config.config import Config
 from ..utils.logger import Logger
@@ -18,8 +19,10 @@ class Car:
         The y-coordinate of the car's position.
     direction : str
         The direction the car is facing ('N', 'E', 'S', 'W').
-    commands : list
-        The list of commands for the car to execute.
+    commands : str
+        The commands for the car to execute.
+    program : Program
+        The compiled commands, shared with every car running the same string.
     """
     DIRECTIONS = Config.CAR_DIRECTIONS
 
@@ -42,7 +45,8 @@ class Car:
         self.x = x
         self.y = y
         self.direction = direction
-        self.commands = []
+        self.commands = ''
+        self.program = Program.compile('')
         self.logger = Logger.setup_logger('CAR')
 
     @staticmethod
@@ -68,7 +72,7 @@ class Car:
             print(localizations['invalid_car_name_error'])
             raise ValueError(localizations['invalid_car_name_error'])
 
-        if any(existing_car.name == name for existing_car in simulation.cars):
+        if simulation.has_car(name):
             logger.debug("Car name '%s' is already in use. Choose a unique name.", name)
             print(localizations['duplicate_car_name_error'].format(name=name))
             raise ValueError(localizations['duplicate_car_name_error'].format(name=name))
@@ -80,17 +84,20 @@ class Car:
         Parameters:
         -----------
         commands : str
-            The commands for the car to execute.
+            The commands for the car to execute, optionally using the repeat syntax, e.g. ``3(FFR)``.
 
         Raises:
         -------
         ValueError
-            If the commands contain invalid characters.
+            If the commands contain invalid characters or syntax.
         """
-        if not all(c in 'LRF' for c in commands):
-            self.logger.debug("Invalid commands: %s", commands)
+        try:
+            program = Program.parse(commands)
+        except ValueError as error:
+            self.logger.debug("Invalid commands: %s (%s)", commands, error)
             raise ValueError(localizations['invalid_command_error'])
-        self.commands = commands
+        self.program = program
+        self.commands = str(program)
 
     def turn_left(self):
         """Turns the car to the left."""
@@ -0,0 +1,187 @@
+from .car import Car
+
+
+MASK = (1 << 64) - 1
+
+# Event kinds.
+SWAP = 0
+COLLISION = 1
+BOUNDARY = 2
+
+
+def mix(value: int) -> int:
+    """
+    Returns the splitmix64 finalizer of a value, a well distributed 64-bit hash.
+
+    Parameters:
+    -----------
+    value : int
+        The value to hash, taken modulo 2**64.
+
+    Returns:
+    --------
+    int
+        The 64-bit hash.
+    """
+    value = (value + 0x9E3779B97F4A7C15) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+
+def car_digest(index: int, x: int, y: int, heading: int) -> int:
+    """
+    Returns the digest of the position and heading of a car.
+
+    Parameters:
+    -----------
+    index : int
+        The index of the car in the simulation.
+    x : int
+        The x-coordinate of the car.
+    y : int
+        The y-coordinate of the car.
+    heading : int
+        The heading index of the car.
+
+    Returns:
+    --------
+    int
+        The 64-bit digest.
+    """
+    return mix(mix(mix(index) ^ (x & MASK)) ^ ((y << 2 | heading) & MASK))
+
+
+def stop_digest(index: int) -> int:
+    """Returns the digest of a car being stopped."""
+    return mix(mix(index) + 1)
+
+
+def event_digest(step: int, kind: int, index: int, x: int, y: int) -> int:
+    """Returns the digest of a car taking part in an event of the given kind at a position and step."""
+    return mix(car_digest(index, x, y, kind) ^ mix(step))
+
+
+class StateDigest:
+    """
+    Rolling digest of the state of a simulation, one value per step.
+
+    The state hash is the sum modulo 2**64 of a digest per car position and heading, per stopped car
+    and per car taking part in an event of the step. Sums do not depend on the order of the updates,
+    so an engine can update the digest in any order, or add partial sums computed by its workers.
+    The value of every step mixes the value of the previous step with the state hash.
+
+    Attributes:
+    -----------
+    indices : dict
+        The index of each car, by name.
+    state : int
+        The hash of the current positions, headings and stopped cars.
+    steps : list
+        The value after each step, starting with the initial state.
+    """
+
+    def __init__(self, cars: list, stopped_cars: set):
+        """
+        Constructs the digest of the initial state of a simulation.
+
+        Parameters:
+        -----------
+        cars : list
+            The cars of the simulation, in order.
+        stopped_cars : set
+            The names of the stopped cars.
+        """
+        self.indices = {car.name: index for index, car in enumerate(cars)}
+        self.state = 0
+        for index, car in enumerate(cars):
+            self.change(car_digest(index, car.x, car.y, Car.DIRECTIONS.index(car.direction)))
+            if car.name in stopped_cars:
+                self.stop(index)
+        self._events = 0
+        self.steps = [mix(self.state)]
+
+    def change(self, delta: int):
+        """
+        Adds the difference between the new and the old digests of cars to the state.
+
+        Parameters:
+        -----------
+        delta : int
+            The difference, taken modulo 2**64.
+        """
+        self.state = (self.state + delta) & MASK
+
+    def stop(self, index: int):
+        """Marks a car as stopped."""
+        self.change(stop_digest(index))
+
+    def event(self, step: int, kind: int, index: int, x: int, y: int):
+        """Adds a car taking part in an event of the current step."""
+        self._events = (self._events + event_digest(step, kind, index, x, y)) & MASK
+
+    def collision(self, cars: list, pos: tuple, step: int, swap: bool, stopped_cars: set):
+        """
+        Adds a reported collision and stops the cars involved that were not stopped yet.
+
+        Parameters:
+        -----------
+        cars : list
+            The names of the cars involved.
+        pos : tuple
+            The position of the collision.
+        step : int
+            The step at which the collision occurred, counted from 1.
+        swap : bool
+            Whether the cars swapped cells head-on.
+        stopped_cars : set
+            The names of the cars stopped before the collision.
+        """
+        for name in cars:
+            index = self.indices[name]
+            self.event(step, SWAP if swap else COLLISION, index, pos[0], pos[1])
+            if name not in stopped_cars:
+                self.stop(index)
+
+    def end_step(self):
+        """
+        Records the value of the step just simulated.
+        """
+        self.steps.append(mix(self.steps[-1] ^ ((self.state + self._events) & MASK)))
+        self._events = 0
+
+    def finish(self, step_count: int):
+        """
+        Records the values of the steps an engine skipped because nothing could change any more.
+
+        Parameters:
+        -----------
+        step_count : int
+            The number of steps of the simulation.
+        """
+        while len(self.steps) <= step_count:
+            self.end_step()
+
+    @staticmethod
+    def first_divergence(first: list, second: list):
+        """
+        Returns the first step at which two lists of step values differ.
+
+        Parameters:
+        -----------
+        first : list
+            The step values of one engine.
+        second : list
+            The step values of another engine.
+
+        Returns:
+        --------
+        int
+            The first step that differs, 0 being the initial state, or None if they are identical.
+        """
+        for step, (left, right) in enumerate(zip(first, second)):
+            if left != right:
+                return step
+        if len(first) != len(second):
+            return min(len(first), len(second))
+        return None
@@ -0,0 +1,398 @@
+import json
+import queue
+import socket
+import struct
+import threading
+import time
+from multiprocessing import Process
+from ..localize.localize import localizations
+from ..config.config import Config
+from .scenario import Scenario
+from .engines import select_engine
+from .result_cache import ResultCache
+
+
+# Length prefix of every message.
+LENGTH = struct.Struct('>I')
+
+# Message types.
+READY = 'ready'
+HEARTBEAT = 'heartbeat'
+SHARD = 'shard'
+RESULT = 'result'
+DONE = 'done'
+
+
+def send_message(connection: socket.socket, message: dict):
+    """
+    Sends a message as length-prefixed JSON.
+
+    Parameters:
+    -----------
+    connection : socket.socket
+        The connected socket.
+    message : dict
+        The message, with its type under 'type'.
+    """
+    data = json.dumps(message, separators=(',', ':')).encode()
+    connection.sendall(LENGTH.pack(len(data)) + data)
+
+
+def receive_message(connection: socket.socket) -> dict:
+    """
+    Receives a length-prefixed JSON message.
+
+    Parameters:
+    -----------
+    connection : socket.socket
+        The connected socket.
+
+    Returns:
+    --------
+    dict
+        The message.
+
+    Raises:
+    -------
+    ConnectionError
+        If the peer closed the connection.
+    """
+    length, = LENGTH.unpack(_receive(connection, LENGTH.size))
+    return json.loads(_receive(connection, length))
+
+
+def _receive(connection: socket.socket, size: int) -> bytes:
+    """Receives exactly size bytes."""
+    data = bytearray()
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError(localizations['connection_closed_error'])
+        data += chunk
+    return bytes(data)
+
+
+class Coordinator:
+    """
+    Splits a batch of scenarios into shards and hands them to workers connecting over TCP.
+
+    Each connection is served by its own thread, which sends a pending shard whenever its worker
+    is ready and merges the results it sends back. Workers send heartbeats while they run a shard;
+    a shard whose worker disconnects or stays silent for longer than the heartbeat timeout goes back
+    to the pending queue for another worker, up to a number of attempts. Results are merged by
+    scenario index, so they come back in the order of the batch whichever worker ran them.
+
+    Attributes:
+    -----------
+    scenarios : list
+        The scenarios of the batch.
+    shards : list
+        The indices of the scenarios of each shard.
+    address : tuple
+        The (host, port) the coordinator listens on.
+    """
+
+    def __init__(self, scenarios: list, host: str = '127.0.0.1', port: int = 0,
+                 shard_size: int = Config.DISTRIBUTED_SHARD_SIZE,
+                 heartbeat_timeout: float = Config.DISTRIBUTED_HEARTBEAT_TIMEOUT,
+                 max_attempts: int = Config.DISTRIBUTED_MAX_ATTEMPTS, engine: str = None):
+        """
+        Splits the batch and starts listening.
+
+        Parameters:
+        -----------
+        scenarios : list
+            The scenarios of the batch.
+        host : str
+            The interface to listen on.
+        port : int
+            The port to listen on, 0 for any free port.
+        shard_size : int
+            The number of scenarios of a shard.
+        heartbeat_timeout : float
+            The number of seconds a worker may stay silent before its shard is retried.
+        max_attempts : int
+            The number of times a shard is handed out before the batch fails.
+        engine : str, optional
+            The name of the engine the workers run, see select_engine.
+        """
+        self.scenarios = scenarios
+        self.shards = [list(range(start, min(start + shard_size, len(scenarios))))
+                       for start in range(0, len(scenarios), shard_size)]
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.engine = engine
+        self._listener = socket.create_server((host, port))
+        self._listener.settimeout(Config.DISTRIBUTED_POLL_INTERVAL)
+        self.address = self._listener.getsockname()[:2]
+        self._pending = queue.Queue()
+        for shard in range(len(self.shards)):
+            self._pending.put(shard)
+        self._attempts = [0] * len(self.shards)
+        self._results = [None] * len(scenarios)
+        self._completed = set()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._error = None
+        self._accepting = None
+        self._workers = 0
+
+    def start(self):
+        """
+        Starts accepting workers, if not started yet. Called by ``run``.
+        """
+        if self._accepting is None:
+            self._accepting = threading.Thread(target=self._accept, daemon=True)
+            self._accepting.start()
+
+    def run(self, timeout: float = None, processes: list = None) -> list:
+        """
+        Serves workers until every shard has run, then builds the simulations with their results.
+
+        Parameters:
+        -----------
+        timeout : float, optional
+            The maximum number of seconds to wait for the batch.
+        processes : list, optional
+            The local worker processes, the batch failing once they all exited with no worker connected.
+
+        Returns:
+        --------
+        list
+            The simulations of the scenarios, in order, holding the results of their runs.
+
+        Raises:
+        -------
+        ConnectionError
+            If a shard failed on every attempt, or every local worker exited.
+        TimeoutError
+            If the batch did not complete in time.
+        """
+        if not self.shards:
+            self._done.set()
+        self.start()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            while not self._done.wait(Config.DISTRIBUTED_POLL_INTERVAL):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(localizations['distributed_timeout_error'].format(
+                        completed=len(self._completed), shards=len(self.shards)))
+                if processes and not any(process.is_alive() for process in processes):
+                    with self._lock:
+                        if not self._workers and not self._done.is_set():
+                            self._error = ConnectionError(localizations['local_workers_exited_error'].format(
+                                completed=len(self._completed), shards=len(self.shards)))
+                            self._done.set()
+        finally:
+            self._done.set()
+            self._listener.close()
+            self._accepting.join()
+        if self._error is not None:
+            raise self._error
+        simulations = []
+        for scenario, results in zip(self.scenarios, self._results):
+            simulation = scenario.build_simulation()
+            ResultCache.restore(simulation, results)
+            simulations.append(simulation)
+        return simulations
+
+    def _accept(self):
+        """Accepts workers until the batch is done."""
+        while not self._done.is_set():
+            try:
+                connection, _ = self._listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+    def _serve(self, connection: socket.socket):
+        """Hands shards to a worker and merges its results, retrying its shard if it is lost."""
+        shard = None
+        connection.settimeout(self.heartbeat_timeout)
+        with self._lock:
+            self._workers += 1
+        try:
+            with connection:
+                while True:
+                    message = receive_message(connection)
+                    if message['type'] == HEARTBEAT:
+                        continue
+                    if message['type'] == RESULT:
+                        self._merge(message['shard'], message['results'])
+                        shard = None
+                    shard = self._next_shard()
+                    if shard is None:
+                        send_message(connection, {'type': DONE})
+                        return
+                    send_message(connection, {
+                        'type': SHARD, 'shard': shard, 'engine': self.engine,
+                        'scenarios': [[scenario.width, scenario.height, list(scenario.cars)]
+                                      for scenario in (self.scenarios[index] for index in self.shards[shard])]})
+        except (OSError, ValueError, KeyError):
+            pass
+        finally:
+            with self._lock:
+                self._workers -= 1
+            if shard is not None:
+                self._retry(shard)
+
+    def _next_shard(self):
+        """Waits for a pending shard and counts the attempt, or returns None once the batch is done."""
+        while not self._done.is_set():
+            try:
+                shard = self._pending.get(timeout=Config.DISTRIBUTED_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            with self._lock:
+                if shard in self._completed:
+                    continue
+                self._attempts[shard] += 1
+            return shard
+        return None
+
+    def _merge(self, shard: int, results: list):
+        """Stores the results of a shard, the first time it completes."""
+        with self._lock:
+            if shard in self._completed:
+                return
+            for index, scenario_results in zip(self.shards[shard], results):
+                self._results[index] = scenario_results
+            self._completed.add(shard)
+            if len(self._completed) == len(self.shards):
+                self._done.set()
+
+    def _retry(self, shard: int):
+        """Puts a lost shard back in the queue, or fails the batch once it ran out of attempts."""
+        with self._lock:
+            if shard in self._completed or self._done.is_set():
+                return
+            if self._attempts[shard] >= self.max_attempts:
+                self._error = ConnectionError(localizations['shard_failed_error'].format(
+                    shard=shard, attempts=self._attempts[shard]))
+                self._done.set()
+                return
+        self._pending.put(shard)
+
+
+def run_worker(host: str, port: int, heartbeat_interval: float = Config.DISTRIBUTED_HEARTBEAT_INTERVAL) -> int:
+    """
+    Runs the shards handed out by a coordinator until it reports the batch done.
+
+    Every scenario is built and run with the engine named by the coordinator, and a background
+    thread sends heartbeats so the coordinator knows the worker is alive during long shards.
+
+    Parameters:
+    -----------
+    host : str
+        The host of the coordinator.
+    port : int
+        The port of the coordinator.
+    heartbeat_interval : float
+        The number of seconds between heartbeats.
+
+    Returns:
+    --------
+    int
+        The number of shards run.
+    """
+    with socket.create_connection((host, port)) as connection:
+        lock = threading.Lock()
+        stopped = threading.Event()
+
+        def send(message: dict):
+            with lock:
+                send_message(connection, message)
+
+        def beat():
+            while not stopped.wait(heartbeat_interval):
+                try:
+                    send({'type': HEARTBEAT})
+                except OSError:
+                    return
+
+        heartbeats = threading.Thread(target=beat, daemon=True)
+        heartbeats.start()
+        shards = 0
+        try:
+            send({'type': READY})
+            while True:
+                message = receive_message(connection)
+                if message['type'] == DONE:
+                    return shards
+                results = []
+                for width, height, cars in message['scenarios']:
+                    scenario = Scenario(width, height, [tuple(car) for car in cars])
+                    simulation = scenario.build_simulation(select_engine(message['engine'], len(cars)))
+                    simulation.run_simulation(display=False)
+                    results.append(ResultCache.results(simulation))
+                send({'type': RESULT, 'shard': message['shard'], 'results': results})
+                shards += 1
+        finally:
+            stopped.set()
+            heartbeats.join()
+
+
+def start_local_workers(address: tuple, count: int) -> list:
+    """
+    Starts worker processes on this host, connecting to a coordinator.
+
+    Parameters:
+    -----------
+    address : tuple
+        The (host, port) of the coordinator.
+    count : int
+        The number of worker processes.
+
+    Returns:
+    --------
+    list
+        The started processes, to be passed to stop_local_workers.
+    """
+    processes = [Process(target=run_worker, args=address, daemon=True) for _ in range(count)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def stop_local_workers(processes: list):
+    """
+    Waits for local workers to finish after the batch, terminating those that do not.
+
+    Parameters:
+    -----------
+    processes : list
+        The processes returned by start_local_workers.
+    """
+    deadline = time.monotonic() + Config.DISTRIBUTED_HEARTBEAT_TIMEOUT
+    for process in processes:
+        process.join(max(0.0, deadline - time.monotonic()))
+        if process.is_alive():
+            process.terminate()
+
+
+def run_distributed(scenarios: list, workers: int, **options) -> list:
+    """
+    Runs a batch of scenarios with a coordinator and local worker processes.
+
+    Parameters:
+    -----------
+    scenarios : list
+        The scenarios of the batch.
+    workers : int
+        The number of worker processes to start on this host.
+    **options
+        The options of the Coordinator.
+
+    Returns:
+    --------
+    list
+        The simulations of the scenarios, in order, holding the results of their runs.
+    """
+    coordinator = Coordinator(scenarios, **options)
+    processes = start_local_workers(coordinator.address, workers)
+    try:
+        return coordinator.run(Config.DISTRIBUTED_BATCH_TIMEOUT, processes)
+    finally:
+        stop_local_workers(processes)
@@ -0,0 +1,92 @@
+import os
+from ..localize.localize import localizations
+from ..config.config import Config
+from .simulation import Simulation
+from .batch import VectorizedSimulation
+from .parallel import ParallelSimulation
+from .incremental import IncrementalSimulation
+from .partition import PartitionedSimulation
+from .sweep import SweepSimulation
+
+
+# Simulation engines by name. Every engine is a Simulation subclass built from a field, with the
+# same results as Simulation; tests/unit/test_engines.py checks every registered engine.
+ENGINES = {
+    'reference': Simulation,
+    'vectorized': VectorizedSimulation,
+    'parallel': ParallelSimulation,
+    'incremental': IncrementalSimulation,
+    'partitioned': PartitionedSimulation,
+    'sweep': SweepSimulation,
+}
+
+# Name selecting an engine from the scenario size.
+AUTO_ENGINE = 'auto'
+
+
+def register_engine(name: str, engine: type):
+    """
+    Registers a simulation engine.
+
+    Parameters:
+    -----------
+    name : str
+        The name selecting the engine.
+    engine : type
+        The Simulation subclass, constructed with a field.
+    """
+    ENGINES[name] = engine
+
+
+def auto_engine(car_count: int) -> str:
+    """
+    Chooses an engine from the number of cars of a scenario.
+
+    A single car is left to the reference engine, which advances a car alone in one go. Fleets
+    large enough to amortize the worker processes run in parallel when several CPUs are available,
+    the others on the flat arrays of the vectorized engine.
+
+    Parameters:
+    -----------
+    car_count : int
+        The number of cars of the scenario.
+
+    Returns:
+    --------
+    str
+        The name of the engine.
+    """
+    if car_count <= 1:
+        return 'reference'
+    if car_count >= Config.ENGINE_PARALLEL_MIN_CARS and (os.cpu_count() or 1) > 1:
+        return 'parallel'
+    return 'vectorized'
+
+
+def select_engine(name: str = None, car_count: int = 0) -> type:
+    """
+    Returns the engine selected by name, by the environment or by the configuration, in that order.
+
+    Parameters:
+    -----------
+    name : str, optional
+        The name of the engine, usually from the command line.
+    car_count : int
+        The number of cars of the scenario, used when the engine is chosen automatically.
+
+    Returns:
+    --------
+    type
+        The Simulation subclass of the engine.
+
+    Raises:
+    -------
+    ValueError
+        If no engine has the selected name.
+    """
+    name = name or os.environ.get(Config.ENGINE_ENVIRONMENT_VARIABLE) or Config.SIMULATION_ENGINE
+    if name == AUTO_ENGINE:
+        name = auto_engine(car_count)
+    if name not in ENGINES:
+        raise ValueError(localizations['unknown_engine_error'].format(name=name, engines=', '.join(sorted(ENGINES))))
+    return ENGINES[name]
@@ -0,0 +1,423 @@
+import os
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from ..localize.localize import localizations
+from ..config.config import Config
+from .car import Car
+from .program import LiteralProgram, bounds_intersect, merge_bounds
+from .simulation import Simulation
+from .budget import RunBudget
+
+
+class Checkpoint:
+    """
+    The state of every car before a step.
+
+    Attributes:
+    -----------
+    step : int
+        The number of steps simulated when the checkpoint was taken.
+    xs : array
+        The x-coordinate of each car.
+    ys : array
+        The y-coordinate of each car.
+    headings : array
+        The heading index of each car.
+    stopped : bytearray
+        1 for each car that has stopped, 0 otherwise.
+    """
+
+    __slots__ = ('step', 'xs', 'ys', 'headings', 'stopped')
+
+    def __init__(self, step: int, cars: list, stopped_cars: set):
+        """
+        Takes a checkpoint of the given cars.
+
+        Parameters:
+        -----------
+        step : int
+            The number of steps simulated.
+        cars : list
+            The cars of the simulation, in order.
+        stopped_cars : set
+            The names of the stopped cars.
+        """
+        self.step = step
+        self.xs = array('q', (car.x for car in cars))
+        self.ys = array('q', (car.y for car in cars))
+        self.headings = array('b', (Car.DIRECTIONS.index(car.direction) for car in cars))
+        self.stopped = bytearray(car.name in stopped_cars for car in cars)
+
+
+class PathIndex:
+    """
+    Grid of tiles listing the cars whose path boxes cover them, to find the paths a box meets.
+
+    The tile side is the mean side of the boxes, so a box covers a few tiles whatever the scale
+    of the paths, and finding the paths a box meets only looks at the boxes of its tiles.
+
+    Attributes:
+    -----------
+    boxes : list
+        The path box of each car, None for the cars left out.
+    tile : int
+        The side of a tile, in cells.
+    """
+
+    __slots__ = ('boxes', 'tile', '_tiles')
+
+    def __init__(self, boxes: list):
+        """
+        Indexes the path boxes of the cars.
+
+        Parameters:
+        -----------
+        boxes : list
+            The (min_x, max_x, min_y, max_y) path box of each car, None for the cars to leave out.
+        """
+        sides = [high_x - low_x + high_y - low_y + 2 for low_x, high_x, low_y, high_y in filter(None, boxes)]
+        self.boxes = boxes
+        self.tile = max(1, sum(sides) // (2 * len(sides))) if sides else 1
+        self._tiles = {}
+        for index, bounds in enumerate(boxes):
+            if bounds is not None:
+                for key in self._keys(bounds):
+                    self._tiles.setdefault(key, []).append(index)
+
+    def _keys(self, bounds: tuple):
+        """Yields the tiles a box covers."""
+        tile = self.tile
+        for tile_x in range(bounds[0] // tile, bounds[1] // tile + 1):
+            for tile_y in range(bounds[2] // tile, bounds[3] // tile + 1):
+                yield tile_x, tile_y
+
+    def replace(self, index: int, bounds: tuple):
+        """
+        Changes the path box of a car.
+
+        Parameters:
+        -----------
+        index : int
+            The index of the car.
+        bounds : tuple
+            The new path box of the car.
+        """
+        if self.boxes[index] is not None:
+            for key in self._keys(self.boxes[index]):
+                self._tiles[key].remove(index)
+        self.boxes[index] = bounds
+        for key in self._keys(bounds):
+            self._tiles.setdefault(key, []).append(index)
+
+    def meeting(self, bounds: tuple) -> set:
+        """
+        Returns the indices of the cars whose path boxes intersect a box.
+
+        Parameters:
+        -----------
+        bounds : tuple
+            The (min_x, max_x, min_y, max_y) box.
+        """
+        return {index for key in self._keys(bounds) for index in self._tiles.get(key, ())
+                if bounds_intersect(bounds, self.boxes[index])}
+
+
+class IncrementalSimulation(Simulation):
+    """
+    Simulation that can re-run a scenario cheaply after one car's commands change.
+
+    During the run it keeps a checkpoint every few steps and an ordered log of every collision.
+    When a car's commands change, only the cars whose remaining paths can reach it, directly or
+    through other cars, are re-simulated, from the last checkpoint before the first changed step.
+    The cars are found through a PathIndex of the paths from that checkpoint, kept between updates,
+    and only the collisions and metrics of the re-simulated cars are merged back. Digests, near
+    misses and analytics need every car at every step, so with any of them an update re-runs the
+    whole scenario from the first checkpoint instead.
+
+    Attributes:
+    -----------
+    checkpoint_interval : int
+        The number of steps between checkpoints.
+    checkpoints : list
+        The checkpoints of the last run, in step order.
+    events : list
+        Every collision as (step, kind, key, cars, pos), in the order they were reported. Kind is 0
+        for swaps and 1 for same-cell collisions, and key the car index that orders events of a kind.
+    """
+
+    def __init__(self, field, checkpoint_interval: int = Config.CHECKPOINT_INTERVAL):
+        """
+        Initializes the IncrementalSimulation with a field.
+
+        Parameters:
+        -----------
+        field : Field
+            The field on which the simulation runs.
+        checkpoint_interval : int
+            The number of steps between checkpoints.
+        """
+        super().__init__(field)
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints = []
+        self.events = []
+        self._indices = {}
+        self._stops = {}
+        self._paths = {}
+        self._lengths = None
+
+    def reset(self):
+        """
+        Resets the simulation, its checkpoints and its collision log.
+        """
+        super().reset()
+        self.checkpoints = []
+        self.events = []
+        self._indices = {}
+        self._stops = {}
+        self._paths = {}
+        self._lengths = None
+
+    def run_simulation(self, display: bool = True, budget: RunBudget = None):
+        """
+        Runs the simulation, keeping checkpoints and the collision log.
+
+        Parameters:
+        -----------
+        display : bool
+            Whether to print the initial car positions and the final results.
+        budget : RunBudget, optional
+            The step and time limits, cancellation token and progress callback of the run.
+        """
+        self.checkpoints = []
+        self.events = []
+        self._indices = {car.name: index for index, car in enumerate(self.cars)}
+        self._stops = {}
+        self._paths = {}
+        self._lengths = None
+        super().run_simulation(display, budget)
+        if not self.checkpoints:
+            # No step ran, so the cars are where they started.
+            self.checkpoints.append(Checkpoint(0, self.cars, self.stopped_cars))
+
+    def process_step(self, step: int):
+        if step % self.checkpoint_interval == 0:
+            self.checkpoints.append(Checkpoint(step, self.cars, self.stopped_cars))
+        super().process_step(step)
+
+    def report_collision(self, cars: list, pos: tuple, step: int, swap: bool = False):
+        super().report_collision(cars, pos, step, swap)
+        indices = [self._indices[name] for name in cars]
+        self.events.append((step + 1, 0 if swap else 1, max(indices) if swap else min(indices), cars, pos))
+        for name in cars:
+            self._stops.setdefault(name, []).append(self.events[-1])
+
+    def update_commands(self, name: str, commands: str) -> set:
+        """
+        Changes the commands of a car and updates the results of the last run.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the car.
+        commands : str
+            The new commands of the car.
+
+        Returns:
+        --------
+        set
+            The names of the cars that were re-simulated.
+
+        Raises:
+        -------
+        ValueError
+            If there is no car with this name or the commands are invalid.
+        """
+        index = self._indices.get(name)
+        car = self.cars[index] if index is not None else next((car for car in self.cars if car.name == name), None)
+        if car is None:
+            raise ValueError(localizations['unknown_car_error'].format(name=name))
+        old_program = car.program
+        car.set_commands(commands)
+        if index is None or not self.checkpoints:
+            return set()
+        self._update_steps(old_program, car.program)
+        changed = self._first_difference(old_program, car.program)
+        stop = self._stop_step(name)
+        if changed is None or stop is not None and stop <= changed:
+            return set()
+        if self.digest is not None or self.near_miss is not None or self.analytics is not None:
+            return self._rerun()
+        checkpoint = next(checkpoint for checkpoint in reversed(self.checkpoints) if checkpoint.step <= changed)
+        affected = self._affected(checkpoint, index, old_program)
+        self._resimulate(checkpoint, affected, index, old_program)
+        return {self.cars[index].name for index in affected}
+
+    def _update_steps(self, old_program, program):
+        """Updates the steps of the last run, those of the longest program, after a program changed."""
+        if self._lengths is None:
+            self._lengths = Counter(len(car.program) for car in self.cars)
+            self._lengths[len(program)] -= 1
+            self._lengths[len(old_program)] += 1
+        self._lengths[len(old_program)] -= 1
+        if not self._lengths[len(old_program)]:
+            del self._lengths[len(old_program)]
+        self._lengths[len(program)] += 1
+        self.metrics.steps = max(self._lengths)
+
+    @staticmethod
+    def _first_difference(old, new):
+        """Returns the first step at which two programs differ, or None if they are identical."""
+        if isinstance(old, LiteralProgram) and isinstance(new, LiteralProgram):
+            common = len(os.path.commonprefix([old.text, new.text]))
+        else:
+            common = 0
+            while common < len(old) and common < len(new) and old[common] == new[common]:
+                common += 1
+        if common == len(old) == len(new):
+            return None
+        return common
+
+    def _stop_step(self, name: str):
+        """Returns the step at which a car stopped in the last run, or None if it did not stop."""
+        steps = self.boundary_collisions.get(name, [])[:1]
+        if name in self._stops:
+            steps.append(self._stops[name][0][0])
+        return min(steps, default=None)
+
+    def _counted(self, name: str, program, start: int) -> tuple:
+        """Returns the moves and turns a car was counted from a step in the last run, given its program."""
+        stop = self._stop_step(name)
+        end = len(program) if stop is None else min(stop, len(program))
+        if end <= start:
+            return 0, 0
+        moves = program.forward_moves(end) - program.forward_moves(start)
+        turns = end - start - moves
+        if name in self.boundary_collisions and self.boundary_collisions[name][0] == stop:
+            # The move into the boundary is not counted.
+            moves -= 1
+        return moves, turns
+
+    def _path_bounds(self, checkpoint: Checkpoint, index: int, program) -> tuple:
+        """Returns the box of the cells a car can occupy from a checkpoint to the end of a program."""
+        low_x, high_x, low_y, high_y = program.bounds(checkpoint.xs[index], checkpoint.ys[index],
+                                                      checkpoint.headings[index], min(checkpoint.step, len(program)))
+        return (max(low_x, 0), min(high_x, self.field.width - 1),
+                max(low_y, 0), min(high_y, self.field.height - 1))
+
+    def _path_index(self, checkpoint: Checkpoint) -> PathIndex:
+        """Returns the index of the paths of the cars active at a checkpoint, built the first time it is needed."""
+        paths = self._paths.get(checkpoint.step)
+        if paths is None:
+            paths = PathIndex([None if checkpoint.stopped[index] else self._path_bounds(checkpoint, index, car.program)
+                               for index, car in enumerate(self.cars)])
+            self._paths[checkpoint.step] = paths
+        return paths
+
+    def _affected(self, checkpoint: Checkpoint, index: int, old_program) -> list:
+        """
+        Returns the indices of the cars whose results may change, in order.
+
+        Two cars can only collide in a cell both their paths visit, so the cars whose results may
+        change are those linked to the changed car, old or new path, by intersecting path boxes.
+        """
+        paths = self._path_index(checkpoint)
+        paths.replace(index, self._path_bounds(checkpoint, index, self.cars[index].program))
+        affected = {index}
+        pending = [merge_bounds(self._path_bounds(checkpoint, index, old_program), paths.boxes[index])]
+        while pending:
+            for other in paths.meeting(pending.pop()):
+                if other not in affected:
+                    affected.add(other)
+                    pending.append(paths.boxes[other])
+        return sorted(affected)
+
+    def _rerun(self) -> set:
+        """Re-runs the whole scenario from the first checkpoint and returns the names of the cars that were active."""
+        first = self.checkpoints[0]
+        for index, car in enumerate(self.cars):
+            car.x, car.y, car.direction = first.xs[index], first.ys[index], Car.DIRECTIONS[first.headings[index]]
+        self.stopped_cars = {car.name for index, car in enumerate(self.cars) if first.stopped[index]}
+        self.collisions = {}
+        self.boundary_collisions = {}
+        self.moves = {}
+        self.swaps = []
+        self.run_simulation(display=False)
+        return {car.name for index, car in enumerate(self.cars) if not first.stopped[index]}
+
+    def _resimulate(self, checkpoint: Checkpoint, affected: list, index: int, old_program):
+        """Re-runs the affected cars from a checkpoint and merges their results and metrics into the last run."""
+        sub = IncrementalSimulation(self.field, self.checkpoint_interval)
+        for other in affected:
+            original = self.cars[other]
+            car = Car(original.name, checkpoint.xs[other], checkpoint.ys[other],
+                      Car.DIRECTIONS[checkpoint.headings[other]])
+            car.program = original.program
+            car.commands = original.commands
+            sub.add_car(car)
+        sub._indices = {self.cars[other].name: other for other in affected}
+        max_steps = max(len(car.program) for car in sub.cars)
+        for step in range(checkpoint.step, max_steps):
+            sub.process_step(step)
+
+        metrics = self.metrics
+        removed = {}
+        for position, car in zip(affected, sub.cars):
+            moves, turns = self._counted(car.name, old_program if position == index else car.program,
+                                         checkpoint.step)
+            metrics.moves -= moves
+            metrics.turns -= turns
+            original = self.cars[position]
+            original.x, original.y, original.direction = car.x, car.y, car.direction
+            if self.boundary_collisions.pop(car.name, None) is not None:
+                metrics.boundary_hits -= 1
+            self.stopped_cars.discard(car.name)
+            for event in self._stops.pop(car.name, ()):
+                removed[event[:3]] = event
+        self.boundary_collisions.update(sub.boundary_collisions)
+        self._stops.update(sub._stops)
+        self.stopped_cars.update(sub.stopped_cars)
+        # The events of an affected car are all after the checkpoint, so only they are replaced, a
+        # car swapping and ending in a cell with others at the same step taking part in two of them.
+        steps = set()
+        for key in removed:
+            del self.events[bisect_left(self.events, key)]
+            steps.add(key[0])
+        for event in sub.events:
+            self.events.insert(bisect_left(self.events, event[:3]), event)
+            steps.add(event[0])
+        last = next((step for step in reversed(self.collisions) if step not in steps), None)
+        ordered = last is None or not steps or min(steps) > last
+        for step in sorted(steps):
+            self.collisions.pop(step, None)
+            events = self.events[bisect_left(self.events, (step,)):bisect_left(self.events, (step + 1,))]
+            if events:
+                self.collisions[step] = [(cars, pos) for _, _, _, cars, pos in events]
+        if not ordered:
+            # Steps that were not reported before went after the later ones, so put them back in order.
+            self.collisions = dict(sorted(self.collisions.items()))
+        metrics.moves += sub.metrics.moves
+        metrics.turns += sub.metrics.turns
+        metrics.collisions += len(sub.events) - len(removed)
+        metrics.boundary_hits += len(sub.boundary_collisions)
+        metrics.active_cars = len(self.cars) - len(self.stopped_cars)
+
+        updated = {checkpoint.step: checkpoint for checkpoint in sub.checkpoints}
+        checkpoints = []
+        for current in self.checkpoints:
+            if current.step > checkpoint.step:
+                if current.step not in updated:
+                    break
+                new = updated[current.step]
+                for position, other in enumerate(affected):
+                    current.xs[other], current.ys[other] = new.xs[position], new.ys[position]
+                    current.headings[other], current.stopped[other] = new.headings[position], new.stopped[position]
+            checkpoints.append(current)
+        self.checkpoints = checkpoints
+        # The affected cars moved from the checkpoint on, while before it only the changed path differs.
+        for step in list(self._paths):
+            if step > checkpoint.step:
+                del self._paths[step]
+            elif step < checkpoint.step:
+                earlier = self.checkpoints[step // self.checkpoint_interval]
+                self._paths[step].replace(index, self._path_bounds(earlier, index, self.cars[index].program))
@@ -0,0 +1,260 @@
+import os
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from ..localize.localize import localizations
+from ..config.config import Config
+from .field import Field
+from .car import Car
+from .program import Program
+from .scenario import Scenario
+from .binary_scenario import _Cars
+from .simulation import Simulation
+
+
+class ColumnarScenario:
+    """
+    A scenario read from the batch text format by worker processes into compact columns.
+
+    The car lines are split into chunks of about Config.INGEST_CHUNK_BYTES, cut at line ends, and
+    every chunk is parsed and validated by a worker with Scenario.parse_car, into int64 columns of
+    start cells and line numbers, an int8 heading column and the names and commands joined by
+    newlines. The columns of the chunks are then merged and checked for duplicate names and start
+    cells across the whole file, with C-level set updates unless a duplicate is found. Errors are
+    those Scenario.parse reports for the first invalid line, with the same line number.
+
+    Attributes:
+    -----------
+    width : int
+        The width of the field.
+    height : int
+        The height of the field.
+    xs : array
+        The start x-coordinate of each car.
+    ys : array
+        The start y-coordinate of each car.
+    headings : array
+        The start heading index of each car.
+    cars : Sequence
+        The cars as (name, x, y, direction, commands) tuples, decoded on access.
+    """
+
+    def __init__(self, width: int, height: int, chunks: list):
+        """
+        Merges the columns of parsed chunks.
+
+        Parameters:
+        -----------
+        width : int
+            The width of the field.
+        height : int
+            The height of the field.
+        chunks : list
+            The columns of every chunk, in file order, as returned by _parse_chunk, each followed
+            by the number of the line before the chunk.
+        """
+        self.width = width
+        self.height = height
+        self.xs, self.ys, self.headings = array('q'), array('q'), array('b')
+        self._firsts = []
+        self._chunks = []
+        for xs, ys, headings, _, lines, names, name_starts, commands, command_starts, base in chunks:
+            self._firsts.append(len(self.xs))
+            self.xs += xs
+            self.ys += ys
+            self.headings += headings
+            self._chunks.append((base, lines, names, name_starts, commands, command_starts))
+        self.cars = _Cars(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.xs)
+
+    def close(self):
+        """
+        Does nothing: the columns are held in memory. Present for symmetry with BinaryScenario.
+        """
+
+    @staticmethod
+    def load(path: str, workers: int = None, chunk_bytes: int = Config.INGEST_CHUNK_BYTES):
+        """
+        Reads and validates a scenario file with worker processes.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the scenario file.
+        workers : int, optional
+            The number of worker processes, defaults to the number of CPUs.
+        chunk_bytes : int
+            The approximate size of the chunk of car lines parsed by a worker at a time.
+
+        Returns:
+        --------
+        ColumnarScenario
+            The parsed scenario.
+
+        Raises:
+        -------
+        ValueError
+            If a line is invalid, with the line number in the message.
+        """
+        with open(path, 'rb') as file:
+            number = 0
+            for line in iter(file.readline, b''):
+                number += 1
+                line = line.decode().strip()
+                if not line or line.startswith('#'):
+                    continue
+                try:
+                    width, height = Scenario.parse_dimensions(line)
+                except ValueError as error:
+                    raise ValueError(localizations['scenario_line_error'].format(line=number, error=error))
+                break
+            else:
+                raise ValueError(localizations['empty_scenario_error'])
+            bounds = [file.tell()]
+            size = os.fstat(file.fileno()).st_size
+            while bounds[-1] < size:
+                end = bounds[-1] + max(chunk_bytes, 1)
+                if end < size:
+                    file.seek(end - 1)
+                    file.readline()
+                    end = file.tell()
+                bounds.append(min(end, size))
+        tasks = [(path, start, end, width, height) for start, end in zip(bounds, bounds[1:])]
+
+        workers = min(workers or os.cpu_count() or 1, len(tasks))
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as executor:
+                results = list(executor.map(_parse_chunk, tasks))
+        else:
+            results = list(map(_parse_chunk, tasks))
+
+        chunks = []
+        error = None
+        for *columns, line_count, chunk_error in results:
+            chunks.append((*columns, number))
+            if chunk_error is not None:
+                error = (chunk_error[0] + number, chunk_error[1])
+                break
+            number += line_count
+        duplicate = ColumnarScenario._first_duplicate(chunks)
+        if duplicate is not None and (error is None or duplicate[0] < error[0]):
+            error = duplicate
+        if error is not None:
+            raise ValueError(localizations['scenario_line_error'].format(line=error[0], error=error[1]))
+        return ColumnarScenario(width, height, chunks)
+
+    @staticmethod
+    def _first_duplicate(chunks: list):
+        """Returns the line and the error of the first car reusing a name or a start cell, or None if there is none."""
+        count = sum(len(columns[0]) for columns in chunks)
+        names, cells = set(), set()
+        for columns in chunks:
+            if len(columns[0]):
+                names.update(columns[5][:-1].split('\n'))
+                cells.update(columns[3])
+        if len(names) == count and len(cells) == count:
+            return None
+        names, cells = set(), set()
+        for xs, ys, _, keys, lines, chunk_names, _, _, _, base in chunks:
+            for index, name in enumerate(chunk_names[:-1].split('\n') if len(xs) else ()):
+                if name in names:
+                    return base + lines[index], localizations['duplicate_car_name_error'].format(name=name)
+                if keys[index] in cells:
+                    return base + lines[index], localizations['initial_collides_error'].format(x=xs[index],
+                                                                                                y=ys[index])
+                names.add(name)
+                cells.add(keys[index])
+        return None
+
+    def _locate(self, index: int) -> tuple:
+        """Returns the chunk of a car and its index in the chunk."""
+        chunk = bisect_right(self._firsts, index) - 1
+        return self._chunks[chunk], index - self._firsts[chunk]
+
+    def name(self, index: int) -> str:
+        """Returns the name of a car."""
+        (_, _, names, starts, _, _), index = self._locate(index)
+        return names[starts[index]:starts[index + 1] - 1]
+
+    def commands(self, index: int) -> str:
+        """Returns the commands of a car, as written in the file."""
+        (_, _, _, _, commands, starts), index = self._locate(index)
+        return commands[starts[index]:starts[index + 1] - 1]
+
+    def line(self, index: int) -> int:
+        """Returns the line number of a car in the file."""
+        (base, lines, _, _, _, _), index = self._locate(index)
+        return base + lines[index]
+
+    def build_simulation(self, engine=Simulation) -> Simulation:
+        """
+        Builds a simulation with the field and cars of the scenario.
+
+        Parameters:
+        -----------
+        engine : type
+            The Simulation class, or subclass, to build.
+
+        Returns:
+        --------
+        Simulation
+            The simulation ready to run.
+        """
+        simulation = engine(Field(self.width, self.height))
+        for name, x, y, direction, commands in self.cars:
+            car = Car(name, x, y, direction)
+            car.program = Program.parse(commands)
+            car.commands = str(car.program)
+            simulation.add_car(car)
+        return simulation
+
+
+def _parse_chunk(task: tuple) -> tuple:
+    """
+    Parses and validates the car lines between two offsets of a scenario file, in a worker.
+
+    Stops at the first invalid line. Line numbers are counted from the start of the chunk.
+
+    Returns:
+    --------
+    tuple
+        The x, y, heading, cell key and line number columns of the valid cars before the first
+        invalid line, their names and commands each joined by newlines with the start offsets of
+        every one and the total, the number of lines of the chunk and the (line, error) of the
+        first invalid line, or None.
+    """
+    path, start, end, width, height = task
+    with open(path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    xs, ys, headings, keys, lines = array('q'), array('q'), array('b'), array('q'), array('q')
+    names, name_starts, commands, command_starts = [], array('q', [0]), [], array('q', [0])
+    error = None
+    for number, line in enumerate(data.decode().split('\n'), start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            name, x, y, direction, source = Scenario.parse_car(line, width, height)
+        except ValueError as parse_error:
+            error = (number, str(parse_error))
+            break
+        xs.append(x)
+        ys.append(y)
+        headings.append(Config.CAR_DIRECTIONS.index(direction))
+        keys.append(y * width + x)
+        lines.append(number)
+        names.append(name)
+        name_starts.append(name_starts[-1] + len(name) + 1)
+        commands.append(source)
+        command_starts.append(command_starts[-1] + len(source) + 1)
+    return (xs, ys, headings, keys, lines, '\n'.join(names) + '\n', name_starts, '\n'.join(commands) + '\n',
+            command_starts, data.count(b'\n'), error)
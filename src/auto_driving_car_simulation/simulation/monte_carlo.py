@@ -0,0 +1,316 @@
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from ..localize.localize import localizations
+from ..config.config import Config
+from .field import Field
+from .car import Car
+from .simulation import Simulation
+from .batch import BatchSimulation
+
+
+def build_trial(width: int, height: int, car_count: int, program_length: int, seed: int, trial: int) -> Simulation:
+    """
+    Builds the simulation of one random trial.
+
+    Placements, headings and programs are drawn from a generator seeded with the base seed and
+    the trial index only, so a trial gives the same result in any process.
+
+    Parameters:
+    -----------
+    width : int
+        The width of the field.
+    height : int
+        The height of the field.
+    car_count : int
+        The number of cars placed on the field.
+    program_length : int
+        The number of commands given to each car.
+    seed : int
+        The base seed of the estimate.
+    trial : int
+        The index of the trial.
+
+    Returns:
+    --------
+    Simulation
+        The simulation of the trial, ready to run.
+    """
+    rng = random.Random(f"{seed}:{trial}")
+    simulation = Simulation(Field(width, height))
+    for index, cell in enumerate(rng.sample(range(width * height), car_count)):
+        y, x = divmod(cell, width)
+        car = Car(f"Car{index + 1}", x, y, rng.choice(Config.CAR_DIRECTIONS))
+        car.set_commands(''.join(rng.choice(Config.CAR_COMMANDS) for _ in range(program_length)))
+        simulation.add_car(car)
+    return simulation
+
+
+def run_trial(width: int, height: int, car_count: int, program_length: int, seed: int, trial: int) -> int:
+    """
+    Runs one random trial and returns the step of its first collision.
+
+    Parameters:
+    -----------
+    width : int
+        The width of the field.
+    height : int
+        The height of the field.
+    car_count : int
+        The number of cars placed on the field.
+    program_length : int
+        The number of commands given to each car.
+    seed : int
+        The base seed of the estimate.
+    trial : int
+        The index of the trial.
+
+    Returns:
+    --------
+    int
+        The step of the first collision, or 0 if no cars collided.
+    """
+    simulation = build_trial(width, height, car_count, program_length, seed, trial)
+    simulation.run_simulation(display=False)
+    return min(simulation.collisions, default=0)
+
+
+def run_trials(width: int, height: int, car_count: int, program_length: int, seed: int, trials: range) -> list:
+    """
+    Runs a range of random trials together in a BatchSimulation.
+
+    Parameters:
+    -----------
+    width : int
+        The width of the field.
+    height : int
+        The height of the field.
+    car_count : int
+        The number of cars placed on the field.
+    program_length : int
+        The number of commands given to each car.
+    seed : int
+        The base seed of the estimate.
+    trials : range
+        The indices of the trials.
+
+    Returns:
+    --------
+    list
+        The step of the first collision of every trial, or 0 if no cars collided, in trial order.
+    """
+    simulations = [build_trial(width, height, car_count, program_length, seed, trial) for trial in trials]
+    BatchSimulation(simulations).run_simulation()
+    return [min(simulation.collisions, default=0) for simulation in simulations]
+
+
+def _run_trials(args: tuple) -> list:
+    """Unpacks the arguments of a range of trials sent to a worker process."""
+    return run_trials(*args)
+
+
+class MonteCarloResult:
+    """
+    Running estimate of the collision risk, updated one trial at a time.
+
+    Attributes:
+    -----------
+    trials : int
+        The number of trials run.
+    collisions : int
+        The number of trials with at least one collision.
+    mean_first_collision_step : float
+        The mean step of the first collision over the trials with a collision.
+    confidence : float
+        The confidence level of the intervals.
+    """
+
+    def __init__(self, confidence: float = Config.MONTE_CARLO_CONFIDENCE):
+        """
+        Constructs an empty estimate.
+
+        Parameters:
+        -----------
+        confidence : float
+            The confidence level of the intervals.
+        """
+        self.trials = 0
+        self.collisions = 0
+        self.mean_first_collision_step = 0.0
+        self.confidence = confidence
+        self._z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self._squares = 0.0
+
+    def add(self, first_collision_step: int):
+        """
+        Adds the outcome of one trial, using Welford's update for the step statistics.
+
+        Parameters:
+        -----------
+        first_collision_step : int
+            The step of the first collision, or 0 if no cars collided.
+        """
+        self.trials += 1
+        if first_collision_step:
+            self.collisions += 1
+            delta = first_collision_step - self.mean_first_collision_step
+            self.mean_first_collision_step += delta / self.collisions
+            self._squares += delta * (first_collision_step - self.mean_first_collision_step)
+
+    @property
+    def collision_rate(self) -> float:
+        """The fraction of trials with at least one collision."""
+        return self.collisions / self.trials if self.trials else 0.0
+
+    def rate_interval(self) -> tuple:
+        """
+        Returns the Wilson score interval of the collision rate.
+
+        Returns:
+        --------
+        tuple
+            The lower and upper bounds of the interval.
+        """
+        if not self.trials:
+            return 0.0, 1.0
+        n, z = self.trials, self._z
+        rate = self.collision_rate
+        centre = (rate + z * z / (2 * n)) / (1 + z * z / n)
+        half_width = z * math.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+        return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+    def step_interval(self) -> tuple:
+        """
+        Returns the normal confidence interval of the mean first collision step.
+
+        Returns:
+        --------
+        tuple
+            The lower and upper bounds of the interval.
+        """
+        if self.collisions < 2:
+            return self.mean_first_collision_step, self.mean_first_collision_step
+        error = self._z * math.sqrt(self._squares / (self.collisions - 1) / self.collisions)
+        return self.mean_first_collision_step - error, self.mean_first_collision_step + error
+
+    def is_precise(self, precision: float) -> bool:
+        """Returns True if the collision rate interval is no wider than twice the precision."""
+        low, high = self.rate_interval()
+        return (high - low) / 2 <= precision
+
+    def display(self):
+        """
+        Displays the estimate.
+        """
+        low, high = self.rate_interval()
+        print(localizations['monte_carlo_results'].format(trials=self.trials, rate=self.collision_rate, low=low,
+                                                          high=high, confidence=self.confidence))
+        if self.collisions:
+            low, high = self.step_interval()
+            print(localizations['monte_carlo_first_collision'].format(mean=self.mean_first_collision_step,
+                                                                      low=low, high=high))
+        else:
+            print(localizations['monte_carlo_no_collisions'])
+
+
+class MonteCarloEstimator:
+    """
+    Estimates how often randomly placed fleets collide on a field.
+
+    Attributes:
+    -----------
+    width : int
+        The width of the field.
+    height : int
+        The height of the field.
+    car_count : int
+        The number of cars placed on the field in each trial.
+    program_length : int
+        The number of random commands given to each car.
+    seed : int
+        The base seed from which every trial seed is derived.
+    workers : int
+        The number of worker processes, 1 to run the trials in this process.
+    """
+
+    def __init__(self, width: int, height: int, car_count: int, program_length: int, seed: int = 0,
+                 workers: int = None):
+        """
+        Constructs all the necessary attributes for the estimator object.
+
+        Parameters:
+        -----------
+        width : int
+            The width of the field.
+        height : int
+            The height of the field.
+        car_count : int
+            The number of cars placed on the field in each trial.
+        program_length : int
+            The number of random commands given to each car.
+        seed : int
+            The base seed from which every trial seed is derived.
+        workers : int, optional
+            The number of worker processes, defaults to the number of CPUs.
+
+        Raises:
+        -------
+        ValueError
+            If the cars do not fit on the field.
+        """
+        if car_count > width * height:
+            raise ValueError(localizations['too_many_cars_error'].format(count=car_count))
+        self.width = width
+        self.height = height
+        self.car_count = car_count
+        self.program_length = program_length
+        self.seed = seed
+        self.workers = workers
+
+    def run(self, max_trials: int, precision: float = None,
+            confidence: float = Config.MONTE_CARLO_CONFIDENCE) -> MonteCarloResult:
+        """
+        Runs trials until the maximum is reached or the estimate is precise enough.
+
+        Trials are dispatched in fixed-size batches and reduced in trial order, so the
+        estimate and the stopping point do not depend on the number of workers. Every worker
+        runs its share of a batch together in a BatchSimulation.
+
+        Parameters:
+        -----------
+        max_trials : int
+            The maximum number of trials to run.
+        precision : float, optional
+            Stop once the half width of the collision rate interval is at most this value.
+        confidence : float
+            The confidence level of the intervals.
+
+        Returns:
+        --------
+        MonteCarloResult
+            The estimate.
+        """
+        result = MonteCarloResult(confidence)
+        workers = self.workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(workers) if workers != 1 else None
+        try:
+            for start in range(0, max_trials, Config.MONTE_CARLO_BATCH_SIZE):
+                end = min(start + Config.MONTE_CARLO_BATCH_SIZE, max_trials)
+                bounds = [start + (end - start) * worker // workers for worker in range(workers + 1)]
+                shares = [(self.width, self.height, self.car_count, self.program_length, self.seed, range(low, high))
+                          for low, high in zip(bounds, bounds[1:]) if low < high]
+                if executor is None:
+                    outcomes = map(_run_trials, shares)
+                else:
+                    outcomes = executor.map(_run_trials, shares)
+                for share in outcomes:
+                    for outcome in share:
+                        result.add(outcome)
+                if precision is not None and result.is_precise(precision):
+                    break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return result
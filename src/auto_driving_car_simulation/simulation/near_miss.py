@@ -0,0 +1,184 @@
+from ..localize.localize import localizations
+from ..config.config import Config
+
+
+# Distance metrics.
+CHEBYSHEV = 'chebyshev'
+MANHATTAN = 'manhattan'
+
+
+class NearMissDetector:
+    """
+    Finds the active cars coming within a distance of each other, with a spatial hash grid.
+
+    Cars are bucketed by ``(x // radius, y // radius)``, so two cars within the radius are always in
+    the same or adjacent buckets. Buckets are updated as cars move, and after a step only the cars
+    that moved are compared with the cars of their nine neighbouring buckets and with the cars they
+    were close to. A near miss is recorded when a pair comes within the radius, not again while it
+    stays close.
+
+    Attributes:
+    -----------
+    radius : int
+        The distance, at most, between two cars in a near miss.
+    metric : str
+        CHEBYSHEV or MANHATTAN.
+    """
+
+    def __init__(self, radius: int, metric: str = Config.NEAR_MISS_METRIC):
+        """
+        Constructs all the necessary attributes for the detector object.
+
+        Parameters:
+        -----------
+        radius : int
+            The distance, at most, between two cars in a near miss.
+        metric : str
+            CHEBYSHEV or MANHATTAN.
+
+        Raises:
+        -------
+        ValueError
+            If the radius is not a positive integer or the metric is unknown.
+        """
+        if not isinstance(radius, int) or radius <= 0 or metric not in (CHEBYSHEV, MANHATTAN):
+            raise ValueError(localizations['invalid_near_miss_error'])
+        self.radius = radius
+        self.metric = metric
+        self._buckets = {}
+        self._positions = {}
+        self._indices = {}
+        self._partners = {}
+        self._moved = []
+
+    def start(self, cars: list, stopped_cars: set):
+        """
+        Places the active cars of a simulation, without recording the cars that start close.
+
+        Parameters:
+        -----------
+        cars : list
+            The cars of the simulation, in order.
+        stopped_cars : set
+            The names of the stopped cars.
+        """
+        self._buckets = {}
+        self._positions = {}
+        self._indices = {car.name: index for index, car in enumerate(cars)}
+        self._partners = {}
+        for car in cars:
+            if car.name not in stopped_cars:
+                self._positions[car.name] = (car.x, car.y)
+                self._buckets.setdefault(self._bucket(car.x, car.y), set()).add(car.name)
+                self._partners[car.name] = set()
+        self._moved = list(self._positions)
+        self.detect(0)
+
+    def _bucket(self, x: int, y: int) -> tuple:
+        """Returns the bucket of a cell."""
+        return x // self.radius, y // self.radius
+
+    def distance(self, first: tuple, second: tuple) -> int:
+        """
+        Returns the distance between two positions in the metric of the detector.
+
+        Parameters:
+        -----------
+        first : tuple
+            The (x, y) of one position.
+        second : tuple
+            The (x, y) of the other position.
+
+        Returns:
+        --------
+        int
+            The distance.
+        """
+        dx, dy = abs(first[0] - second[0]), abs(first[1] - second[1])
+        return max(dx, dy) if self.metric == CHEBYSHEV else dx + dy
+
+    def move(self, name: str, x: int, y: int):
+        """
+        Moves a car to a new cell.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the car.
+        x : int
+            The new x-coordinate of the car.
+        y : int
+            The new y-coordinate of the car.
+        """
+        old = self._bucket(*self._positions[name])
+        new = self._bucket(x, y)
+        if old != new:
+            bucket = self._buckets[old]
+            bucket.discard(name)
+            if not bucket:
+                del self._buckets[old]
+            self._buckets.setdefault(new, set()).add(name)
+        self._positions[name] = (x, y)
+        self._moved.append(name)
+
+    def remove(self, name: str):
+        """
+        Removes a car that stopped.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the car.
+        """
+        position = self._positions.pop(name, None)
+        if position is None:
+            return
+        key = self._bucket(*position)
+        bucket = self._buckets[key]
+        bucket.discard(name)
+        if not bucket:
+            del self._buckets[key]
+        for other in self._partners.pop(name):
+            self._partners[other].discard(name)
+
+    def detect(self, step: int) -> list:
+        """
+        Finds the pairs that came within the radius since the last call.
+
+        Parameters:
+        -----------
+        step : int
+            The step just simulated.
+
+        Returns:
+        --------
+        list
+            The near misses as (car1, position1, car2, position2, distance) tuples, ordered by the
+            indices of the cars.
+        """
+        events = []
+        positions = self._positions
+        for name in dict.fromkeys(self._moved):
+            position = positions.get(name)
+            if position is None:
+                continue
+            partners = self._partners[name]
+            for other in list(partners):
+                if self.distance(position, positions[other]) > self.radius:
+                    partners.discard(other)
+                    self._partners[other].discard(name)
+            bx, by = self._bucket(*position)
+            for key in ((bx + dx, by + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)):
+                for other in self._buckets.get(key, ()):
+                    if other == name or other in partners:
+                        continue
+                    distance = self.distance(position, positions[other])
+                    if distance <= self.radius:
+                        partners.add(other)
+                        self._partners[other].add(name)
+                        if step:
+                            first, second = sorted((name, other), key=self._indices.__getitem__)
+                            events.append((first, positions[first], second, positions[second], distance))
+        self._moved = []
+        events.sort(key=lambda event: (self._indices[event[0]], self._indices[event[2]]))
+        return events
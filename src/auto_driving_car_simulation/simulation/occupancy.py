@@ -0,0 +1,173 @@
+from abc import ABC, abstractmethod
+from array import array
+from ..config.config import Config
+
+
+class Occupancy(ABC):
+    """
+    Base class for the per-step cell occupancy used by collision detection.
+
+    Cells are identified by a packed integer key ``y * width + x`` so no
+    position tuple is built unless a collision has to be reported.
+
+    Attributes:
+    -----------
+    width : int
+        The width of the field.
+    height : int
+        The height of the field.
+    """
+
+    def __init__(self, width: int, height: int):
+        """
+        Constructs the occupancy for a field of the given size.
+
+        Parameters:
+        -----------
+        width : int
+            The width of the field.
+        height : int
+            The height of the field.
+        """
+        self.width = width
+        self.height = height
+
+    @staticmethod
+    def for_field(field, car_count: int):
+        """
+        Chooses the occupancy representation best suited to the field and car count.
+
+        A dense array is used when it takes no more memory than a sparse hash would,
+        that is when the field has at most Config.OCCUPANCY_DENSE_CELLS_PER_CAR cells
+        per car, otherwise a sparse hash is used so memory never scales with the area.
+
+        Parameters:
+        -----------
+        field : Field
+            The field on which the cars move.
+        car_count : int
+            The number of cars in the simulation.
+
+        Returns:
+        --------
+        Occupancy
+            A DenseOccupancy or a SparseOccupancy instance.
+        """
+        area = field.width * field.height
+        dense_limit = min(max(car_count, 1) * Config.OCCUPANCY_DENSE_CELLS_PER_CAR, Config.OCCUPANCY_DENSE_MAX_CELLS)
+        if area <= dense_limit:
+            return DenseOccupancy(field.width, field.height)
+        return SparseOccupancy(field.width, field.height)
+
+    def key(self, x: int, y: int) -> int:
+        """Returns the packed integer key of the cell (x, y)."""
+        return y * self.width + x
+
+    def position(self, key: int) -> tuple:
+        """Returns the (x, y) position of a packed cell key."""
+        y, x = divmod(key, self.width)
+        return x, y
+
+    @abstractmethod
+    def clear(self):
+        """Removes every car from the occupancy."""
+
+    @abstractmethod
+    def place(self, x: int, y: int, name: str):
+        """
+        Records a car in the cell (x, y).
+
+        Parameters:
+        -----------
+        x : int
+            The x-coordinate of the car.
+        y : int
+            The y-coordinate of the car.
+        name : str
+            The name of the car.
+        """
+
+    @abstractmethod
+    def is_occupied(self, x: int, y: int) -> bool:
+        """Returns True if at least one car has been placed in the cell (x, y)."""
+
+    @abstractmethod
+    def groups(self):
+        """
+        Returns the occupied cells in order of first placement.
+
+        Returns:
+        --------
+        iterable
+            Pairs of (cell key, list of car names).
+        """
+
+
+class DenseOccupancy(Occupancy):
+    """
+    Occupancy backed by flat arrays indexed by cell key.
+
+    A generation stamp per cell makes ``clear`` O(1) instead of O(area). Stamps and
+    slots are unsigned 4-byte integers, so the stamps are reset when the generation
+    wraps around.
+    """
+
+    def __init__(self, width: int, height: int):
+        super().__init__(width, height)
+        area = width * height
+        self._stamps = array('I', [0]) * area
+        self._slots = array('I', [0]) * area
+        self._generation = 1
+        self._keys = []
+        self._names = []
+
+    def clear(self):
+        self._generation += 1
+        if self._generation >> 8 * self._stamps.itemsize:
+            self._stamps = array('I', [0]) * len(self._stamps)
+            self._generation = 1
+        self._keys = []
+        self._names = []
+
+    def place(self, x: int, y: int, name: str):
+        key = y * self.width + x
+        if self._stamps[key] == self._generation:
+            self._names[self._slots[key]].append(name)
+        else:
+            self._stamps[key] = self._generation
+            self._slots[key] = len(self._keys)
+            self._keys.append(key)
+            self._names.append([name])
+
+    def is_occupied(self, x: int, y: int) -> bool:
+        return self._stamps[y * self.width + x] == self._generation
+
+    def groups(self):
+        return zip(self._keys, self._names)
+
+
+class SparseOccupancy(Occupancy):
+    """
+    Occupancy backed by a hash of packed cell keys, sized by the number of cars only.
+    """
+
+    def __init__(self, width: int, height: int):
+        super().__init__(width, height)
+        self._cells = {}
+
+    def clear(self):
+        self._cells = {}
+
+    def place(self, x: int, y: int, name: str):
+        key = y * self.width + x
+        names = self._cells.get(key)
+        if names is None:
+            self._cells[key] = [name]
+        else:
+            names.append(name)
+
+    def is_occupied(self, x: int, y: int) -> bool:
+        return y * self.width + x in self._cells
+
+    def groups(self):
+        return self._cells.items()
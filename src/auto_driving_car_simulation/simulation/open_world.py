@@ -0,0 +1,329 @@
+import sys
+from array import array
+from ..localize.localize import localizations
+from ..config.config import Config
+from ..utils.metrics import SimulationMetrics
+from .car import Car
+from .program import OFFSETS, Program
+from .scenario import Scenario
+from .budget import STEP_LIMIT, RunBudget
+
+
+# Reasons a car leaves an open world.
+FINISHED = 'finished'
+COLLIDED = 'collided'
+BOUNDARY = 'boundary'
+
+
+class SpawnStream:
+    """
+    The field and the cars entering an open world, read lazily from lines of text.
+
+    The first non-empty line holds the field width and height, every following line one car in
+    ``step name x y Direction [commands]`` format, in order of step. Lines starting with '#' are
+    ignored. Car lines are only parsed as the simulation reaches them, so a stream can be longer
+    than what fits in memory.
+
+    Attributes:
+    -----------
+    width : int
+        The width of the field.
+    height : int
+        The height of the field.
+    """
+
+    def __init__(self, lines):
+        """
+        Reads the field line of a stream.
+
+        Parameters:
+        -----------
+        lines : iterable
+            The lines of the stream, read as they are needed.
+
+        Raises:
+        -------
+        ValueError
+            If the stream has no valid field line, with the line number in the message.
+        """
+        self._lines = enumerate(lines, start=1)
+        for number, line in self._lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                self.width, self.height = Scenario.parse_dimensions(line)
+            except ValueError as error:
+                raise ValueError(localizations['scenario_line_error'].format(line=number, error=error))
+            return
+        raise ValueError(localizations['empty_scenario_error'])
+
+    def __iter__(self):
+        """
+        Yields the cars of the stream, parsing and validating their lines.
+
+        Yields:
+        -------
+        tuple
+            The (step, name, x, y, direction, commands) of a car.
+
+        Raises:
+        -------
+        ValueError
+            If a line is invalid, with the line number in the message.
+        """
+        last = 0
+        for number, line in self._lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                step, _, car = line.partition(' ')
+                if not step.isdigit() or int(step) < last:
+                    raise ValueError(localizations['invalid_spawn_step_error'])
+                last = int(step)
+                spawn = (last,) + Scenario.parse_car(car, self.width, self.height)
+            except ValueError as error:
+                raise ValueError(localizations['scenario_line_error'].format(line=number, error=error))
+            yield spawn
+
+
+class OpenWorldSimulation:
+    """
+    Simulation of an open world, where cars enter at given steps and leave once they finish their
+    program, collide or run into the field boundary.
+
+    Cars live in the slots of flat arrays, as in BatchSimulation. A car leaving frees its slot and
+    its name, which the next cars entering reuse, so memory follows the number of cars on the field
+    rather than the number of cars ever seen, and results are passed to callbacks as they happen
+    instead of being kept. Every car runs its program from the step it enters, cars run in order
+    of entry and collisions are detected as in Simulation: with every car entering at step 0 and
+    programs of the same length, the results are those of Simulation. Steps with no car on the
+    field are skipped up to the next car entering.
+
+    Attributes:
+    -----------
+    field : Field
+        The field on which the simulation runs.
+    metrics : SimulationMetrics
+        The live counters of the current run, the active cars being the cars on the field.
+    entered : int
+        The number of cars that entered during the current run.
+    left : int
+        The number of cars that left during the current run.
+    interrupted : str
+        Why the budget of the last run interrupted it, see budget.py, or None if it ran to the end.
+    """
+
+    def __init__(self, field):
+        """
+        Initializes the OpenWorldSimulation with a field.
+
+        Parameters:
+        -----------
+        field : Field
+            The field on which the simulation runs.
+        """
+        self.field = field
+        self.metrics = SimulationMetrics()
+        self.entered = 0
+        self.left = 0
+        self.interrupted = None
+        self._clear()
+
+    def _clear(self):
+        """Empties the slots."""
+        self._xs, self._ys, self._keys = array('q'), array('q'), array('q')
+        self._starts, self._ends, self._serials = array('q'), array('q'), array('q')
+        self._headings = bytearray()
+        self._names = []
+        self._programs = []
+        self._free = []
+        self._slots = {}
+        self._cells = {}
+        self._running = []
+
+    @property
+    def capacity(self) -> int:
+        """The number of slots allocated, the largest number of cars that were on the field at once."""
+        return len(self._names)
+
+    def cars(self):
+        """
+        Yields the cars on the field, in order of entry.
+
+        Yields:
+        -------
+        tuple
+            The (name, x, y, direction) of a car.
+        """
+        for slot in self._running:
+            if self._names[slot] is not None:
+                yield self._names[slot], self._xs[slot], self._ys[slot], Car.DIRECTIONS[self._headings[slot]]
+
+    def run_simulation(self, spawns, on_collision=None, on_leave=None, budget: RunBudget = None):
+        """
+        Runs the simulation until every car has entered and left, or the budget runs out.
+
+        Parameters:
+        -----------
+        spawns : iterable
+            The (step, name, x, y, direction, commands) of the cars entering, in order of step.
+            A car entering at a step runs its first command during that step.
+        on_collision : callable, optional
+            Called with the step, the names of the cars and the position of every collision.
+        on_leave : callable, optional
+            Called with the step, the name, the reason (FINISHED, COLLIDED or BOUNDARY), the position
+            and the direction of every car leaving.
+        budget : RunBudget, optional
+            The step and time limits, cancellation token and progress callback of the run.
+
+        Raises:
+        -------
+        ValueError
+            If a car enters outside the field, with invalid commands or with the name of a car on the field.
+        """
+        self._clear()
+        self.metrics.start(0)
+        self.entered = self.left = 0
+        self.interrupted = None
+        width, height = self.field.width, self.field.height
+        xs, ys, keys, headings = self._xs, self._ys, self._keys, self._headings
+        starts, ends, serials = self._starts, self._ends, self._serials
+        names, programs, cells = self._names, self._programs, self._cells
+        metrics = self.metrics
+        spawns = iter(spawns)
+        pending = next(spawns, None)
+
+        step_count, check_interval = sys.maxsize, 0
+        if budget is not None:
+            step_count, check_interval = budget.start(sys.maxsize, 1)
+        # Checks are spread by car commands rather than steps, since the fleet size changes.
+        commands = Config.BUDGET_CHECK_COMMANDS
+        step = 0
+        while True:
+            if not self._running:
+                if pending is None:
+                    break
+                step = max(step, pending[0])
+            if step >= step_count:
+                break
+            if check_interval and commands >= Config.BUDGET_CHECK_COMMANDS:
+                commands = 0
+                self.interrupted = budget.check(step, metrics.active_cars)
+                if self.interrupted:
+                    break
+            entered = []
+            while pending is not None and pending[0] <= step:
+                slot = self._enter(step, *pending[1:], on_leave)
+                if slot is not None:
+                    entered.append(keys[slot])
+                pending = next(spawns, None)
+            running = self._running
+            commands += len(running)
+
+            edges = {}
+            swaps = []
+            for slot in running:
+                command = programs[slot][step - starts[slot]]
+                if command == 'L':
+                    headings[slot] = (headings[slot] - 1) % 4
+                    metrics.turns += 1
+                elif command == 'R':
+                    headings[slot] = (headings[slot] + 1) % 4
+                    metrics.turns += 1
+                else:
+                    heading = headings[slot]
+                    dx, dy = OFFSETS[heading]
+                    x, y = xs[slot] + dx, ys[slot] + dy
+                    if not (0 <= x < width and 0 <= y < height):
+                        metrics.boundary_hits += 1
+                        self._leave(slot, step + 1, BOUNDARY, on_leave)
+                        continue
+                    previous = (xs[slot], ys[slot])
+                    xs[slot], ys[slot] = x, y
+                    old, new = keys[slot], y * width + x
+                    self._remove(slot)
+                    keys[slot] = new
+                    cells.setdefault(new, []).append(slot)
+                    entered.append(new)
+                    metrics.moves += 1
+                    other = edges.get(new * 4 + (heading + 2) % 4)
+                    if other is not None:
+                        swaps.append(([other, slot], previous))
+                    edges[old * 4 + heading] = slot
+
+            groups = sorted((sorted(cells[key], key=serials.__getitem__) for key in dict.fromkeys(entered)
+                             if len(cells.get(key, ())) > 1), key=lambda slots: serials[slots[0]])
+            collided = {}
+            for slots, position in swaps + [(slots, (xs[slots[0]], ys[slots[0]])) for slots in groups]:
+                metrics.collisions += 1
+                if on_collision is not None:
+                    on_collision(step + 1, [names[slot] for slot in slots], position)
+                collided.update(dict.fromkeys(slots))
+            for slot in collided:
+                self._leave(slot, step + 1, COLLIDED, on_leave)
+            for slot in running:
+                if names[slot] is not None and step + 1 >= ends[slot]:
+                    self._leave(slot, step + 1, FINISHED, on_leave)
+            self._running = [slot for slot in running if names[slot] is not None]
+            step += 1
+            metrics.steps = step
+
+        if self.interrupted is None and (self._running or pending is not None):
+            self.interrupted = STEP_LIMIT
+
+    def _enter(self, step: int, name: str, x: int, y: int, direction: str, commands: str, on_leave):
+        """Places an entering car in a free slot and returns it, or None if the car has no commands."""
+        if name in self._slots:
+            raise ValueError(localizations['duplicate_car_name_error'].format(name=name))
+        if not (0 <= x < self.field.width and 0 <= y < self.field.height):
+            raise ValueError(localizations['out_of_bounds_error'])
+        try:
+            program = Program.parse(commands)
+        except ValueError:
+            raise ValueError(localizations['invalid_command_error'])
+        self.entered += 1
+        if not len(program):
+            self.left += 1
+            if on_leave is not None:
+                on_leave(step, name, FINISHED, (x, y), direction)
+            return None
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._names)
+            for column in (self._xs, self._ys, self._keys, self._starts, self._ends, self._serials):
+                column.append(0)
+            self._headings.append(0)
+            self._names.append(None)
+            self._programs.append(None)
+        self._xs[slot], self._ys[slot], self._keys[slot] = x, y, y * self.field.width + x
+        self._starts[slot], self._ends[slot], self._serials[slot] = step, step + len(program), self.entered
+        self._headings[slot] = Car.DIRECTIONS.index(direction)
+        self._names[slot], self._programs[slot] = name, program
+        self._slots[name] = slot
+        self._cells.setdefault(self._keys[slot], []).append(slot)
+        self._running.append(slot)
+        self.metrics.active_cars += 1
+        return slot
+
+    def _leave(self, slot: int, step: int, reason: str, on_leave):
+        """Reports a car leaving and frees its slot and name."""
+        name = self._names[slot]
+        if on_leave is not None:
+            on_leave(step, name, reason, (self._xs[slot], self._ys[slot]), Car.DIRECTIONS[self._headings[slot]])
+        self._remove(slot)
+        del self._slots[name]
+        self._names[slot] = self._programs[slot] = None
+        self._free.append(slot)
+        self.left += 1
+        self.metrics.active_cars -= 1
+
+    def _remove(self, slot: int):
+        """Removes the car of a slot from its cell."""
+        key = self._keys[slot]
+        group = self._cells[key]
+        group.remove(slot)
+        if not group:
+            del self._cells[key]
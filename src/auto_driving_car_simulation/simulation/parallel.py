@@ -0,0 +1,285 @@
+import os
+from multiprocessing import Pipe, Process
+from multiprocessing.shared_memory import SharedMemory
+from .car import Car
+from .program import OFFSETS, Program
+from .digest import BOUNDARY, MASK, StateDigest, car_digest
+from .budget import STEP_LIMIT, RunBudget
+from .simulation import Simulation
+
+
+def _views(buffer, size: int) -> tuple:
+    """
+    Splits a shared memory buffer into the per-car arrays.
+
+    Returns:
+    --------
+    tuple
+        The xs, ys and events int64 arrays and the headings and stopped int8 arrays.
+    """
+    longs = 8 * size
+    return (buffer[:longs].cast('q'), buffer[longs:2 * longs].cast('q'), buffer[2 * longs:3 * longs].cast('q'),
+            buffer[3 * longs:3 * longs + size].cast('b'), buffer[3 * longs + size:3 * longs + 2 * size].cast('b'))
+
+
+def _advance_slice(connection, name: str, size: int, start: int, sources: list, width: int, height: int,
+                   digests: bool = False):
+    """
+    Worker loop advancing the cars [start, start + len(sources)) one step per request.
+
+    For every car that moved the index is written to the events array, for every car that hit
+    the boundary its complement, both from the start of the slice; the count of events, the number
+    of turns and the change of the state digest of the slice are sent back.
+
+    Parameters:
+    -----------
+    connection : Connection
+        The pipe receiving steps, or None to stop, and sending (event count, turn count, digest change).
+    name : str
+        The name of the shared memory block.
+    size : int
+        The number of cars in the simulation.
+    start : int
+        The index of the first car of the slice.
+    sources : list
+        The command programs of the cars of the slice.
+    width : int
+        The width of the field.
+    height : int
+        The height of the field.
+    digests : bool
+        Whether to compute the change of the state digest, 0 is sent otherwise.
+    """
+    memory = SharedMemory(name=name)
+    xs, ys, events, headings, stopped = _views(memory.buf, size)
+    programs = [Program.parse(source) for source in sources]
+    try:
+        while True:
+            step = connection.recv()
+            if step is None:
+                break
+            count = turns = delta = 0
+            for index, program in enumerate(programs, start):
+                if stopped[index] or step >= len(program):
+                    continue
+                if digests:
+                    delta -= car_digest(index, xs[index], ys[index], headings[index])
+                command = program[step]
+                if command == 'L':
+                    headings[index] = (headings[index] - 1) % 4
+                    turns += 1
+                elif command == 'R':
+                    headings[index] = (headings[index] + 1) % 4
+                    turns += 1
+                else:
+                    dx, dy = OFFSETS[headings[index]]
+                    x, y = xs[index] + dx, ys[index] + dy
+                    if 0 <= x < width and 0 <= y < height:
+                        xs[index] = x
+                        ys[index] = y
+                        events[start + count] = index
+                    else:
+                        events[start + count] = ~index
+                    count += 1
+                if digests:
+                    delta += car_digest(index, xs[index], ys[index], headings[index])
+            connection.send((count, turns, delta & MASK))
+    finally:
+        del xs, ys, events, headings, stopped
+        memory.close()
+
+
+class ParallelSimulation(Simulation):
+    """
+    Simulation advancing slices of the cars in worker processes.
+
+    Positions, headings and stopped flags live in a shared memory block, so cars are never pickled
+    between processes during the run. After every step the main process merges the moves reported
+    by the workers into an incrementally maintained occupancy and detects collisions, with the same
+    results as Simulation.
+
+    Attributes:
+    -----------
+    workers : int
+        The number of worker processes.
+    """
+
+    def __init__(self, field, workers: int = None):
+        """
+        Initializes the ParallelSimulation with a field.
+
+        Parameters:
+        -----------
+        field : Field
+            The field on which the simulation runs.
+        workers : int, optional
+            The number of worker processes, defaults to the number of CPUs.
+        """
+        super().__init__(field)
+        self.workers = workers or os.cpu_count() or 1
+
+    def run_simulation(self, display: bool = True, budget: RunBudget = None):
+        """
+        Runs the simulation with the cars split across worker processes.
+
+        Parameters:
+        -----------
+        display : bool
+            Whether to print the initial car positions and the final results.
+        budget : RunBudget, optional
+            The step and time limits, cancellation token and progress callback of the run.
+        """
+        if self.near_miss is not None or self.analytics is not None:
+            # Near misses and analytics are only gathered by the step loops of Simulation.
+            return Simulation.run_simulation(self, display, budget)
+        if display:
+            self.display_initial_car_positions()
+        size = len(self.cars)
+        self.metrics.start(size - len(self.stopped_cars))
+        self.digest = StateDigest(self.cars, self.stopped_cars) if self.track_digests else None
+        self.interrupted = None
+        max_steps = max((len(car.program) for car in self.cars), default=0)
+        step_count, check_interval = max_steps, 0
+        if budget is not None:
+            step_count, check_interval = budget.start(max_steps, size)
+        if size and step_count:
+            memory = SharedMemory(create=True, size=26 * size)
+            try:
+                self._run_shared(memory, size, step_count, check_interval, budget)
+            finally:
+                memory.close()
+                memory.unlink()
+        if self.interrupted is None:
+            # The workers stop once every car is stopped, while Simulation counts every step of the programs.
+            self.metrics.steps = step_count
+        if self.interrupted is None and step_count < max_steps and \
+                RunBudget.truncated(self.cars, self.stopped_cars, step_count):
+            self.interrupted = STEP_LIMIT
+        if self.digest is not None and self.interrupted is None:
+            self.digest.finish(step_count)
+        if display:
+            self.display_final_results()
+
+    def _run_shared(self, memory: SharedMemory, size: int, max_steps: int, check_interval: int, budget: RunBudget):
+        """Starts the workers, runs the steps and copies the final state back to the cars."""
+        xs, ys, events, headings, stopped = _views(memory.buf, size)
+        width = self.field.width
+        metrics = self.metrics
+        digest = self.digest
+        for index, car in enumerate(self.cars):
+            xs[index], ys[index] = car.x, car.y
+            headings[index] = Car.DIRECTIONS.index(car.direction)
+            stopped[index] = int(car.name in self.stopped_cars)
+        workers = min(self.workers, size)
+        bounds = [size * worker // workers for worker in range(workers + 1)]
+        slices = []
+        try:
+            for start, end in zip(bounds, bounds[1:]):
+                parent, child = Pipe()
+                process = Process(target=_advance_slice, daemon=True,
+                                  args=(child, memory.name, size, start,
+                                        [str(car.program) for car in self.cars[start:end]], width,
+                                        self.field.height, self.digest is not None))
+                process.start()
+                slices.append((start, parent, process))
+            keys = [car.y * width + car.x for car in self.cars]
+            cells = {}
+            for index, key in enumerate(keys):
+                if not stopped[index]:
+                    cells.setdefault(key, []).append(index)
+            entered = list(cells)
+            for step in range(max_steps):
+                if check_interval and step % check_interval == 0:
+                    self.interrupted = budget.check(step, size - len(self.stopped_cars))
+                    if self.interrupted:
+                        break
+                for _, connection, _ in slices:
+                    connection.send(step)
+                edges = {}
+                swaps = []
+                for start, connection, _ in slices:
+                    count, turns, delta = connection.recv()
+                    metrics.turns += turns
+                    if digest is not None:
+                        digest.change(delta)
+                    for event in events[start:start + count]:
+                        if event < 0:
+                            self._stop_at_boundary(~event, step, cells, keys, stopped)
+                            continue
+                        old, new = keys[event], ys[event] * width + xs[event]
+                        cells[old].remove(event)
+                        if not cells[old]:
+                            del cells[old]
+                        cells.setdefault(new, []).append(event)
+                        keys[event] = new
+                        entered.append(new)
+                        metrics.moves += 1
+                        heading = headings[event]
+                        other = edges.get(new * 4 + (heading + 2) % 4)
+                        if other is not None:
+                            swaps.append(([other, event], old))
+                        edges[old * 4 + heading] = event
+                self._merge_collisions(step, entered, swaps, cells, keys, stopped)
+                entered = []
+                metrics.steps += 1
+                if digest is not None:
+                    digest.end_step()
+                if len(self.stopped_cars) == size:
+                    break
+            for index, car in enumerate(self.cars):
+                car.x, car.y = xs[index], ys[index]
+                car.direction = Car.DIRECTIONS[headings[index]]
+        finally:
+            for _, connection, process in slices:
+                if process.is_alive():
+                    connection.send(None)
+                process.join()
+            del xs, ys, events, headings, stopped
+
+    def _stop_at_boundary(self, index: int, step: int, cells: dict, keys: list, stopped):
+        """Records a boundary collision reported by a worker and stops the car."""
+        name = self.cars[index].name
+        self.boundary_collisions.setdefault(name, []).append(step + 1)
+        self.stopped_cars.add(name)
+        self.metrics.boundary_hits += 1
+        self.metrics.active_cars = len(self.cars) - len(self.stopped_cars)
+        if self.digest is not None:
+            x, y = self._position(keys[index])
+            self.digest.stop(index)
+            self.digest.event(step + 1, BOUNDARY, index, x, y)
+        self._remove(index, cells, keys, stopped)
+
+    def _merge_collisions(self, step: int, entered: list, swaps: list, cells: dict, keys: list, stopped):
+        """
+        Reports the swaps and the collisions in the cells entered during the step, in the order
+        Simulation.check_collisions reports them, and stops the cars involved.
+        """
+        groups = []
+        for key in dict.fromkeys(entered):
+            group = cells.get(key)
+            if group is not None and len(group) > 1:
+                groups.append((min(group), key, sorted(group)))
+        groups.sort()
+        for indices, position in swaps:
+            self.report_collision([self.cars[index].name for index in indices], self._position(position), step,
+                                  swap=True)
+        for _, key, indices in groups:
+            self.report_collision([self.cars[index].name for index in indices], self._position(key), step)
+        for indices in [indices for indices, _ in swaps] + [indices for _, _, indices in groups]:
+            for index in indices:
+                if not stopped[index]:
+                    self._remove(index, cells, keys, stopped)
+
+    def _position(self, key: int) -> tuple:
+        """Returns the (x, y) position of a packed cell key."""
+        y, x = divmod(key, self.field.width)
+        return x, y
+
+    @staticmethod
+    def _remove(index: int, cells: dict, keys: list, stopped):
+        """Marks a car as stopped for the workers and removes it from the occupancy."""
+        stopped[index] = 1
+        group = cells[keys[index]]
+        group.remove(index)
+        if not group:
+            del cells[keys[index]]
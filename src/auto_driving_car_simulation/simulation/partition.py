@@ -0,0 +1,224 @@
+from .car import Car
+from .program import bounds_intersect
+from .simulation import Simulation
+from .batch import BatchSimulation
+from .budget import STEP_LIMIT, RunBudget
+
+
+def path_bounds(field, car: Car, horizon: int = None) -> tuple:
+    """
+    Returns the box of every cell a car can occupy during its program, or its first steps.
+
+    The box of the displacements of every prefix of the program, placed at the start cell and
+    heading of the car, is clipped to the field: a car stops at the boundary instead of leaving it.
+    With a horizon it is also clipped to the cells within that many moves of the start cell.
+
+    Parameters:
+    -----------
+    field : Field
+        The field on which the car moves.
+    car : Car
+        The car, before the run.
+    horizon : int, optional
+        The number of steps to cover, defaults to the whole program.
+
+    Returns:
+    --------
+    tuple
+        The (min_x, max_x, min_y, max_y) box.
+    """
+    low_x, high_x, low_y, high_y = car.program.bounds(car.x, car.y, Car.DIRECTIONS.index(car.direction), 0)
+    low_x, high_x = max(low_x, 0), min(high_x, field.width - 1)
+    low_y, high_y = max(low_y, 0), min(high_y, field.height - 1)
+    if horizon is not None:
+        low_x, high_x = max(low_x, car.x - horizon), min(high_x, car.x + horizon)
+        low_y, high_y = max(low_y, car.y - horizon), min(high_y, car.y + horizon)
+    return low_x, high_x, low_y, high_y
+
+
+def interaction_components(field, cars: list, stopped_cars: set, horizon: int = None) -> list:
+    """
+    Splits the active cars into groups that can never collide with a car of another group.
+
+    Two cars can only collide in a cell both can occupy, so cars are linked when their path boxes
+    intersect and the groups are the connected components of these links. Boxes are swept by their
+    left edge, each one only compared with the boxes still open at that edge.
+
+    Parameters:
+    -----------
+    field : Field
+        The field on which the cars move.
+    cars : list
+        The cars of the simulation.
+    stopped_cars : set
+        The names of the stopped cars, which take part in no group.
+    horizon : int, optional
+        The number of steps to cover, defaults to the whole programs.
+
+    Returns:
+    --------
+    list
+        The car indices of every component, in order, components ordered by their first car.
+    """
+    boxes = sorted((path_bounds(field, car, horizon), index) for index, car in enumerate(cars)
+                   if car.name not in stopped_cars)
+    parents = {index: index for _, index in boxes}
+
+    def root(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    open_boxes = []
+    for bounds, index in boxes:
+        open_boxes = [(other_bounds, other) for other_bounds, other in open_boxes if other_bounds[1] >= bounds[0]]
+        for other_bounds, other in open_boxes:
+            if bounds_intersect(bounds, other_bounds):
+                parents[root(other)] = root(index)
+        open_boxes.append((bounds, index))
+
+    components = {}
+    for index in sorted(parents):
+        components.setdefault(root(index), []).append(index)
+    return sorted(components.values())
+
+
+class ComponentSimulation(Simulation):
+    """
+    A component of a partitioned simulation, recording its collisions with the car indices of the whole simulation.
+
+    Attributes:
+    -----------
+    indices : dict
+        The index of each car in the whole simulation, by name.
+    events : list
+        The (step, kind, order, cars, position) of every collision, kind 0 for swaps and 1 for
+        cars ending in the same cell, in the order of Simulation.check_collisions when sorted.
+    """
+
+    def __init__(self, field, indices: dict):
+        """
+        Initializes the component with a field and the indices of its cars.
+
+        Parameters:
+        -----------
+        field : Field
+            The field on which the simulation runs.
+        indices : dict
+            The index of each car in the whole simulation, by name.
+        """
+        super().__init__(field)
+        self.indices = indices
+        self.events = []
+
+    def report_collision(self, cars: list, pos: tuple, step: int, swap: bool = False):
+        super().report_collision(cars, pos, step, swap)
+        indices = [self.indices[name] for name in cars]
+        self.events.append((step + 1, 0 if swap else 1, max(indices) if swap else min(indices), cars, pos))
+
+
+class PartitionedSimulation(Simulation):
+    """
+    Simulation split into interaction components, each simulated on its own and merged.
+
+    On sparse fleets most cars end up alone or in small components, so the per-step collision
+    checks of the whole fleet become checks within small groups. A car alone whose path stays in
+    the field is advanced in one go, without stepping; components of several cars run on the flat
+    arrays of BatchSimulation, batched with the components of similar size so padding at most
+    doubles their slots. Near misses, analytics, digests and time or cancellation budgets need the
+    whole fleet step by step, so with any of them the run falls back to the step loop of Simulation.
+
+    Attributes:
+    -----------
+    components : list
+        The car indices of every component of the last run.
+    """
+
+    def __init__(self, field):
+        """
+        Initializes the PartitionedSimulation with a field.
+
+        Parameters:
+        -----------
+        field : Field
+            The field on which the simulation runs.
+        """
+        super().__init__(field)
+        self.components = []
+
+    def run_simulation(self, display: bool = True, budget: RunBudget = None):
+        """
+        Runs every interaction component separately and merges their results.
+
+        Parameters:
+        -----------
+        display : bool
+            Whether to print the initial car positions and the final results.
+        budget : RunBudget, optional
+            The step and time limits, cancellation token and progress callback of the run.
+        """
+        if self.near_miss is not None or self.analytics is not None or self.track_digests or (
+                budget is not None and (budget.max_seconds is not None or budget.token is not None or
+                                        budget.progress is not None)):
+            return Simulation.run_simulation(self, display, budget)
+        if display:
+            self.display_initial_car_positions()
+        self.metrics.start(len(self.cars) - len(self.stopped_cars))
+        self.digest = None
+        self.interrupted = None
+        self.near_misses = {}
+        self.components = interaction_components(self.field, self.cars, self.stopped_cars)
+        max_steps = budget.max_steps if budget is not None else None
+        component_budget = RunBudget(max_steps) if max_steps is not None else None
+        runs = max_steps != 0 and any(car.program for car in self.cars)
+        simulations = []
+        batches = {}
+        for component in self.components:
+            if len(component) == 1:
+                car = self.cars[component[0]]
+                simulation = Simulation(self.field)
+                simulation.add_car(car)
+                simulation.metrics.start(1)
+                if simulation.advance_last_active_car(0, max_steps):
+                    if max_steps is not None and max_steps < len(car.program):
+                        simulation.interrupted = STEP_LIMIT
+                else:
+                    simulation.run_simulation(display=False, budget=component_budget)
+            else:
+                simulation = ComponentSimulation(self.field, {self.cars[index].name: index for index in component})
+                for index in component:
+                    simulation.add_car(self.cars[index])
+                if not any(self.cars[index].program for index in component):
+                    # Idle components do not run, yet cars sharing a start cell collide at the first step.
+                    if runs:
+                        simulation.check_collisions(0)
+                    simulations.append(simulation)
+                    continue
+                batches.setdefault((len(component) - 1).bit_length(), []).append(simulation)
+            simulations.append(simulation)
+        for batch in batches.values():
+            BatchSimulation(batch).run_simulation(budget=component_budget)
+        events = []
+        for simulation in simulations:
+            self.stopped_cars.update(simulation.stopped_cars)
+            self.boundary_collisions.update(simulation.boundary_collisions)
+            events.extend(getattr(simulation, 'events', ()))
+            if simulation.interrupted:
+                self.interrupted = simulation.interrupted
+            metrics = simulation.metrics
+            self.metrics.moves += metrics.moves
+            self.metrics.turns += metrics.turns
+            self.metrics.collisions += metrics.collisions
+            self.metrics.boundary_hits += metrics.boundary_hits
+        for step, _, _, cars, pos in sorted(events, key=lambda event: event[:3]):
+            self.collisions.setdefault(step, []).append((cars, pos))
+        # Components stop with their own cars, while the whole fleet runs up to its longest program.
+        self.metrics.steps = max((len(car.program) for car in self.cars), default=0)
+        if max_steps is not None:
+            self.metrics.steps = min(self.metrics.steps, max_steps)
+        self.metrics.active_cars = len(self.cars) - len(self.stopped_cars)
+        if self.interrupted is not None:
+            self.interrupted = STEP_LIMIT
+        if display:
+            self.display_final_results()
@@ -0,0 +1,654 @@
+import sys
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import groupby
+from ..config.config import Config
+
+
+# Unit offsets for each heading index, in the order of Config.CAR_DIRECTIONS (N, E, S, W).
+OFFSETS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+# Number of repetitions after which a net heading change brings a car back to its heading.
+TURN_PERIODS = (1, 4, 2, 4)
+
+
+def rotate(dx: int, dy: int, heading: int) -> tuple:
+    """
+    Rotates a displacement expressed relative to a car facing north into the frame of a heading.
+
+    Parameters:
+    -----------
+    dx : int
+        The x-displacement for a car initially facing north.
+    dy : int
+        The y-displacement for a car initially facing north.
+    heading : int
+        The index of the actual initial heading in Config.CAR_DIRECTIONS.
+
+    Returns:
+    --------
+    tuple
+        The rotated (dx, dy) displacement.
+    """
+    heading %= 4
+    if heading == 0:
+        return dx, dy
+    if heading == 1:
+        return dy, -dx
+    if heading == 2:
+        return -dx, -dy
+    return -dy, dx
+
+
+def rotate_bounds(bounds: tuple, heading: int, dx: int = 0, dy: int = 0) -> tuple:
+    """
+    Rotates a (min_x, max_x, min_y, max_y) bounding box into the frame of a heading and shifts it.
+
+    Parameters:
+    -----------
+    bounds : tuple
+        The bounding box relative to a car initially facing north.
+    heading : int
+        The index of the actual initial heading in Config.CAR_DIRECTIONS.
+    dx : int
+        The x-shift applied after the rotation.
+    dy : int
+        The y-shift applied after the rotation.
+
+    Returns:
+    --------
+    tuple
+        The rotated and shifted bounding box.
+    """
+    min_x, max_x, min_y, max_y = bounds
+    x1, y1 = rotate(min_x, min_y, heading)
+    x2, y2 = rotate(max_x, max_y, heading)
+    return min(x1, x2) + dx, max(x1, x2) + dx, min(y1, y2) + dy, max(y1, y2) + dy
+
+
+def merge_bounds(first: tuple, second: tuple) -> tuple:
+    """Returns the smallest bounding box containing both bounding boxes."""
+    return (min(first[0], second[0]), max(first[1], second[1]),
+            min(first[2], second[2]), max(first[3], second[3]))
+
+
+def bounds_intersect(first: tuple, second: tuple) -> bool:
+    """Returns True if two (min_x, max_x, min_y, max_y) bounding boxes share at least one cell."""
+    return first[0] <= second[1] and second[0] <= first[1] and first[2] <= second[3] and second[2] <= first[3]
+
+
+class Program(ABC):
+    """
+    A command program compiled once and shared by every car running the same commands.
+
+    Headings and displacements are expressed relative to a car initially facing north at
+    the origin, so a single program serves cars with any start cell and heading. Programs
+    are either literal command strings or lazy repetitions and sequences of programs, which
+    are never expanded in memory.
+    """
+
+    __slots__ = ()
+
+    @staticmethod
+    @lru_cache(maxsize=Config.PROGRAM_CACHE_SIZE)
+    def compile(text: str):
+        """
+        Returns the shared compiled program for a literal command string.
+
+        Programs are kept in an LRU cache keyed by the command string, so cars running the
+        same string reuse the same arrays.
+
+        Parameters:
+        -----------
+        text : str
+            The commands, a combination of 'L', 'R' and 'F'.
+
+        Returns:
+        --------
+        LiteralProgram
+            The compiled program.
+        """
+        return LiteralProgram(text)
+
+    @staticmethod
+    @lru_cache(maxsize=Config.PROGRAM_CACHE_SIZE)
+    def parse(source: str):
+        """
+        Parses commands written with the compact repeat syntax.
+
+        A count before a command or a parenthesised group repeats it, e.g. ``3F`` or
+        ``1000000(FFRFFR)``. Groups may be nested.
+
+        Parameters:
+        -----------
+        source : str
+            The program source.
+
+        Returns:
+        --------
+        Program
+            The parsed program.
+
+        Raises:
+        -------
+        ValueError
+            If the source is not a valid program.
+        """
+        if all(c in Config.CAR_COMMANDS for c in source):
+            return Program.compile(source)
+        program, position = Program._parse_sequence(source, 0)
+        if position != len(source):
+            raise ValueError(f"Unexpected '{source[position]}' at position {position}")
+        return program
+
+    @staticmethod
+    def _parse_sequence(source: str, position: int) -> tuple:
+        """Parses programs until the end of the source or a closing parenthesis."""
+        parts = []
+        literal_start = position
+        while position < len(source) and source[position] != ')':
+            if source[position] in Config.CAR_COMMANDS:
+                position += 1
+                continue
+            if literal_start < position:
+                parts.append(Program.compile(source[literal_start:position]))
+            part, position = Program._parse_repeat(source, position)
+            parts.append(part)
+            literal_start = position
+        if literal_start < position:
+            parts.append(Program.compile(source[literal_start:position]))
+        if not parts:
+            return Program.compile(''), position
+        if len(parts) == 1:
+            return parts[0], position
+        return SequenceProgram(parts), position
+
+    @staticmethod
+    def _parse_repeat(source: str, position: int) -> tuple:
+        """Parses a count followed by a single command or a parenthesised group."""
+        start = position
+        while position < len(source) and source[position].isdigit():
+            position += 1
+        if start == position or position == len(source):
+            raise ValueError(f"Expected a repeat count at position {start}")
+        count = int(source[start:position])
+        if source[position] in Config.CAR_COMMANDS:
+            return RepeatProgram(Program.compile(source[position]), count), position + 1
+        if source[position] != '(':
+            raise ValueError(f"Expected '(' at position {position}")
+        body, position = Program._parse_sequence(source, position + 1)
+        if position == len(source):
+            raise ValueError("Missing ')'")
+        return RepeatProgram(body, count), position + 1
+
+    def __len__(self):
+        return self.length
+
+    @abstractmethod
+    def __getitem__(self, step: int) -> str:
+        """Returns the command run at the given step."""
+
+    @abstractmethod
+    def turn(self, step: int) -> int:
+        """Returns the net heading change (0-3, clockwise) after the first `step` commands."""
+
+    @abstractmethod
+    def displacement(self, step: int) -> tuple:
+        """Returns the (x, y) displacement after the first `step` commands."""
+
+    @abstractmethod
+    def suffix_bounds(self, step: int) -> tuple:
+        """Returns the (min_x, max_x, min_y, max_y) box of every displacement from `step` to the end."""
+
+    @abstractmethod
+    def forward_moves(self, step: int) -> int:
+        """Returns the number of forward moves among the first `step` commands."""
+
+    def offset(self, step: int) -> tuple:
+        """Returns the (dx, dy) offset applied by the command at the given step."""
+        x0, y0 = self.displacement(step)
+        x1, y1 = self.displacement(step + 1)
+        return x1 - x0, y1 - y0
+
+    def transform(self, x: int, y: int, heading: int, start: int, end: int) -> tuple:
+        """
+        Applies the commands in [start, end) as a single offset, ignoring the field.
+
+        Parameters:
+        -----------
+        x : int
+            The x-coordinate of the car before the start step.
+        y : int
+            The y-coordinate of the car before the start step.
+        heading : int
+            The heading index of the car before the start step.
+        start : int
+            The first step to apply.
+        end : int
+            The step after the last one to apply.
+
+        Returns:
+        --------
+        tuple
+            The (x, y, heading) of the car after the end step.
+        """
+        initial = heading - self.turn(start)
+        x0, y0 = self.displacement(start)
+        x1, y1 = self.displacement(end)
+        dx, dy = rotate(x1 - x0, y1 - y0, initial)
+        return x + dx, y + dy, (initial + self.turn(end)) % 4
+
+    def fits(self, field, x: int, y: int, heading: int, start: int) -> bool:
+        """
+        Checks whether the rest of the program from the start step stays within the field.
+
+        Parameters:
+        -----------
+        field : Field
+            The field in which the car is moving.
+        x : int
+            The x-coordinate of the car before the start step.
+        y : int
+            The y-coordinate of the car before the start step.
+        heading : int
+            The heading index of the car before the start step.
+        start : int
+            The first step to check.
+
+        Returns:
+        --------
+        bool
+            True if no remaining move would leave the field, False otherwise.
+        """
+        low_x, high_x, low_y, high_y = self.bounds(x, y, heading, start)
+        return field.is_within_boundaries(low_x, low_y) and field.is_within_boundaries(high_x, high_y)
+
+    def bounds(self, x: int, y: int, heading: int, start: int) -> tuple:
+        """
+        Returns the bounding box of every cell visited from the start step to the end, ignoring the field.
+
+        Parameters:
+        -----------
+        x : int
+            The x-coordinate of the car before the start step.
+        y : int
+            The y-coordinate of the car before the start step.
+        heading : int
+            The heading index of the car before the start step.
+        start : int
+            The first step of the path.
+
+        Returns:
+        --------
+        tuple
+            The (min_x, max_x, min_y, max_y) box.
+        """
+        initial = heading - self.turn(start)
+        dx, dy = rotate(*self.displacement(start), initial)
+        return rotate_bounds(self.suffix_bounds(start), initial, x - dx, y - dy)
+
+    def runs(self):
+        """
+        Yields the program as maximal runs of forward moves and of turns, in order.
+
+        Yields:
+        -------
+        tuple
+            The (length, turn) of a run, turn being None for a run of forward moves and the net
+            heading change (0-3, clockwise) of a run of turns.
+        """
+        length, turn = 0, None
+        for run_length, run_turn in self._command_runs():
+            if length and (run_turn is None) == (turn is None):
+                length += run_length
+                if turn is not None:
+                    turn = (turn + run_turn) % 4
+            else:
+                if length:
+                    yield length, turn
+                length, turn = run_length, run_turn
+        if length:
+            yield length, turn
+
+    @abstractmethod
+    def _command_runs(self):
+        """Yields runs of forward moves and of turns, in order, adjacent runs possibly of the same kind."""
+
+
+class LiteralProgram(Program):
+    """
+    A program given as a literal command string.
+
+    Only the string, the net heading change and displacement and the box of the whole program are
+    kept up front, which is all that running the program and placing it need. The prefix arrays,
+    about 17 bytes per command, are only built for a program whose intermediate steps are queried.
+
+    Attributes:
+    -----------
+    text : str
+        The interned command string.
+    turns : array
+        The net heading change after each prefix of the program, built on first access.
+    xs : array
+        The x-displacement after each prefix of the program, built on first access.
+    ys : array
+        The y-displacement after each prefix of the program, built on first access.
+    """
+
+    __slots__ = ('text', 'length', '_end', '_box', '_prefixes', '_bounds', '_runs')
+
+    def __init__(self, text: str):
+        """
+        Compiles a command string.
+
+        Parameters:
+        -----------
+        text : str
+            The commands, a combination of 'L', 'R' and 'F'.
+        """
+        self.text = sys.intern(text)
+        self.length = len(text)
+        self._prefixes = None
+        self._bounds = None
+        self._runs = None
+        heading, x, y = 0, 0, 0
+        min_x = max_x = min_y = max_y = 0
+        for command in text:
+            if command == 'L':
+                heading = (heading - 1) % 4
+            elif command == 'R':
+                heading = (heading + 1) % 4
+            else:
+                dx, dy = OFFSETS[heading]
+                x += dx
+                y += dy
+                min_x, max_x, min_y, max_y = min(min_x, x), max(max_x, x), min(min_y, y), max(max_y, y)
+        self._end = (heading, x, y)
+        self._box = (min_x, max_x, min_y, max_y)
+
+    def __getitem__(self, step: int) -> str:
+        return self.text[step]
+
+    def __str__(self):
+        return self.text
+
+    @property
+    def turns(self) -> array:
+        return self._build_prefixes()[0]
+
+    @property
+    def xs(self) -> array:
+        return self._build_prefixes()[1]
+
+    @property
+    def ys(self) -> array:
+        return self._build_prefixes()[2]
+
+    def _build_prefixes(self) -> tuple:
+        """Returns the heading change and displacement arrays after each prefix, building them once."""
+        if self._prefixes is None:
+            turns, xs, ys = array('b', [0]), array('q', [0]), array('q', [0])
+            heading, x, y = 0, 0, 0
+            for command in self.text:
+                if command == 'L':
+                    heading = (heading - 1) % 4
+                elif command == 'R':
+                    heading = (heading + 1) % 4
+                else:
+                    dx, dy = OFFSETS[heading]
+                    x += dx
+                    y += dy
+                turns.append(heading)
+                xs.append(x)
+                ys.append(y)
+            self._prefixes = (turns, xs, ys)
+        return self._prefixes
+
+    def turn(self, step: int) -> int:
+        if step == 0:
+            return 0
+        if step >= self.length:
+            return self._end[0]
+        return self._build_prefixes()[0][step]
+
+    def displacement(self, step: int) -> tuple:
+        if step == 0:
+            return 0, 0
+        if step >= self.length:
+            return self._end[1], self._end[2]
+        _, xs, ys = self._build_prefixes()
+        return xs[step], ys[step]
+
+    def forward_moves(self, step: int) -> int:
+        return self.text.count('F', 0, step)
+
+    def suffix_bounds(self, step: int) -> tuple:
+        if step == 0:
+            return self._box
+        if step >= self.length:
+            _, x, y = self._end
+            return x, x, y, y
+        if self._bounds is None:
+            self._bounds = self._build_suffix_bounds()
+        min_xs, max_xs, min_ys, max_ys = self._bounds
+        return min_xs[step], max_xs[step], min_ys[step], max_ys[step]
+
+    def _build_suffix_bounds(self) -> tuple:
+        """Builds the bounding box of the displacements from each step to the end of the program."""
+        _, xs, ys = self._build_prefixes()
+        min_xs, max_xs = array('q', xs), array('q', xs)
+        min_ys, max_ys = array('q', ys), array('q', ys)
+        for step in range(self.length - 1, -1, -1):
+            min_xs[step] = min(min_xs[step], min_xs[step + 1])
+            max_xs[step] = max(max_xs[step], max_xs[step + 1])
+            min_ys[step] = min(min_ys[step], min_ys[step + 1])
+            max_ys[step] = max(max_ys[step], max_ys[step + 1])
+        return min_xs, max_xs, min_ys, max_ys
+
+    def _command_runs(self):
+        if self._runs is None:
+            runs = []
+            for forward, commands in groupby(self.text, 'F'.__eq__):
+                commands = ''.join(commands)
+                runs.append((len(commands), None if forward else (commands.count('R') - commands.count('L')) % 4))
+            self._runs = tuple(runs)
+        return self._runs
+
+
+class RepeatProgram(Program):
+    """
+    A program repeated a number of times without being expanded.
+
+    Attributes:
+    -----------
+    body : Program
+        The repeated program.
+    count : int
+        The number of repetitions.
+    """
+
+    __slots__ = ('body', 'count', 'length', '_period_turn', '_period_displacement')
+
+    def __init__(self, body: Program, count: int):
+        """
+        Constructs the repetition of a program.
+
+        Parameters:
+        -----------
+        body : Program
+            The repeated program.
+        count : int
+            The number of repetitions.
+        """
+        self.body = body
+        self.count = count
+        self.length = len(body) * count
+        self._period_turn = body.turn(len(body))
+        self._period_displacement = body.displacement(len(body))
+
+    def __getitem__(self, step: int) -> str:
+        return self.body[step % len(self.body)]
+
+    def __str__(self):
+        return f"{self.count}({self.body})"
+
+    def _periods_displacement(self, periods: int) -> tuple:
+        """Returns the displacement after a number of whole repetitions."""
+        dx, dy = self._period_displacement
+        if self._period_turn == 0:
+            return dx * periods, dy * periods
+        # A non-zero net turn brings the car back to its start after TURN_PERIODS repetitions.
+        x, y = 0, 0
+        for index in range(periods % TURN_PERIODS[self._period_turn]):
+            rx, ry = rotate(dx, dy, index * self._period_turn)
+            x += rx
+            y += ry
+        return x, y
+
+    def turn(self, step: int) -> int:
+        periods, rest = divmod(step, len(self.body)) if self.body.length else (0, 0)
+        return (periods * self._period_turn + self.body.turn(rest)) % 4
+
+    def displacement(self, step: int) -> tuple:
+        if not self.body.length:
+            return 0, 0
+        periods, rest = divmod(step, len(self.body))
+        x, y = self._periods_displacement(periods)
+        dx, dy = rotate(*self.body.displacement(rest), periods * self._period_turn)
+        return x + dx, y + dy
+
+    def forward_moves(self, step: int) -> int:
+        if not self.body.length:
+            return 0
+        periods, rest = divmod(min(step, self.length), len(self.body))
+        return periods * self.body.forward_moves(len(self.body)) + self.body.forward_moves(rest)
+
+    def _period_bounds(self, period: int, start: int = 0) -> tuple:
+        """Returns the bounding box of one repetition from the given step within it."""
+        dx, dy = self._periods_displacement(period)
+        return rotate_bounds(self.body.suffix_bounds(start), period * self._period_turn, dx, dy)
+
+    def suffix_bounds(self, step: int) -> tuple:
+        if step >= self.length:
+            x, y = self.displacement(self.length)
+            return x, x, y, y
+        period, rest = divmod(step, len(self.body))
+        bounds = self._period_bounds(period, rest)
+        last = self.count - 1
+        if period < last:
+            if self._period_turn == 0:
+                # Straight repetitions move linearly, so the first and last ones bound the rest.
+                bounds = merge_bounds(bounds, self._period_bounds(period + 1))
+                bounds = merge_bounds(bounds, self._period_bounds(last))
+            else:
+                for index in range(period + 1, min(last, period + TURN_PERIODS[self._period_turn]) + 1):
+                    bounds = merge_bounds(bounds, self._period_bounds(index))
+        return bounds
+
+    def _command_runs(self):
+        runs = list(self.body.runs())
+        if len(runs) == 1:
+            # A body of a single run repeats into a single run, however many repetitions there are.
+            length, turn = runs[0]
+            yield length * self.count, None if turn is None else turn * self.count % 4
+            return
+        for _ in range(self.count):
+            yield from runs
+
+
+class SequenceProgram(Program):
+    """
+    A program made of several programs run one after the other.
+
+    Attributes:
+    -----------
+    parts : list
+        The programs run in order.
+    """
+
+    __slots__ = ('parts', 'length', '_starts', '_turns', '_displacements', '_moves', '_tail_bounds')
+
+    def __init__(self, parts: list):
+        """
+        Constructs the sequence of programs.
+
+        Parameters:
+        -----------
+        parts : list
+            The programs run in order.
+        """
+        self.parts = parts
+        self._starts = []
+        self._turns = []
+        self._displacements = []
+        self._moves = []
+        start, heading, x, y, moves = 0, 0, 0, 0, 0
+        for part in parts:
+            self._starts.append(start)
+            self._turns.append(heading)
+            self._displacements.append((x, y))
+            self._moves.append(moves)
+            dx, dy = rotate(*part.displacement(len(part)), heading)
+            start += len(part)
+            heading = (heading + part.turn(len(part))) % 4
+            x += dx
+            y += dy
+            moves += part.forward_moves(len(part))
+        self.length = start
+        self._tail_bounds = [None] * len(parts)
+        bounds = (x, x, y, y)
+        for index in range(len(parts) - 1, -1, -1):
+            self._tail_bounds[index] = bounds
+            bounds = merge_bounds(bounds, self._part_bounds(index, 0))
+
+    def _locate(self, step: int) -> int:
+        """Returns the index of the part running at the given step."""
+        return bisect_right(self._starts, step) - 1
+
+    def _part_bounds(self, index: int, start: int) -> tuple:
+        """Returns the bounding box of a part from the given step within it."""
+        dx, dy = self._displacements[index]
+        return rotate_bounds(self.parts[index].suffix_bounds(start), self._turns[index], dx, dy)
+
+    def __getitem__(self, step: int) -> str:
+        index = self._locate(step)
+        return self.parts[index][step - self._starts[index]]
+
+    def __str__(self):
+        return ''.join(str(part) for part in self.parts)
+
+    def turn(self, step: int) -> int:
+        if step >= self.length:
+            index = len(self.parts) - 1
+        else:
+            index = self._locate(step)
+        return (self._turns[index] + self.parts[index].turn(step - self._starts[index])) % 4
+
+    def displacement(self, step: int) -> tuple:
+        if step >= self.length:
+            index = len(self.parts) - 1
+        else:
+            index = self._locate(step)
+        x, y = self._displacements[index]
+        dx, dy = rotate(*self.parts[index].displacement(step - self._starts[index]), self._turns[index])
+        return x + dx, y + dy
+
+    def forward_moves(self, step: int) -> int:
+        if step >= self.length:
+            index = len(self.parts) - 1
+        else:
+            index = self._locate(step)
+        return self._moves[index] + self.parts[index].forward_moves(step - self._starts[index])
+
+    def suffix_bounds(self, step: int) -> tuple:
+        if step >= self.length:
+            x, y = self.displacement(self.length)
+            return x, x, y, y
+        index = self._locate(step)
+        return merge_bounds(self._part_bounds(index, step - self._starts[index]), self._tail_bounds[index])
+
+    def _command_runs(self):
+        for part in self.parts:
+            yield from part.runs()
@@ -0,0 +1,85 @@
+from ..localize.localize import localizations
+from .car import Car
+from .simulation import Simulation
+from .partition import interaction_components
+from .budget import RunBudget
+
+
+def causal_cone(simulation, names: list, horizon: int = None) -> list:
+    """
+    Returns the cars that can influence the given cars within a number of steps.
+
+    A car only influences another one by colliding with it, or by colliding with a car that
+    influences it. Within the horizon a car stays in the box of its path and within Manhattan
+    distance horizon of its start cell, so the cone is made of the interaction components of these
+    boxes holding a queried car.
+
+    Parameters:
+    -----------
+    simulation : Simulation
+        The simulation, before it runs.
+    names : list
+        The names of the queried cars.
+    horizon : int, optional
+        The number of steps of interest, defaults to the whole programs.
+
+    Returns:
+    --------
+    list
+        The indices of the cars of the cone, in order.
+
+    Raises:
+    -------
+    ValueError
+        If a queried car is not in the simulation.
+    """
+    for name in names:
+        if not simulation.has_car(name):
+            raise ValueError(localizations['unknown_car_error'].format(name=name))
+    queried = {index for index, car in enumerate(simulation.cars) if car.name in names}
+    cone = []
+    for component in interaction_components(simulation.field, simulation.cars, simulation.stopped_cars, horizon):
+        if queried.intersection(component):
+            cone.extend(component)
+    return sorted(cone + [index for index in queried if simulation.cars[index].name in simulation.stopped_cars])
+
+
+def run_query(simulation, names: list, horizon: int = None, engine=Simulation):
+    """
+    Simulates only the causal cone of the given cars, up to a number of steps.
+
+    The results of the queried cars, their positions, directions, collisions and boundary
+    collisions, are those of a full run limited to the horizon. The simulation itself is left as it is.
+
+    Parameters:
+    -----------
+    simulation : Simulation
+        The simulation, before it runs.
+    names : list
+        The names of the queried cars.
+    horizon : int, optional
+        The number of steps to simulate, defaults to the whole programs.
+    engine : type
+        The Simulation subclass simulating the cone.
+
+    Returns:
+    --------
+    Simulation
+        The simulation of the cars of the cone, after it has run.
+
+    Raises:
+    -------
+    ValueError
+        If a queried car is not in the simulation.
+    """
+    cone = engine(simulation.field)
+    for index in causal_cone(simulation, names, horizon):
+        original = simulation.cars[index]
+        car = Car(original.name, original.x, original.y, original.direction)
+        car.program = original.program
+        car.commands = original.commands
+        cone.add_car(car)
+        if original.name in simulation.stopped_cars:
+            cone.stopped_cars.add(original.name)
+    cone.run_simulation(display=False, budget=RunBudget(max_steps=horizon) if horizon is not None else None)
+    return cone
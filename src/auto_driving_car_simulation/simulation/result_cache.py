@@ -0,0 +1,325 @@
+import hashlib
+import json
+import os
+import threading
+from ..config.config import Config
+from .car import Car
+from .budget import STEP_LIMIT, RunBudget
+
+
+# Version of the key material and entry layout, changed whenever either changes.
+CACHE_VERSION = 3
+
+
+class ResultCache:
+    """
+    On-disk cache of simulation results, keyed by a hash of the canonicalized scenario.
+
+    The key covers the field size, the step limit and, for every car in order, its start cell,
+    heading, stopped state and canonical program. Car names are left out: results are stored by
+    car index and renamed on a hit, so scenarios differing only in names or in the spelling of
+    their programs share an entry. Car order is kept, since it decides how collisions are reported.
+    When no path reaches beyond the field no car can hit the boundary, so the field size is left
+    out and the start cells are taken from the corner of the box of the start cells: translated
+    scenarios share an entry, whose positions are stored from that corner and shifted back on a hit.
+    Programs of up to Config.RESULT_CACHE_EXPAND_COMMANDS commands are expanded, so ``4F`` and
+    ``FFFF`` are the same; longer ones keep their compact repeat syntax rather than being expanded.
+
+    Every entry is a JSON file named after its key. Entries are written to a temporary file and
+    renamed into place, hits refresh the modification time, and once the cache exceeds its size
+    the least recently used entries are deleted. All of these are single atomic file operations and
+    a vanished entry is a miss, so worker processes can share a cache directory without locking.
+
+    Attributes:
+    -----------
+    directory : str
+        The directory holding the entries.
+    max_bytes : int
+        The size of the entries above which the least recently used ones are evicted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = Config.RESULT_CACHE_MAX_BYTES):
+        """
+        Constructs the cache, creating its directory if needed.
+
+        Parameters:
+        -----------
+        directory : str
+            The directory holding the entries.
+        max_bytes : int
+            The size of the entries above which the least recently used ones are evicted.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(simulation, max_steps: int = None) -> str:
+        """
+        Returns the key of the results of a simulation.
+
+        Parameters:
+        -----------
+        simulation : Simulation
+            The simulation, before it runs.
+        max_steps : int, optional
+            The step limit of the run.
+
+        Returns:
+        --------
+        str
+            The hexadecimal SHA-256 of the canonicalized scenario.
+        """
+        origin = ResultCache.origin(simulation)
+        field = None if origin is not None else [simulation.field.width, simulation.field.height]
+        origin_x, origin_y = origin or (0, 0)
+        material = [CACHE_VERSION, field, max_steps,
+                    [[car.x - origin_x, car.y - origin_y, Car.DIRECTIONS.index(car.direction),
+                      car.name in simulation.stopped_cars, ResultCache.canonical_program(car.program)]
+                     for car in simulation.cars]]
+        return hashlib.sha256(json.dumps(material, separators=(',', ':')).encode()).hexdigest()
+
+    @staticmethod
+    def origin(simulation):
+        """
+        Returns the corner from which the cells of a simulation are keyed, or None if they are absolute.
+
+        Parameters:
+        -----------
+        simulation : Simulation
+            The simulation, before it runs.
+
+        Returns:
+        --------
+        tuple
+            The lowest x and y of the start cells if no active car's path leaves the field, else None.
+        """
+        width, height = simulation.field.width, simulation.field.height
+        for car in simulation.cars:
+            if car.name in simulation.stopped_cars:
+                continue
+            low_x, high_x, low_y, high_y = car.program.bounds(car.x, car.y, Car.DIRECTIONS.index(car.direction), 0)
+            if low_x < 0 or low_y < 0 or high_x >= width or high_y >= height:
+                return None
+        return (min((car.x for car in simulation.cars), default=0),
+                min((car.y for car in simulation.cars), default=0))
+
+    @staticmethod
+    def canonical_program(program) -> str:
+        """
+        Returns the canonical spelling of a program.
+
+        Parameters:
+        -----------
+        program : Program
+            The compiled program.
+
+        Returns:
+        --------
+        str
+            The expanded commands of a short program, the compact repeat syntax of a long one.
+        """
+        if len(program) <= Config.RESULT_CACHE_EXPAND_COMMANDS:
+            return ''.join(program[step] for step in range(len(program)))
+        return str(program)
+
+    @staticmethod
+    def cacheable(simulation, budget: RunBudget = None) -> bool:
+        """
+        Checks if the results of a run only depend on its scenario and step limit.
+
+        Runs with a time limit or a cancellation token may stop anywhere, and near misses, analytics
+        and digests are not stored.
+
+        Parameters:
+        -----------
+        simulation : Simulation
+            The simulation to run.
+        budget : RunBudget, optional
+            The budget of the run.
+
+        Returns:
+        --------
+        bool
+            True if the results of the run can be cached, False otherwise.
+        """
+        if budget is not None and (budget.max_seconds is not None or budget.token is not None):
+            return False
+        return simulation.near_miss is None and simulation.analytics is None and not simulation.track_digests
+
+    def _path(self, key: str) -> str:
+        """Returns the path of the entry of a key."""
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, simulation, max_steps: int = None) -> bool:
+        """
+        Restores the cached results of a simulation, if any.
+
+        Parameters:
+        -----------
+        simulation : Simulation
+            The simulation, before it runs.
+        max_steps : int, optional
+            The step limit of the run.
+
+        Returns:
+        --------
+        bool
+            True if the results were found and restored, False otherwise.
+        """
+        entry = self._read(self.key(simulation, max_steps))
+        if entry is None:
+            return False
+        self.restore(simulation, entry, self.origin(simulation) or (0, 0))
+        return True
+
+    def _read(self, key: str):
+        """Returns the entry of a key and marks it as used, or None if there is none."""
+        path = self._path(key)
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    @staticmethod
+    def restore(simulation, entry: dict, origin: tuple = (0, 0)):
+        """
+        Applies results stored by car index to a simulation that has not run.
+
+        Parameters:
+        -----------
+        simulation : Simulation
+            The simulation, before it runs.
+        entry : dict
+            The results, as returned by ``results``.
+        origin : tuple
+            The corner the stored positions are taken from.
+        """
+        cars = simulation.cars
+        origin_x, origin_y = origin
+        for car, (x, y, heading) in zip(cars, entry['cars']):
+            car.x, car.y, car.direction = x + origin_x, y + origin_y, Car.DIRECTIONS[heading]
+        simulation.stopped_cars = {cars[index].name for index in entry['stopped']}
+        simulation.collisions = {}
+        for step, indices, (x, y) in entry['collisions']:
+            simulation.collisions.setdefault(step, []).append(([cars[index].name for index in indices],
+                                                               (x + origin_x, y + origin_y)))
+        simulation.boundary_collisions = {cars[index].name: steps for index, steps in entry['boundary_collisions']}
+        simulation.interrupted = entry['interrupted']
+        simulation.metrics.start(0)
+        for name, value in entry['metrics'].items():
+            setattr(simulation.metrics, name, value)
+
+    def put(self, key: str, simulation, origin: tuple = (0, 0)):
+        """
+        Stores the results of a simulation that has run, then evicts entries if the cache is full.
+
+        Parameters:
+        -----------
+        key : str
+            The key of the simulation, computed before it ran.
+        simulation : Simulation
+            The simulation, after it has run.
+        origin : tuple
+            The corner to store the positions from, computed before it ran.
+        """
+        path = self._path(key)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, 'w') as file:
+            json.dump(self.results(simulation, origin), file, separators=(',', ':'))
+        os.replace(temporary, path)
+        self.evict()
+
+    @staticmethod
+    def results(simulation, origin: tuple = (0, 0)) -> dict:
+        """
+        Returns the results of a simulation that has run, by car index and JSON serializable.
+
+        Parameters:
+        -----------
+        simulation : Simulation
+            The simulation, after it has run.
+        origin : tuple
+            The corner to take the positions from.
+
+        Returns:
+        --------
+        dict
+            The final cars, stopped cars, collisions, boundary collisions, interruption and counters.
+        """
+        indices = {car.name: index for index, car in enumerate(simulation.cars)}
+        metrics = simulation.metrics
+        origin_x, origin_y = origin
+        return {
+            'cars': [[car.x - origin_x, car.y - origin_y, Car.DIRECTIONS.index(car.direction)]
+                     for car in simulation.cars],
+            'stopped': sorted(indices[name] for name in simulation.stopped_cars),
+            'collisions': [[step, [indices[name] for name in cars], [pos[0] - origin_x, pos[1] - origin_y]]
+                           for step, events in simulation.collisions.items() for cars, pos in events],
+            'boundary_collisions': [[indices[name], steps] for name, steps in simulation.boundary_collisions.items()],
+            'interrupted': simulation.interrupted,
+            'metrics': {name: getattr(metrics, name)
+                        for name in ('steps', 'active_cars', 'moves', 'turns', 'collisions', 'boundary_hits')},
+        }
+
+    def evict(self):
+        """
+        Deletes the least recently used entries until the cache fits in its size.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                try:
+                    status = entry.stat()
+                except OSError:
+                    continue
+                entries.append((status.st_mtime_ns, status.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def run(self, simulation, display: bool = True, budget: RunBudget = None) -> bool:
+        """
+        Runs a simulation, unless its results are cached, and caches the results of a complete run.
+
+        Parameters:
+        -----------
+        simulation : Simulation
+            The simulation to run.
+        display : bool
+            Whether to print the initial car positions and the final results.
+        budget : RunBudget, optional
+            The step and time limits, cancellation token and progress callback of the run.
+
+        Returns:
+        --------
+        bool
+            True if the results came from the cache, False if the simulation was run.
+        """
+        if not self.cacheable(simulation, budget):
+            simulation.run_simulation(display=display, budget=budget)
+            return False
+        max_steps = budget.max_steps if budget is not None else None
+        key = self.key(simulation, max_steps)
+        origin = self.origin(simulation) or (0, 0)
+        entry = self._read(key)
+        if entry is not None:
+            if display:
+                simulation.display_initial_car_positions()
+            self.restore(simulation, entry, origin)
+            if display:
+                simulation.display_final_results()
+            return True
+        simulation.run_simulation(display=display, budget=budget)
+        if simulation.interrupted in (None, STEP_LIMIT):
+            self.put(key, simulation, origin)
+        return False
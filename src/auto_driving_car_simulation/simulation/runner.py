@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+from .result_cache import ResultCache
+
+
+def run_in_threads(simulations: list, workers: int = None, display: bool = False, cache: ResultCache = None) -> list:
+    """
+    Runs independent simulations concurrently in a thread pool.
+
+    Simulations share no mutable state, so each one gives the same results as when run alone.
+    Compiled programs, loggers and localizations are shared read-only.
+
+    Parameters:
+    -----------
+    simulations : list
+        The simulations to run. Each one must be run by a single thread.
+    workers : int, optional
+        The number of threads, defaults to the ThreadPoolExecutor default.
+    display : bool
+        Whether each simulation prints its initial car positions and final results.
+    cache : ResultCache, optional
+        The cache consulted before running each simulation and filled with the results.
+
+    Returns:
+    --------
+    list
+        The simulations, in the given order, after they have run.
+    """
+    with ThreadPoolExecutor(workers) as executor:
+        if cache is None:
+            list(executor.map(lambda simulation: simulation.run_simulation(display=display), simulations))
+        else:
+            list(executor.map(lambda simulation: cache.run(simulation, display=display), simulations))
+    return simulations
@@ -0,0 +1,227 @@
+from ..localize.localize import localizations
+from ..config.config import Config
+from .field import Field
+from .car import Car
+from .program import Program
+from .simulation import Simulation
+
+
+class Scenario:
+    """
+    A field and the cars placed on it, read from or written to the batch text format.
+
+    The first non-empty line holds the field width and height, every following line one car
+    in ``name x y Direction [commands]`` format. Lines starting with '#' are ignored.
+
+    Attributes:
+    -----------
+    width : int
+        The width of the field.
+    height : int
+        The height of the field.
+    cars : list
+        The cars as (name, x, y, direction, commands) tuples.
+    """
+
+    def __init__(self, width: int, height: int, cars: list = None):
+        """
+        Constructs all the necessary attributes for the scenario object.
+
+        Parameters:
+        -----------
+        width : int
+            The width of the field.
+        height : int
+            The height of the field.
+        cars : list, optional
+            The cars as (name, x, y, direction, commands) tuples.
+        """
+        self.width = width
+        self.height = height
+        self.cars = cars if cars is not None else []
+
+    @staticmethod
+    def parse(lines):
+        """
+        Parses and validates a scenario from lines of text.
+
+        Parameters:
+        -----------
+        lines : iterable
+            The lines of the scenario.
+
+        Returns:
+        --------
+        Scenario
+            The parsed scenario.
+
+        Raises:
+        -------
+        ValueError
+            If a line is invalid, with the line number in the message.
+        """
+        scenario = None
+        names = set()
+        cells = set()
+        for number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                if scenario is None:
+                    scenario = Scenario(*Scenario.parse_dimensions(line))
+                    continue
+                car = Scenario.parse_car(line, scenario.width, scenario.height)
+                name, x, y = car[0], car[1], car[2]
+                if name in names:
+                    raise ValueError(localizations['duplicate_car_name_error'].format(name=name))
+                if (x, y) in cells:
+                    raise ValueError(localizations['initial_collides_error'].format(x=x, y=y))
+                names.add(name)
+                cells.add((x, y))
+                scenario.cars.append(car)
+            except ValueError as error:
+                raise ValueError(localizations['scenario_line_error'].format(line=number, error=error))
+        if scenario is None:
+            raise ValueError(localizations['empty_scenario_error'])
+        return scenario
+
+    @staticmethod
+    def parse_dimensions(line: str) -> tuple:
+        """
+        Parses the field width and height line.
+
+        Parameters:
+        -----------
+        line : str
+            The line in ``width height`` format.
+
+        Returns:
+        --------
+        tuple
+            The width and height of the field.
+
+        Raises:
+        -------
+        ValueError
+            If the width and height are not positive integers.
+        """
+        try:
+            width, height = map(int, line.split())
+        except ValueError:
+            raise ValueError(localizations['invalid_dimensions_error'])
+        if width <= 0 or height <= 0:
+            raise ValueError(localizations['invalid_dimensions_error'])
+        return width, height
+
+    @staticmethod
+    def parse_car(line: str, width: int, height: int) -> tuple:
+        """
+        Parses and validates a car line, with the same rules as the interactive prompt.
+
+        Parameters:
+        -----------
+        line : str
+            The line in ``name x y Direction [commands]`` format.
+        width : int
+            The width of the field.
+        height : int
+            The height of the field.
+
+        Returns:
+        --------
+        tuple
+            The (name, x, y, direction, commands) of the car.
+
+        Raises:
+        -------
+        ValueError
+            If the car is invalid.
+        """
+        fields = line.split()
+        if len(fields) not in (4, 5):
+            raise ValueError(localizations['invalid_scenario_line_error'])
+        name, x, y, direction = fields[:4]
+        commands = fields[4] if len(fields) == 5 else ''
+        try:
+            x, y = int(x), int(y)
+        except ValueError:
+            raise ValueError(localizations['invalid_coordinates_error'])
+        if x < 0 or y < 0:
+            raise ValueError(localizations['invalid_coordinates_error'])
+        if direction not in Config.CAR_DIRECTIONS:
+            raise ValueError(localizations['invalid_direction_error'])
+        if x >= width or y >= height:
+            raise ValueError(localizations['out_of_bounds_error'])
+        # Plain command strings are always valid; only the repeat syntax needs parsing.
+        if commands.strip('LRF'):
+            try:
+                Program.parse(commands)
+            except ValueError:
+                raise ValueError(localizations['invalid_command_error'])
+        return name, x, y, direction, commands
+
+    @staticmethod
+    def load(path: str):
+        """
+        Reads and validates a scenario file.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the scenario file.
+
+        Returns:
+        --------
+        Scenario
+            The parsed scenario.
+        """
+        with open(path, 'r') as file:
+            return Scenario.parse(file)
+
+    def lines(self):
+        """
+        Yields the scenario in the batch text format.
+
+        Returns:
+        --------
+        iterator
+            The lines of the scenario, without line endings.
+        """
+        yield f"{self.width} {self.height}"
+        for name, x, y, direction, commands in self.cars:
+            yield f"{name} {x} {y} {direction} {commands}".rstrip()
+
+    def save(self, path: str):
+        """
+        Writes the scenario to a file in the batch text format.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the scenario file.
+        """
+        with open(path, 'w') as file:
+            for line in self.lines():
+                file.write(line + '\n')
+
+    def build_simulation(self, engine=Simulation) -> Simulation:
+        """
+        Builds a simulation with the field and cars of the scenario.
+
+        Parameters:
+        -----------
+        engine : type
+            The Simulation class, or subclass, to build.
+
+        Returns:
+        --------
+        Simulation
+            The simulation ready to run.
+        """
+        simulation = engine(Field(self.width, self.height))
+        for name, x, y, direction, commands in self.cars:
+            car = Car(name, x, y, direction)
+            car.set_commands(commands)
+            simulation.add_car(car)
+        return simulation
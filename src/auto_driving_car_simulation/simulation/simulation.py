@@ -1,6 +1,10 @@
 from ..localize.localize import localizations
 from ..utils.logger import Logger
+from ..utils.metrics import SimulationMetrics
 from .car import Car
+from .occupancy import Occupancy
+from .digest import BOUNDARY, StateDigest, car_digest
+from .budget import STEP_LIMIT, RunBudget
 
 
 class Simulation:
@@ -13,12 +17,37 @@ class Simulation:
         The field on which the simulation runs.
     cars : list
         The list of cars in the simulation.
+    car_names : set
+        The names of the cars in the simulation.
+    start_positions : set
+        The (x, y) positions at which the cars in the simulation were added.
     stopped_cars : set
         The set of cars that have stopped.
     collisions : dict
-        The dictionary of collisions with step as key and (cars, position) as value.
+        The dictionary of collisions with step as key and the list of (cars, position) reported at
+        that step, in the order they were reported, as value.
     boundary_collisions : dict
         The dictionary of boundary collisions with car name as key and steps as value.
+    occupancy : Occupancy
+        The cell occupancy used for collision detection, chosen from the field size and car count.
+    moves : dict
+        The directed edges moved along in the current step, keyed by packed edge key.
+    swaps : list
+        The (cars, position) of the pairs of cars that swapped cells in the current step.
+    metrics : SimulationMetrics
+        The live counters of the current run.
+    track_digests : bool
+        Whether runs compute a rolling digest of the state after every step.
+    digest : StateDigest
+        The rolling state digest of the last run, or None if digests are not tracked.
+    interrupted : str
+        Why the budget of the last run interrupted it, see budget.py, or None if it ran to the end.
+    near_miss : NearMissDetector
+        The detector of cars coming close to each other, or None to skip the detection.
+    near_misses : dict
+        The near misses found by the detector, with step as key and the list of events as value.
+    analytics : TrafficAnalytics
+        The per-cell traffic counters accumulated by runs, or None to skip them.
     """
 
     def __init__(self, field):
@@ -32,9 +61,21 @@ class Simulation:
         """
         self.field = field
         self.cars = []
+        self.car_names = set()
+        self.start_positions = set()
         self.stopped_cars = set()
         self.collisions = {}
         self.boundary_collisions = {}
+        self.occupancy = None
+        self.moves = {}
+        self.swaps = []
+        self.metrics = SimulationMetrics()
+        self.track_digests = False
+        self.digest = None
+        self.interrupted = None
+        self.near_miss = None
+        self.near_misses = {}
+        self.analytics = None
         self.logger = Logger.setup_logger('Simulation')
 
     def add_car(self, car: Car):
@@ -47,25 +88,106 @@ class Simulation:
             The car to be added to the simulation.
         """
         self.cars.append(car)
+        self.car_names.add(car.name)
+        self.start_positions.add((car.x, car.y))
+
+    def has_car(self, name: str) -> bool:
+        """
+        Checks if a car with the given name has been added to the simulation.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the car.
+
+        Returns:
+        --------
+        bool
+            True if the name is taken, False otherwise.
+        """
+        return name in self.car_names
+
+    def is_position_taken(self, x: int, y: int) -> bool:
+        """
+        Checks if a car added to the simulation starts at the given position.
+
+        Parameters:
+        -----------
+        x : int
+            The x-coordinate to check.
+        y : int
+            The y-coordinate to check.
+
+        Returns:
+        --------
+        bool
+            True if the position is taken, False otherwise.
+        """
+        return (x, y) in self.start_positions
 
     def reset(self):
         """
         Resets the simulation by clearing all cars, stopped cars, collisions, and boundary collisions.
         """
         self.cars = []
+        self.car_names = set()
+        self.start_positions = set()
         self.stopped_cars = set()
         self.collisions = {}
         self.boundary_collisions = {}
+        self.occupancy = None
+        self.moves = {}
+        self.swaps = []
+        self.metrics.reset()
+        self.digest = None
+        self.interrupted = None
+        self.near_misses = {}
 
-    def run_simulation(self):
+    def run_simulation(self, display: bool = True, budget: RunBudget = None):
         """
         Runs the simulation by processing each step and checking for collisions.
+
+        Parameters:
+        -----------
+        display : bool
+            Whether to print the initial car positions and the final results.
+        budget : RunBudget, optional
+            The step and time limits, cancellation token and progress callback of the run.
         """
-        self.display_initial_car_positions()
-        max_steps = max((len(car.commands) for car in self.cars), default=0)
-        for step in range(max_steps):
+        if display:
+            self.display_initial_car_positions()
+        self.occupancy = Occupancy.for_field(self.field, len(self.cars))
+        self.metrics.start(len(self.cars) - len(self.stopped_cars))
+        self.digest = StateDigest(self.cars, self.stopped_cars) if self.track_digests else None
+        self.interrupted = None
+        self.near_misses = {}
+        if self.near_miss is not None:
+            self.near_miss.start(self.cars, self.stopped_cars)
+        if self.analytics is not None:
+            self.analytics.start(self.field, self.cars, self.stopped_cars)
+        max_steps = max((len(car.program) for car in self.cars), default=0)
+        step_count, check_interval = max_steps, 0
+        if budget is not None:
+            step_count, check_interval = budget.start(max_steps, len(self.cars))
+        # The digest and the analytics need every step, so the last car is not advanced in one go.
+        last_car_checked = self.digest is not None or self.analytics is not None
+        for step in range(step_count):
+            if check_interval and step % check_interval == 0:
+                self.interrupted = budget.check(step, len(self.cars) - len(self.stopped_cars))
+                if self.interrupted:
+                    break
             self.process_step(step)
-        self.display_final_results()
+            if not last_car_checked and len(self.stopped_cars) == len(self.cars) - 1:
+                if self.advance_last_active_car(step + 1, step_count):
+                    break
+                last_car_checked = True
+        if self.interrupted is None and step_count < max_steps and \
+                RunBudget.truncated(self.cars, self.stopped_cars, step_count):
+            self.interrupted = STEP_LIMIT
+        if self.digest is not None and self.interrupted is None:
+            self.digest.finish(max_steps)
+        if display:
+            self.display_final_results()
 
     def process_step(self, step: int):
         """
@@ -79,9 +201,52 @@ class Simulation:
         for car in self.cars:
             if car.name in self.stopped_cars:
                 continue
-            if step < len(car.commands):
+            if step < len(car.program):
                 self.execute_car_command(car, step)
         self.check_collisions(step)
+        if self.near_miss is not None:
+            events = self.near_miss.detect(step + 1)
+            if events:
+                self.near_misses[step + 1] = events
+        self.metrics.steps += 1
+        if self.digest is not None:
+            self.digest.end_step()
+
+    def advance_last_active_car(self, step: int, end: int = None) -> bool:
+        """
+        Applies the rest of the program of the only active car, up to a step, as a single offset.
+
+        With every other car stopped nothing can collide with it, so if its remaining path
+        stays within the field the remaining steps do not need to be simulated one by one. Its
+        moves and turns are counted from the program, and the steps up to the end step as simulated.
+
+        Parameters:
+        -----------
+        step : int
+            The first step that has not been simulated yet.
+        end : int, optional
+            The step to advance the car to, defaults to the end of its program.
+
+        Returns:
+        --------
+        bool
+            True if the car was advanced to the end step, False otherwise.
+        """
+        car = next(car for car in self.cars if car.name not in self.stopped_cars)
+        program = car.program
+        end = len(program) if end is None else end
+        last = min(end, len(program))
+        if step < last:
+            heading = Car.DIRECTIONS.index(car.direction)
+            if not program.fits(self.field, car.x, car.y, heading, step):
+                return False
+            car.x, car.y, heading = program.transform(car.x, car.y, heading, step, last)
+            car.direction = Car.DIRECTIONS[heading]
+            moves = program.forward_moves(last) - program.forward_moves(step)
+            self.metrics.moves += moves
+            self.metrics.turns += last - step - moves
+        self.metrics.steps = max(self.metrics.steps, end)
+        return True
 
     def execute_car_command(self, car: Car, step: int):
         """
@@ -94,12 +259,18 @@ class Simulation:
         step : int
             The current step of the simulation.
         """
-        command = car.commands[step]
+        command = car.program[step]
         previous_position = (car.x, car.y)
+        digest = self.digest
+        if digest is not None:
+            index = digest.indices[car.name]
+            digest.change(-car_digest(index, car.x, car.y, Car.DIRECTIONS.index(car.direction)))
         if command == 'L':
             car.turn_left()
+            self.metrics.turns += 1
         elif command == 'R':
             car.turn_right()
+            self.metrics.turns += 1
         elif command == 'F':
             car.move_forward(self.field)
             if (car.x, car.y) == previous_position:
@@ -108,30 +279,74 @@ class Simulation:
                 else:
                     self.boundary_collisions[car.name] = [step + 1]
                 self.stopped_cars.add(car.name)
+                self.metrics.boundary_hits += 1
+                self.metrics.active_cars = len(self.cars) - len(self.stopped_cars)
+                if digest is not None:
+                    digest.stop(index)
+                    digest.event(step + 1, BOUNDARY, index, car.x, car.y)
+                if self.near_miss is not None:
+                    self.near_miss.remove(car.name)
+            else:
+                self.record_move(car, previous_position)
+                self.metrics.moves += 1
+                if self.analytics is not None:
+                    self.analytics.move(previous_position, car.x, car.y, Car.DIRECTIONS.index(car.direction))
+                if self.near_miss is not None:
+                    self.near_miss.move(car.name, car.x, car.y)
+        if digest is not None:
+            digest.change(car_digest(index, car.x, car.y, Car.DIRECTIONS.index(car.direction)))
+
+    def record_move(self, car: Car, previous_position: tuple):
+        """
+        Records the directed edge a car moved along and detects a car that moved along it the opposite way.
+
+        Edges are keyed by the packed key of the cell left times four plus the heading, so the
+        reverse edge is found with a single lookup.
+
+        Parameters:
+        -----------
+        car : Car
+            The car that moved.
+        previous_position : tuple
+            The position of the car before the move.
+        """
+        width = self.field.width
+        heading = Car.DIRECTIONS.index(car.direction)
+        edge = (previous_position[1] * width + previous_position[0]) * 4 + heading
+        reverse = (car.y * width + car.x) * 4 + (heading + 2) % 4
+        other = self.moves.get(reverse)
+        if other is not None:
+            self.swaps.append(([other, car.name], previous_position))
+        self.moves[edge] = car.name
 
     def check_collisions(self, step: int):
         """
-        Checks for collisions between cars at the current step.
+        Checks for collisions between cars at the current step, both cars ending in the same cell
+        and pairs of cars that swapped cells head-on.
 
         Parameters:
         -----------
         step : int
             The current step of the simulation.
         """
-        positions = {}
+        if self.occupancy is None:
+            self.occupancy = Occupancy.for_field(self.field, len(self.cars))
+        occupancy = self.occupancy
+        occupancy.clear()
         for car in self.cars:
             if car.name not in self.stopped_cars:
-                position = (car.x, car.y)
-                if position in positions:
-                    positions[position].append(car.name)
-                else:
-                    positions[position] = [car.name]
+                occupancy.place(car.x, car.y, car.name)
+
+        groups = [(key, cars) for key, cars in occupancy.groups() if len(cars) > 1]
 
-        for position, cars in positions.items():
-            if len(cars) > 1:
-                self.report_collision(cars, position, step)
+        for cars, position in self.swaps:
+            self.report_collision(cars, position, step, swap=True)
+        self.moves = {}
+        self.swaps = []
+        for key, cars in groups:
+            self.report_collision(cars, occupancy.position(key), step)
 
-    def report_collision(self, cars: list, pos: tuple, step: int):
+    def report_collision(self, cars: list, pos: tuple, step: int, swap: bool = False):
         """
         Reports a collision between two cars.
 
@@ -143,10 +358,22 @@ class Simulation:
             The position of the collision.
         step : int
             The step at which the collision occurred.
+        swap : bool
+            Whether the cars swapped cells head-on rather than ending in the same cell.
         """
-        self.logger.debug("Collision: %s at %s at step %d", ', '.join(cars), pos, step + 1)
-        self.collisions[step + 1] = (cars, pos)
+        self.logger.debug("Collision%s: %s at %s at step %d", ' (swap)' if swap else '', ', '.join(cars), pos,
+                          step + 1)
+        if self.digest is not None:
+            self.digest.collision(cars, pos, step + 1, swap, self.stopped_cars)
+        self.collisions.setdefault(step + 1, []).append((cars, pos))
+        if self.analytics is not None:
+            self.analytics.collision(pos)
         self.stopped_cars.update(cars)
+        if self.near_miss is not None:
+            for name in cars:
+                self.near_miss.remove(name)
+        self.metrics.collisions += 1
+        self.metrics.active_cars = len(self.cars) - len(self.stopped_cars)
 
     def display_initial_car_positions(self):
         """
@@ -154,22 +381,48 @@ class Simulation:
         """
         print(localizations['current_car_list'])
         for car in self.cars:
-            print(f"- {car.name}, ({car.x}, {car.y}), {car.direction},  {car.commands}")
+            self.display_car(car)
 
-    def display_final_results(self):
+    @staticmethod
+    def display_car(car: Car):
+        """
+        Displays the position, direction and commands of a car.
+
+        Parameters:
+        -----------
+        car : Car
+            The car to display.
+        """
+        print(f"- {car.name}, ({car.x}, {car.y}), {car.direction},  {car.commands}")
+
+    def display_final_results(self, names: set = None):
         """
         Displays the final results of the simulation, including collisions and final positions of cars.
+
+        Parameters:
+        -----------
+        names : set, optional
+            The names of the cars to display the results of, defaults to every car.
         """
         print(localizations['simulation_results'])
+        if self.interrupted:
+            print(localizations['simulation_interrupted'].format(
+                step=self.metrics.steps, reason=localizations[f'interrupted_{self.interrupted}']))
 
         collision_names = set()
-        for step, (cars, pos) in self.collisions.items():
-            for car in cars:
-                print(localizations['collides_with_car'].format(step=step, car1=car,
-                                                                car2=', '.join(c for c in cars if c != car), pos=pos))
-                collision_names.add(car)
+        for step, events in self.collisions.items():
+            for cars, pos in events:
+                for car in cars:
+                    collision_names.add(car)
+                    if names is not None and car not in names:
+                        continue
+                    print(localizations['collides_with_car'].format(step=step, car1=car,
+                                                                    car2=', '.join(c for c in cars if c != car),
+                                                                    pos=pos))
 
         for car in self.cars:
+            if names is not None and car.name not in names:
+                continue
             if car.name not in collision_names:
                 if car.name in self.boundary_collisions:
                     steps = self.boundary_collisions[car.name]
@@ -178,3 +431,10 @@ class Simulation:
                                                                         step=', '.join(str(c) for c in steps)))
                 else:
                     print(f"- {car.name} , ({car.x}, {car.y}), {car.direction}")
+
+        for step, events in self.near_misses.items():
+            for car1, pos1, car2, pos2, distance in events:
+                if names is not None and car1 not in names and car2 not in names:
+                    continue
+                print(localizations['near_miss_report'].format(step=step, car1=car1, pos1=pos1, car2=car2, pos2=pos2,
+                                                               distance=distance))
@@ -0,0 +1,222 @@
+from ..config.config import Config
+from .car import Car
+from .program import OFFSETS
+from .simulation import Simulation
+from .budget import STEP_LIMIT, RunBudget
+
+
+def meeting_time(first: tuple, second: tuple):
+    """
+    Returns twice the earliest time two space-time segments are in the same place, or None if they never are.
+
+    Between steps a moving car is taken to slide from cell to cell, so two cars meet at a whole
+    step when they end the step in the same cell and half-way through a step only when they
+    cross the same edge in opposite directions, which is a swap.
+
+    Parameters:
+    -----------
+    first : tuple
+        The (start, end, x, y, dx, dy, ...) of a segment, the car being at (x, y) at the start
+        step and moving by (dx, dy) every step up to the end step.
+    second : tuple
+        The other segment, in the same format.
+
+    Returns:
+    --------
+    int
+        Twice the time of the meeting, after the step 0 and within both segments, or None.
+    """
+    start, end = max(first[0], second[0]), min(first[1], second[1])
+    if start > end:
+        return None
+    time = None
+    for position, offset in ((2, 4), (3, 5)):
+        # The gap between the cars along an axis is gap + speed * t.
+        gap = (first[position] - first[offset] * first[0]) - (second[position] - second[offset] * second[0])
+        speed = first[offset] - second[offset]
+        if speed == 0:
+            if gap:
+                return None
+        elif time is None:
+            time = -2 * gap // speed
+        elif time != -2 * gap // speed:
+            return None
+    if time is None:
+        # Cars that keep together meet at the first whole step of both segments, at step 1 when starting together.
+        time = max(2 * start, 2)
+    if time <= 0 or not 2 * start <= time <= 2 * end:
+        return None
+    return time
+
+
+class SweepSimulation(Simulation):
+    """
+    Simulation of the cars as space-time segments, straight runs of moves or turns in place.
+
+    Programs are split into their runs of forward moves and of turns without being expanded, and
+    every run becomes a segment along which the car moves in a straight line, or stays, with a car
+    that finished its program staying in its last cell up to the last step. Boundary hits are found
+    from the room left ahead of a run, cutting the segment where the car stops. Segments are swept
+    by their start step, each one only compared with the open segments of the same tiles of
+    Config.SWEEP_TILE_CELLS cells, and the earliest meeting of every pair of cars is solved from
+    their linear motion. Meetings are then replayed in time: a car stopped by a collision or the
+    boundary is cut from that step, so the later meetings it takes part in are dropped, and the
+    meetings that remain are reported in the order of Simulation.check_collisions. The work grows
+    with the number of segments and of pairs of cars meeting rather than with cars times steps.
+    Near misses, analytics, digests and time or cancellation budgets need the whole fleet step by
+    step, so with any of them the run falls back to the step loop of Simulation.
+    """
+
+    def run_simulation(self, display: bool = True, budget: RunBudget = None):
+        """
+        Runs the simulation by sweeping the space-time segments of the cars.
+
+        Parameters:
+        -----------
+        display : bool
+            Whether to print the initial car positions and the final results.
+        budget : RunBudget, optional
+            The step and time limits, cancellation token and progress callback of the run.
+        """
+        if self.near_miss is not None or self.analytics is not None or self.track_digests or (
+                budget is not None and (budget.max_seconds is not None or budget.token is not None or
+                                        budget.progress is not None)):
+            return Simulation.run_simulation(self, display, budget)
+        if display:
+            self.display_initial_car_positions()
+        self.metrics.start(len(self.cars) - len(self.stopped_cars))
+        self.digest = None
+        self.interrupted = None
+        self.near_misses = {}
+        max_steps = max((len(car.program) for car in self.cars), default=0)
+        step_count = max_steps
+        if budget is not None:
+            step_count, _ = budget.start(max_steps, len(self.cars))
+
+        active = [index for index, car in enumerate(self.cars) if car.name not in self.stopped_cars]
+        # The last step at which each car is on the field, cut when it stops.
+        ends = [step_count] * len(self.cars)
+        segments = []
+        events = []
+        for index in active:
+            boundary_step = self._add_segments(index, step_count, segments)
+            if boundary_step is not None:
+                events.append((2 * boundary_step + 1, 0, index, index))
+        for (first, second), time in self._meetings(segments).items():
+            events.append((time, 1 if time % 2 else 2, first, second))
+        events.sort()
+
+        position = 0
+        while position < len(events):
+            # Boundary hits and swaps of a step are at twice the step plus one, cars sharing a cell after it.
+            step = (events[position][0] - 1) // 2
+            swaps, cells = [], {}
+            while position < len(events) and (events[position][0] - 1) // 2 == step:
+                _, kind, first, second = events[position]
+                position += 1
+                if ends[first] <= step or ends[second] <= step:
+                    continue
+                if kind == 0:
+                    self._stop_at_boundary(first, step)
+                    ends[first] = step
+                elif kind == 1:
+                    swaps.append((first, second))
+                else:
+                    cells.setdefault(self._position(first, step + 1), set()).update((first, second))
+            collisions = [([first, second], self._position(second, step))
+                          for first, second in sorted(swaps, key=lambda pair: pair[1])]
+            collisions += [(sorted(cars), cell) for cell, cars in sorted(cells.items(), key=lambda item: min(item[1]))]
+            for cars, cell in collisions:
+                self.report_collision([self.cars[index].name for index in cars], cell, step)
+                for index in cars:
+                    ends[index] = step + 1
+
+        for start, end, _, _, dx, dy, index, turning in segments:
+            steps = max(0, min(end, ends[index]) - start)
+            if turning:
+                self.metrics.turns += steps
+            elif dx or dy:
+                self.metrics.moves += steps
+        for index in active:
+            car = self.cars[index]
+            car.x, car.y, heading = car.program.transform(car.x, car.y, Car.DIRECTIONS.index(car.direction), 0,
+                                                          min(ends[index], len(car.program)))
+            car.direction = Car.DIRECTIONS[heading]
+        self.metrics.steps = step_count
+        if step_count < max_steps and RunBudget.truncated(self.cars, self.stopped_cars, step_count):
+            self.interrupted = STEP_LIMIT
+        if display:
+            self.display_final_results()
+
+    def _add_segments(self, index: int, step_count: int, segments: list):
+        """
+        Appends the segments of a car up to a step and returns the step at which it hits the boundary, or None.
+
+        Segments are (start, end, x, y, dx, dy, index, turning) tuples, turning telling the runs of
+        turns from the stay of a car that finished its program.
+        """
+        car = self.cars[index]
+        width, height = self.field.width, self.field.height
+        x, y, heading = car.x, car.y, Car.DIRECTIONS.index(car.direction)
+        step = 0
+        for length, turn in car.program.runs():
+            if step >= step_count:
+                return None
+            length = min(length, step_count - step)
+            if turn is not None:
+                segments.append((step, step + length, x, y, 0, 0, index, True))
+                heading = (heading + turn) % 4
+            else:
+                dx, dy = OFFSETS[heading]
+                room = (width - 1 - x if dx > 0 else x if dx < 0 else height - 1 - y if dy > 0 else y)
+                if length > room:
+                    if room:
+                        segments.append((step, step + room, x, y, dx, dy, index, False))
+                    return step + room
+                segments.append((step, step + length, x, y, dx, dy, index, False))
+                x, y = x + dx * length, y + dy * length
+            step += length
+        if step < step_count:
+            segments.append((step, step_count, x, y, 0, 0, index, False))
+        return None
+
+    @staticmethod
+    def _meetings(segments: list) -> dict:
+        """Returns twice the step of the earliest meeting of every pair of cars that meet, by pair of car indices."""
+        tile = Config.SWEEP_TILE_CELLS
+        tiles = {}
+        meetings = {}
+        segments.sort()
+        for segment in segments:
+            start, end, x, y, dx, dy, index, _ = segment
+            last_x, last_y = x + dx * (end - start), y + dy * (end - start)
+            for tile_x in range(min(x, last_x) // tile, max(x, last_x) // tile + 1):
+                for tile_y in range(min(y, last_y) // tile, max(y, last_y) // tile + 1):
+                    bucket = tiles.setdefault((tile_x, tile_y), [])
+                    # Segments are swept by start step, so a segment ended before this one is closed for good.
+                    bucket[:] = [other for other in bucket if other[1] >= start]
+                    for other in bucket:
+                        if other[6] == index:
+                            continue
+                        time = meeting_time(segment, other)
+                        if time is not None:
+                            pair = (other[6], index) if other[6] < index else (index, other[6])
+                            if time < meetings.get(pair, time + 1):
+                                meetings[pair] = time
+                    bucket.append(segment)
+        return meetings
+
+    def _position(self, index: int, step: int) -> tuple:
+        """Returns the cell of a car after a number of steps, before the run updated it."""
+        car = self.cars[index]
+        x, y, _ = car.program.transform(car.x, car.y, Car.DIRECTIONS.index(car.direction), 0,
+                                        min(step, len(car.program)))
+        return x, y
+
+    def _stop_at_boundary(self, index: int, step: int):
+        """Records a car stopped by the field boundary at a step."""
+        name = self.cars[index].name
+        self.boundary_collisions.setdefault(name, []).append(step + 1)
+        self.stopped_cars.add(name)
+        self.metrics.boundary_hits += 1
+        self.metrics.active_cars = len(self.cars) - len(self.stopped_cars)
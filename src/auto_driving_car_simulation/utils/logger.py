@@ -1,4 +1,5 @@
 import logging
+import threading
 from ..config.config import Config
 
 
@@ -7,11 +8,16 @@ class Logger:
     Class to handle logging setup and configuration.
     """
 
+    _lock = threading.Lock()
+
     @staticmethod
     def setup_logger(name: str):
         """
         Set up the logger with the specified name.
 
+        The handler is attached only the first time a name is set up, so loggers shared by
+        simulations running concurrently are never mutated afterwards.
+
         Args:
             name (str): Name of the logger.
 
@@ -19,9 +25,10 @@ class Logger:
             logger (logging.Logger): Configured logger instance.
         """
         logger = logging.getLogger(name)
-        handler = logging.StreamHandler()
-        formatter = Config.LOGGING_FORMAT
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        logger.setLevel(Config.LOGGING_LEVEL)
+        with Logger._lock:
+            if not logger.handlers:
+                handler = logging.StreamHandler()
+                handler.setFormatter(logging.Formatter(Config.LOGGING_FORMAT))
+                logger.addHandler(handler)
+                logger.setLevel(Config.LOGGING_LEVEL)
         return logger
@@ -0,0 +1,158 @@
+import logging
+import sys
+import tracemalloc
+import types
+from array import array
+from contextlib import contextmanager
+from ..localize.localize import localizations
+
+
+# Objects that belong to the interpreter rather than to a simulation.
+SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def deep_size(obj, seen: set) -> int:
+    """
+    Returns the size in bytes of an object and everything it references that was not seen yet.
+
+    Loggers and handlers are counted shallowly, since they reference the global logging state.
+
+    Parameters:
+    -----------
+    obj : object
+        The object to measure.
+    seen : set
+        The ids of the objects already counted, updated in place.
+
+    Returns:
+    --------
+    int
+        The size in bytes.
+    """
+    if id(obj) in seen or isinstance(obj, SKIPPED_TYPES):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool, array)) or obj is None:
+        return size
+    if isinstance(obj, (logging.Logger, logging.Handler)):
+        size += sys.getsizeof(obj.__dict__)
+        for handler in getattr(obj, 'handlers', ()):
+            if id(handler) not in seen:
+                seen.add(id(handler))
+                size += sys.getsizeof(handler) + sys.getsizeof(handler.__dict__)
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_size(item, seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        size += deep_size(obj.__dict__, seen)
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if hasattr(obj, name):
+                size += deep_size(getattr(obj, name), seen)
+    return size
+
+
+class MemoryReport:
+    """
+    Collects memory usage by simulation phase with tracemalloc, and by structure of a simulation.
+
+    Attributes:
+    -----------
+    phases : list
+        The (name, current bytes, peak bytes) of every measured phase.
+    structures : dict
+        The bytes used by each structure of the measured simulation.
+    car_count : int
+        The number of cars in the measured simulation.
+    command_count : int
+        The total number of commands of the cars in the measured simulation.
+    """
+
+    def __init__(self):
+        """
+        Constructs an empty report.
+        """
+        self.phases = []
+        self.structures = {}
+        self.car_count = 0
+        self.command_count = 0
+        self._started = False
+
+    def start(self):
+        """
+        Starts tracing memory allocations, unless they are already traced.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+
+    def stop(self):
+        """
+        Stops tracing memory allocations if this report started it.
+        """
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Measures the memory in use at the end of a phase and its peak during the phase.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the phase.
+        """
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        yield
+        current, peak = tracemalloc.get_traced_memory()
+        self.phases.append((name, current, peak))
+
+    def measure(self, simulation):
+        """
+        Measures the bytes used by each structure of a simulation.
+
+        Objects shared by several cars, such as compiled programs and loggers, are counted once
+        under the first structure that references them.
+
+        Parameters:
+        -----------
+        simulation : Simulation
+            The simulation to measure.
+        """
+        seen = set()
+        loggers = [simulation.logger] + [car.logger for car in simulation.cars]
+        programs = [car.program for car in simulation.cars]
+        self.structures = {
+            'loggers': sum(deep_size(logger, seen) for logger in loggers),
+            'commands': sum(deep_size(car.commands, seen) + deep_size(program, seen)
+                            for car, program in zip(simulation.cars, programs)),
+            'cars': deep_size(simulation.cars, seen),
+            'stopped_cars': deep_size(simulation.stopped_cars, seen),
+            'collisions': deep_size(simulation.collisions, seen),
+            'boundary_collisions': deep_size(simulation.boundary_collisions, seen),
+            'occupancy': deep_size(simulation.occupancy, seen),
+        }
+        self.car_count = len(simulation.cars)
+        self.command_count = sum(len(program) for program in programs)
+
+    def display(self):
+        """
+        Displays the report.
+        """
+        print(localizations['memory_report_title'])
+        for name, current, peak in self.phases:
+            print(localizations['memory_report_phase'].format(phase=name, current=current, peak=peak))
+        for name, size in self.structures.items():
+            print(localizations['memory_report_structure'].format(name=name, size=size))
+        if self.car_count:
+            per_car = (self.structures['cars'] + self.structures['commands']) / self.car_count
+            print(localizations['memory_report_per_car'].format(size=per_car))
+        if self.command_count:
+            per_command = self.structures['commands'] / self.command_count
+            print(localizations['memory_report_per_command'].format(size=per_command))
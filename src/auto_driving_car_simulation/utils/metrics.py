@@ -0,0 +1,221 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ..config.config import Config
+
+
+# Content type of the OpenMetrics text exposition format.
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+class SimulationMetrics:
+    """
+    Live counters of a running simulation.
+
+    Counters are plain integers updated in place by the simulation, so keeping them costs a few
+    attribute increments per step. They can be read from another thread while the simulation runs.
+    Every engine gives the counters of Simulation, including for a car advanced in one go.
+
+    Attributes:
+    -----------
+    steps : int
+        The number of steps simulated.
+    active_cars : int
+        The number of cars that have not stopped.
+    moves : int
+        The number of forward moves.
+    turns : int
+        The number of left and right turns.
+    collisions : int
+        The number of collisions reported, including head-on swaps.
+    boundary_hits : int
+        The number of moves stopped by the field boundary.
+    started : float
+        The time.monotonic() at which the run started, or None before it started.
+    """
+
+    __slots__ = ('steps', 'active_cars', 'moves', 'turns', 'collisions', 'boundary_hits', 'started')
+
+    def __init__(self):
+        """
+        Constructs zeroed counters.
+        """
+        self.reset()
+
+    def reset(self):
+        """
+        Zeroes the counters.
+        """
+        self.steps = 0
+        self.active_cars = 0
+        self.moves = 0
+        self.turns = 0
+        self.collisions = 0
+        self.boundary_hits = 0
+        self.started = None
+
+    def start(self, car_count: int):
+        """
+        Zeroes the counters and starts the clock of a run.
+
+        Parameters:
+        -----------
+        car_count : int
+            The number of cars of the run.
+        """
+        self.reset()
+        self.active_cars = car_count
+        self.started = time.monotonic()
+
+    @property
+    def steps_per_second(self) -> float:
+        """The mean number of steps simulated per second since the run started."""
+        if self.started is None:
+            return 0.0
+        elapsed = time.monotonic() - self.started
+        return self.steps / elapsed if elapsed > 0 else 0.0
+
+    def to_openmetrics(self, prefix: str = 'simulation') -> str:
+        """
+        Returns the counters in the OpenMetrics text format.
+
+        Parameters:
+        -----------
+        prefix : str
+            The prefix of the metric names.
+
+        Returns:
+        --------
+        str
+            The exposition, ending with the ``# EOF`` marker.
+        """
+        samples = (
+            ('steps', 'counter', 'Steps simulated.', self.steps),
+            ('active_cars', 'gauge', 'Cars that have not stopped.', self.active_cars),
+            ('moves', 'counter', 'Forward moves.', self.moves),
+            ('turns', 'counter', 'Left and right turns.', self.turns),
+            ('collisions', 'counter', 'Collisions reported.', self.collisions),
+            ('boundary_hits', 'counter', 'Moves stopped by the field boundary.', self.boundary_hits),
+            ('steps_per_second', 'gauge', 'Mean steps simulated per second.', round(self.steps_per_second, 3)),
+        )
+        lines = []
+        for name, kind, help_text, value in samples:
+            metric = f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"{metric}{'_total' if kind == 'counter' else ''} {value}")
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsExporter:
+    """
+    Publishes the metrics of a simulation while it runs, to a file rewritten periodically,
+    to an HTTP endpoint on localhost, or both.
+
+    Use it as a context manager around the run; the file is written one last time on exit.
+
+    Attributes:
+    -----------
+    metrics : SimulationMetrics
+        The metrics to publish.
+    path : str
+        The file the metrics are written to, or None.
+    port : int
+        The localhost port serving the metrics, or None. Port 0 picks a free port.
+    interval : float
+        The number of seconds between writes of the file.
+    """
+
+    def __init__(self, metrics: SimulationMetrics, path: str = None, port: int = None,
+                 interval: float = Config.METRICS_INTERVAL):
+        """
+        Constructs all the necessary attributes for the exporter object.
+
+        Parameters:
+        -----------
+        metrics : SimulationMetrics
+            The metrics to publish.
+        path : str, optional
+            The file the metrics are written to.
+        port : int, optional
+            The localhost port serving the metrics.
+        interval : float
+            The number of seconds between writes of the file.
+        """
+        self.metrics = metrics
+        self.path = path
+        self.port = port
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._threads = []
+        self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """
+        Starts the writer thread and the HTTP server.
+        """
+        self._stopped.clear()
+        if self.port is not None:
+            self._server = ThreadingHTTPServer(('127.0.0.1', self.port), self._handler())
+            self.port = self._server.server_address[1]
+            self._threads.append(threading.Thread(target=self._server.serve_forever, daemon=True))
+        if self.path is not None:
+            self._threads.append(threading.Thread(target=self._write_periodically, daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Stops the writer thread and the HTTP server, then writes the file a last time.
+        """
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.path is not None:
+            self.write()
+
+    def write(self):
+        """
+        Writes the metrics to the file, replacing it atomically so readers never see a partial exposition.
+        """
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as file:
+            file.write(self.metrics.to_openmetrics())
+        os.replace(temporary, self.path)
+
+    def _write_periodically(self):
+        """Writes the file every interval until the exporter is stopped."""
+        while not self._stopped.wait(self.interval):
+            self.write()
+
+    def _handler(self):
+        """Returns the request handler class serving the metrics."""
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.to_openmetrics().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -29,9 +29,9 @@ class TestMultipleCarCollision(unittest.TestCase):
 
         # Step 4: Verify the collisions
         self.assertIn(1, simulation.collisions)
-        self.assertEqual(simulation.collisions[1][1], (5, 5))
-        self.assertIn("Car2", simulation.collisions[1][0])
-        self.assertIn("Car3", simulation.collisions[1][0])
+        self.assertEqual(simulation.collisions[1][-1][1], (5, 5))
+        self.assertIn("Car2", simulation.collisions[1][-1][0])
+        self.assertIn("Car3", simulation.collisions[1][-1][0])
 
         # Verify final positions and directions of cars
         self.assertEqual((car1.x, car1.y, car1.direction), (5, 6, 'N'))
@@ -24,9 +24,9 @@ class TestEndToEndSimulation(unittest.TestCase):
 
         # Step 4: Verify the collision
         self.assertIn(1, simulation.collisions)
-        self.assertEqual(simulation.collisions[1][1], (0, 1))
-        self.assertIn("Car1", simulation.collisions[1][0])
-        self.assertIn("Car2", simulation.collisions[1][0])
+        self.assertEqual(simulation.collisions[1][0][1], (0, 1))
+        self.assertIn("Car1", simulation.collisions[1][0][0])
+        self.assertIn("Car2", simulation.collisions[1][0][0])
 
 
 if __name__ == '__main__':
@@ -54,7 +54,7 @@ class TestSimulation(unittest.TestCase):
         simulation.add_car(car1)
         simulation.add_car(car2)
         simulation.run_simulation()
-        self.assertIn((1, 4), [pos for _, pos in simulation.collisions.values()])
+        self.assertIn((1, 4), [pos for events in simulation.collisions.values() for _, pos in events])
 
     def test_boundary_collision(self):
         field = Field(5, 5)
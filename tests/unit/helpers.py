@@ -0,0 +1,95 @@
+import random
+from src.auto_driving_car_simulation.simulation.car import Car
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+
+
+def random_scenario(seed, size=(2, 9), cars=(1, 15), length=30, same_length=False):
+    """
+    Returns a random scenario of cars with programs of turns and forward moves.
+
+    Parameters:
+    -----------
+    seed : int
+        The seed of the random scenario.
+    size : tuple
+        The smallest and largest width and height of the field.
+    cars : tuple
+        The smallest and largest number of cars, at most one per cell.
+    length : int
+        The largest program length.
+    same_length : bool
+        Whether every car has a program of the same length, drawn from 1 to length.
+    """
+    rng = random.Random(seed)
+    width, height = rng.randint(*size), rng.randint(*size)
+    fixed = rng.randint(1, length) if same_length else None
+    fleet = []
+    for index, cell in enumerate(rng.sample(range(width * height), rng.randint(cars[0], min(cars[1], width * height)))):
+        commands = "".join(rng.choice("LRFFF") for _ in range(fixed if same_length else rng.randint(0, length)))
+        fleet.append((f"Car{index}", cell % width, cell // width, rng.choice("NESW"), commands))
+    return Scenario(width, height, fleet)
+
+
+def sparse_scenario(seed, size=60, cars=60, length=12):
+    """
+    Returns a random scenario of a fixed number of cars spread over a large square field.
+
+    Parameters:
+    -----------
+    seed : int
+        The seed of the random scenario.
+    size : int
+        The width and height of the field.
+    cars : int
+        The number of cars.
+    length : int
+        The largest program length.
+    """
+    rng = random.Random(seed)
+    fleet = []
+    for index, cell in enumerate(rng.sample(range(size * size), cars)):
+        commands = "".join(rng.choice("LRFFF") for _ in range(rng.randint(0, length)))
+        fleet.append((f"Car{index}", cell % size, cell // size, rng.choice("NESW"), commands))
+    return Scenario(size, size, fleet)
+
+
+def build(simulation, cars):
+    """
+    Adds cars with their commands to a simulation and returns it.
+
+    Parameters:
+    -----------
+    simulation : Simulation
+        The simulation to add the cars to.
+    cars : list
+        The (name, x, y, direction, commands) of every car.
+    """
+    for name, x, y, direction, commands in cars:
+        car = Car(name, x, y, direction)
+        car.set_commands(commands)
+        simulation.add_car(car)
+    return simulation
+
+
+def outcome(simulation, interrupted=True, metrics=True):
+    """
+    Returns the results of a simulation that has run, to compare runs of engines.
+
+    Parameters:
+    -----------
+    simulation : Simulation
+        The simulation, after it has run.
+    interrupted : bool
+        Whether to include why the run was interrupted.
+    metrics : bool
+        Whether to include the counters of the run.
+    """
+    results = ([(car.name, car.x, car.y, car.direction) for car in simulation.cars], simulation.collisions,
+               simulation.boundary_collisions, simulation.stopped_cars)
+    if interrupted:
+        results += (simulation.interrupted,)
+    if metrics:
+        counters = simulation.metrics
+        results += ((counters.steps, counters.active_cars, counters.moves, counters.turns, counters.collisions,
+                     counters.boundary_hits),)
+    return results
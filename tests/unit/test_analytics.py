@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import pytest
+from src.auto_driving_car_simulation.simulation.analytics import TrafficAnalytics
+from src.auto_driving_car_simulation.simulation.engines import ENGINES
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from src.auto_driving_car_simulation.main import cli
+from helpers import random_scenario
+
+
+def analyse(scenario, engine):
+    simulation = scenario.build_simulation(engine)
+    simulation.analytics = TrafficAnalytics()
+    simulation.run_simulation(display=False)
+    return simulation.analytics
+
+
+class TestTrafficAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        self.scenario = Scenario(5, 5, [("A", 0, 0, 'N', "FFRFF"), ("B", 2, 4, 'S', "FF")])
+
+    def test_counters(self):
+        analytics = analyse(self.scenario, ENGINES['reference'])
+        self.assertTrue(analytics.dense)
+        self.assertEqual(list(analytics.cells()), [
+            ((0, 0), 1, 0, (1, 0, 0, 0)),
+            ((0, 1), 1, 0, (1, 0, 0, 0)),
+            ((0, 2), 1, 0, (0, 1, 0, 0)),
+            ((1, 2), 1, 0, (0, 1, 0, 0)),
+            ((2, 2), 2, 1, (0, 0, 0, 0)),
+            ((2, 3), 1, 0, (0, 0, 1, 0)),
+            ((2, 4), 1, 0, (0, 0, 1, 0)),
+        ])
+        self.assertEqual(analytics.hot_cells(2), [((2, 2), 2), ((0, 0), 1)])
+
+    def test_sparse_counters_match_dense(self):
+        dense = analyse(self.scenario, ENGINES['reference'])
+        with patch('src.auto_driving_car_simulation.simulation.analytics.Config.ANALYTICS_DENSE_MAX_CELLS', 0):
+            sparse = analyse(self.scenario, ENGINES['reference'])
+        self.assertFalse(sparse.dense)
+        self.assertEqual(list(sparse.cells()), list(dense.cells()))
+
+    def test_every_engine_matches_reference(self):
+        for seed in range(20):
+            scenario = random_scenario(seed, size=(3, 10), cars=(1, 12), length=25)
+            expected = list(analyse(scenario, ENGINES['reference']).cells())
+            for name, engine in ENGINES.items():
+                self.assertEqual(list(analyse(scenario, engine).cells()), expected, (name, seed))
+
+    def test_export_and_load(self):
+        analytics = analyse(self.scenario, ENGINES['reference'])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'analytics.bin')
+            analytics.export(path)
+            self.assertEqual(os.path.getsize(path), 32 + 7 * 56)
+            loaded = TrafficAnalytics.load(path)
+        self.assertEqual((loaded.width, loaded.height), (5, 5))
+        self.assertEqual(list(loaded.cells()), list(analytics.cells()))
+
+    def test_load_invalid_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'analytics.bin')
+            with open(path, 'wb') as file:
+                file.write(b'not analytics')
+            with pytest.raises(ValueError):
+                TrafficAnalytics.load(path)
+
+    @patch('builtins.print')
+    def test_cli(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scenario.txt')
+            output = os.path.join(directory, 'analytics.bin')
+            self.scenario.save(path)
+            self.assertEqual(cli(['--input', path, '--analytics', output]), 0)
+            self.assertEqual(TrafficAnalytics.load(output).hot_cells(1), [((2, 2), 2)])
+        mock_print.assert_any_call(f"Traffic analytics written to {output}. "
+                                   "Most visited: (2, 2) (2 visits), (0, 0) (1 visits), (0, 1) (1 visits).")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch
+from src.auto_driving_car_simulation.simulation.batch import BatchSimulation
+from src.auto_driving_car_simulation.simulation.monte_carlo import run_trial, run_trials
+from src.auto_driving_car_simulation.simulation.near_miss import NearMissDetector
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from helpers import outcome, random_scenario
+
+
+class TestBatchSimulation(unittest.TestCase):
+
+    def test_matches_serial_runs(self):
+        scenarios = [random_scenario(seed) for seed in range(300)]
+        expected = []
+        for scenario in scenarios:
+            simulation = scenario.build_simulation()
+            simulation.run_simulation(display=False)
+            expected.append(outcome(simulation))
+        simulations = [scenario.build_simulation() for scenario in scenarios]
+        BatchSimulation(simulations).run_simulation()
+        for index, simulation in enumerate(simulations):
+            self.assertEqual(outcome(simulation), expected[index], index)
+
+    def test_scenarios_are_isolated(self):
+        first = Scenario(3, 3, [("A", 0, 0, 'E', "FF")]).build_simulation()
+        second = Scenario(3, 3, [("B", 2, 0, 'W', "FF"), ("C", 1, 2, 'S', "F")]).build_simulation()
+        BatchSimulation([first, second]).run_simulation()
+        self.assertEqual(first.collisions, {})
+        self.assertEqual((first.cars[0].x, first.cars[0].y), (2, 0))
+        self.assertEqual(second.collisions, {})
+        self.assertEqual((second.cars[1].x, second.cars[1].y), (1, 1))
+
+    def test_head_on_swap(self):
+        simulation = Scenario(4, 1, [("A", 1, 0, 'E', "F"), ("B", 2, 0, 'W', "F")]).build_simulation()
+        other = Scenario(4, 1, [("A", 1, 0, 'E', "F")]).build_simulation()
+        BatchSimulation([other, simulation]).run_simulation()
+        self.assertEqual(simulation.collisions, {1: [(["A", "B"], (2, 0))]})
+        self.assertEqual(other.collisions, {})
+
+    def test_cars_starting_in_the_same_cell(self):
+        scenario = Scenario(3, 3, [("A", 1, 1, 'N', "L"), ("B", 1, 1, 'N', "L")])
+        simulation = scenario.build_simulation()
+        BatchSimulation([simulation]).run_simulation()
+        reference = scenario.build_simulation()
+        reference.run_simulation(display=False)
+        self.assertEqual(simulation.collisions, {1: [(['A', 'B'], (1, 1))]})
+        self.assertEqual(outcome(simulation), outcome(reference))
+
+    @patch('builtins.print')
+    def test_display(self, mock_print):
+        simulation = Scenario(5, 5, [("A", 0, 0, 'N', "F")]).build_simulation()
+        BatchSimulation([simulation]).run_simulation(display=True)
+        mock_print.assert_any_call("- A , (0, 1), N")
+
+    def test_near_miss_is_rejected(self):
+        simulation = Scenario(5, 5, [("A", 0, 0, 'N', "F")]).build_simulation()
+        simulation.near_miss = NearMissDetector(1)
+        with self.assertRaises(ValueError):
+            BatchSimulation([simulation]).run_simulation()
+
+    def test_empty(self):
+        BatchSimulation([]).run_simulation()
+
+    def test_monte_carlo_trials(self):
+        self.assertEqual(run_trials(6, 6, 8, 12, 7, range(40)), [run_trial(6, 6, 8, 12, 7, trial)
+                                                                   for trial in range(40)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import pytest
+from src.auto_driving_car_simulation.simulation.binary_scenario import BinaryScenario
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from src.auto_driving_car_simulation.main import cli
+
+
+class TestBinaryScenario(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'scenario.bin')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        scenario = Scenario.parse(["10 10", "Car1 1 2 N FFRFFFFRRL", "Čar2 7 8 W 2FL7F", "Car3 0 0 E"])
+        BinaryScenario.write(scenario, self.path)
+        with BinaryScenario.load(self.path) as binary:
+            self.assertEqual((binary.width, binary.height), (10, 10))
+            self.assertEqual(len(binary), 3)
+            self.assertEqual(list(binary.xs), [1, 7, 0])
+            self.assertEqual(list(binary.cars), [("Car1", 1, 2, 'N', "FFRFFFFRRL"),
+                                                 ("Čar2", 7, 8, 'W', "2(F)L7(F)"), ("Car3", 0, 0, 'E', "")])
+            self.assertEqual(binary.cars[-1][0], "Car3")
+
+    @patch('builtins.print')
+    def test_simulation_matches_text(self, mock_print):
+        scenario = Scenario.parse(["10 10", "Car1 1 2 N FFRFFFFRRL", "Car2 7 8 W 2FL7F", "Car3 9 9 S 100(FRFL)"])
+        BinaryScenario.write(scenario, self.path)
+        expected = scenario.build_simulation()
+        expected.run_simulation(display=False)
+        with BinaryScenario.load(self.path) as binary:
+            simulation = binary.build_simulation()
+        simulation.run_simulation(display=False)
+        self.assertEqual(simulation.collisions, expected.collisions)
+        self.assertEqual(simulation.boundary_collisions, expected.boundary_collisions)
+        self.assertEqual([(car.x, car.y, car.direction) for car in simulation.cars],
+                         [(car.x, car.y, car.direction) for car in expected.cars])
+
+    def test_cars_are_decoded_on_access(self):
+        scenario = Scenario(1000, 1000, [(f"Car{index}", index % 1000, index // 1000, 'N', "1000(FR)")
+                                         for index in range(200000)])
+        BinaryScenario.write(scenario, self.path)
+        with patch.object(BinaryScenario, 'name') as name, \
+                patch.object(BinaryScenario, 'commands') as commands:
+            with BinaryScenario.load(self.path) as binary:
+                self.assertEqual(len(binary), 200000)
+                self.assertEqual(binary.ys[199999], 199)
+                name.assert_not_called()
+                commands.assert_not_called()
+                binary.cars[123456]
+                name.assert_called_once_with(123456)
+                commands.assert_called_once_with(123456)
+
+    def test_invalid_file(self):
+        for content in (b"", b"10 10\nCar1 0 0 N F\n", b"ADCS\x02\x00\x00\x00" + bytes(24)):
+            with open(self.path, 'wb') as file:
+                file.write(content)
+            with pytest.raises(ValueError, match="is not a binary scenario"):
+                BinaryScenario.load(self.path)
+
+    @patch('builtins.print')
+    def test_cli_convert_and_run(self, mock_print):
+        text = os.path.join(self.directory.name, 'scenario.txt')
+        with open(text, 'w') as file:
+            file.write("10 10\nA 1 2 N FFRFFFFRRL\nB 7 8 W FFLFFFFFFF\n")
+        self.assertEqual(cli(['--input', text, '--convert', self.path]), 0)
+        self.assertTrue(BinaryScenario.is_binary(self.path))
+        self.assertFalse(BinaryScenario.is_binary(text))
+        self.assertEqual(cli(['--input', self.path]), 0)
+        mock_print.assert_any_call("- A, collides with B at (5, 4) at step 7")
+
+
+if __name__ == '__main__':
+    unittest.main()
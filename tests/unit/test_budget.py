@@ -0,0 +1,104 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from src.auto_driving_car_simulation.simulation.budget import CANCELLED, STEP_LIMIT, TIMEOUT, CancellationToken, \
+    RunBudget
+from src.auto_driving_car_simulation.simulation.engines import ENGINES
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.simulation.program import Program
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from src.auto_driving_car_simulation.main import cli
+from helpers import outcome, random_scenario
+
+
+def truncated(scenario, steps):
+    return Scenario(scenario.width, scenario.height,
+                    [(name, x, y, direction, "".join(Program.parse(commands)[step]
+                                                      for step in range(min(steps, len(Program.parse(commands))))))
+                     for name, x, y, direction, commands in scenario.cars])
+
+
+# Two cars circling forever in opposite corners of the field.
+RUNAWAY = Scenario(10, 10, [("A", 0, 0, 'N', "100000000(FRFRFRFR)"), ("B", 8, 8, 'N', "100000000(FRFRFRFR)")])
+
+
+class TestRunBudget(unittest.TestCase):
+
+    def test_step_limit_gives_the_state_after_the_last_step(self):
+        for name, engine in ENGINES.items():
+            for seed in range(4 if name == 'parallel' else 30):
+                scenario = random_scenario(seed, size=(3, 9), cars=(1, 12))
+                simulation = scenario.build_simulation(engine)
+                simulation.run_simulation(display=False, budget=RunBudget(max_steps=7))
+                expected = truncated(scenario, 7).build_simulation()
+                expected.run_simulation(display=False)
+                self.assertEqual(outcome(simulation, interrupted=False, metrics=False),
+                                 outcome(expected, interrupted=False, metrics=False), (name, seed))
+                self.assertEqual(simulation.interrupted is not None,
+                                 RunBudget.truncated(simulation.cars, simulation.stopped_cars, 7), (name, seed))
+
+    def test_step_limit_of_a_car_advanced_in_one_go(self):
+        simulation = Scenario(5, 5, [("A", 0, 0, 'N', "1000000(FR)")]).build_simulation()
+        simulation.run_simulation(display=False, budget=RunBudget(max_steps=3))
+        self.assertEqual((simulation.cars[0].x, simulation.cars[0].y, simulation.cars[0].direction), (1, 1, 'E'))
+        self.assertEqual(simulation.interrupted, STEP_LIMIT)
+
+    def test_no_interruption_within_budget(self):
+        simulation = random_scenario(1, size=(3, 9), cars=(1, 12)).build_simulation()
+        simulation.run_simulation(display=False, budget=RunBudget(max_steps=1000, max_seconds=60))
+        self.assertIsNone(simulation.interrupted)
+
+    def test_timeout(self):
+        for name in ('reference', 'vectorized'):
+            simulation = RUNAWAY.build_simulation(ENGINES[name])
+            started = time.monotonic()
+            simulation.run_simulation(display=False, budget=RunBudget(max_seconds=0.2))
+            self.assertLess(time.monotonic() - started, 5)
+            self.assertEqual(simulation.interrupted, TIMEOUT)
+            self.assertEqual(simulation.collisions, {})
+
+    def test_cancellation_from_another_thread(self):
+        token = CancellationToken()
+        simulation = RUNAWAY.build_simulation()
+        timer = threading.Timer(0.1, token.cancel)
+        timer.start()
+        simulation.run_simulation(display=False, budget=RunBudget(token=token))
+        timer.join()
+        self.assertEqual(simulation.interrupted, CANCELLED)
+        self.assertGreater(simulation.metrics.steps, 0)
+
+    def test_progress(self):
+        calls = []
+        simulation = random_scenario(2, size=(3, 9), cars=(1, 12)).build_simulation()
+        simulation.run_simulation(display=False, budget=RunBudget(progress=lambda step, active: calls.append(
+            (step, active))))
+        self.assertEqual(calls[0], (0, len(simulation.cars)))
+
+    def test_checks_are_amortized(self):
+        budget = RunBudget(max_seconds=1)
+        self.assertEqual(budget.start(10 ** 8, 2), (10 ** 8, 1 << 15))
+        self.assertEqual(budget.start(10, 10 ** 6)[1], 1)
+        self.assertEqual(RunBudget(max_steps=5).start(10, 2), (5, 0))
+
+    @patch('builtins.print')
+    def test_cli_max_steps(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scenario.txt')
+            RUNAWAY.save(path)
+            self.assertEqual(cli(['--input', path, '--max-steps', '6', '--progress']), 0)
+        mock_print.assert_any_call("Step 0: 2 active car(s).")
+        mock_print.assert_any_call("The simulation was stopped after step 6 because the step budget was reached; "
+                                   "results are those of that step.")
+        mock_print.assert_any_call("- A , (1, 0), W")
+
+    @patch('sys.stderr')
+    def test_cli_rejects_negative_max_steps(self, _):
+        with self.assertRaises(SystemExit):
+            cli(['--input', 'scenario.txt', '--max-steps', '-1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.auto_driving_car_simulation.simulation.digest import StateDigest, car_digest, mix
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.simulation.parallel import ParallelSimulation
+from src.auto_driving_car_simulation.simulation.incremental import IncrementalSimulation
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from src.auto_driving_car_simulation.main import cli
+from helpers import random_scenario
+
+
+def digests(scenario, engine=Simulation):
+    simulation = scenario.build_simulation(engine)
+    simulation.track_digests = True
+    simulation.run_simulation(display=False)
+    return simulation.digest.steps
+
+
+class TestDigest(unittest.TestCase):
+
+    def test_not_tracked_by_default(self):
+        simulation = random_scenario(0, size=(3, 10), cars=(1, 12), length=25).build_simulation()
+        simulation.run_simulation(display=False)
+        self.assertIsNone(simulation.digest)
+
+    def test_one_value_per_step(self):
+        scenario = Scenario(5, 5, [("A", 0, 0, 'N', "FFRFF")])
+        self.assertEqual(len(digests(scenario)), 6)
+
+    def test_order_independent(self):
+        cars = [car_digest(index, index * 3, index * 5, index % 4) for index in range(10)]
+        first = sum(cars)
+        random.Random(1).shuffle(cars)
+        self.assertEqual(sum(cars), first)
+        self.assertNotEqual(car_digest(0, 1, 2, 0), car_digest(0, 2, 1, 0))
+        self.assertNotEqual(mix(1), mix(2))
+
+    def test_engines_match(self):
+        for seed in range(60):
+            scenario = random_scenario(seed, size=(3, 10), cars=(1, 12), length=25)
+            expected = digests(scenario)
+            self.assertEqual(digests(scenario, IncrementalSimulation), expected, seed)
+            if seed % 6 == 0:
+                self.assertEqual(digests(scenario, ParallelSimulation), expected, seed)
+
+    def test_first_divergence(self):
+        scenario = Scenario(5, 5, [("A", 0, 0, 'N', "FFRFF"), ("B", 4, 4, 'S', "FFFF")])
+        changed = Scenario(5, 5, [("A", 0, 0, 'N', "FFRFF"), ("B", 4, 4, 'S', "FFLF")])
+        self.assertEqual(StateDigest.first_divergence(digests(scenario), digests(changed)), 3)
+        self.assertIsNone(StateDigest.first_divergence(digests(scenario), digests(scenario)))
+        self.assertEqual(StateDigest.first_divergence([1, 2], [1, 2, 3]), 2)
+
+    @patch('builtins.print')
+    def test_cli_verify(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scenario.txt')
+            random_scenario(3, size=(3, 10), cars=(1, 12), length=25).save(path)
+            self.assertEqual(cli(['--input', path, '--verify', 'incremental']), 0)
+        self.assertIn("matches the reference", mock_print.call_args[0][0])
+
+    @patch('builtins.print')
+    def test_cli_verify_reports_divergence(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scenario.txt')
+            random_scenario(3, size=(3, 10), cars=(1, 12), length=25).save(path)
+            with patch('src.auto_driving_car_simulation.main.StateDigest.first_divergence', return_value=4):
+                self.assertEqual(cli(['--input', path, '--verify', 'incremental']), 1)
+        mock_print.assert_called_with("The incremental engine diverges from the reference first at step 4.")
+
+
+if __name__ == '__main__':
+    unittest.main()
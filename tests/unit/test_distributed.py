@@ -0,0 +1,143 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from multiprocessing import Process
+from unittest.mock import patch
+import pytest
+from src.auto_driving_car_simulation.simulation.distributed import (
+    HEARTBEAT, READY, Coordinator, receive_message, run_distributed, run_worker, send_message)
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.main import cli
+from helpers import outcome, random_scenario
+
+
+def expected_outcomes(scenarios):
+    outcomes = []
+    for scenario in scenarios:
+        simulation = scenario.build_simulation()
+        simulation.run_simulation(display=False)
+        outcomes.append(outcome(simulation))
+    return outcomes
+
+
+def start_worker(coordinator, **options):
+    thread = threading.Thread(target=run_worker, args=coordinator.address, kwargs=options, daemon=True)
+    thread.start()
+    return thread
+
+
+def lose_shard(coordinator, silent=False):
+    """Connects a worker that takes a shard and then disconnects, or stays silent."""
+    coordinator.start()
+    connection = socket.create_connection(coordinator.address)
+    send_message(connection, {'type': READY})
+    message = receive_message(connection)
+    if not silent:
+        connection.close()
+    return connection, message
+
+
+class TestDistributed(unittest.TestCase):
+
+    def setUp(self):
+        self.scenarios = [random_scenario(seed, size=(3, 10), cars=(1, 10), length=20) for seed in range(7)]
+
+    def test_messages(self):
+        first, second = socket.socketpair()
+        with first, second:
+            send_message(first, {'type': HEARTBEAT, 'cars': [["A", 1, 2, 'N', "F"]]})
+            self.assertEqual(receive_message(second), {'type': HEARTBEAT, 'cars': [["A", 1, 2, 'N', "F"]]})
+            first.close()
+            with pytest.raises(ConnectionError):
+                receive_message(second)
+
+    def test_results_are_merged_in_order(self):
+        simulations = run_distributed(self.scenarios, 2, shard_size=2)
+        self.assertEqual([outcome(simulation) for simulation in simulations], expected_outcomes(self.scenarios))
+
+    def test_lost_shard_is_retried(self):
+        coordinator = Coordinator(self.scenarios, shard_size=3)
+        _, message = lose_shard(coordinator)
+        start_worker(coordinator)
+        simulations = coordinator.run(timeout=10)
+        self.assertEqual([outcome(simulation) for simulation in simulations], expected_outcomes(self.scenarios))
+        self.assertEqual(coordinator._attempts[message['shard']], 2)
+
+    def test_silent_worker_shard_is_retried(self):
+        coordinator = Coordinator(self.scenarios, shard_size=3, heartbeat_timeout=0.2)
+        connection, message = lose_shard(coordinator, silent=True)
+        with connection:
+            start_worker(coordinator)
+            simulations = coordinator.run(timeout=10)
+        self.assertEqual([outcome(simulation) for simulation in simulations], expected_outcomes(self.scenarios))
+        self.assertEqual(coordinator._attempts[message['shard']], 2)
+
+    def test_heartbeats_keep_a_slow_shard(self):
+        run_simulation = Simulation.run_simulation
+
+        def slow_run(simulation, *args, **kwargs):
+            time.sleep(0.1)
+            return run_simulation(simulation, *args, **kwargs)
+
+        coordinator = Coordinator(self.scenarios[:4], shard_size=4, heartbeat_timeout=0.25, engine='reference')
+        with patch.object(Simulation, 'run_simulation', slow_run):
+            start_worker(coordinator, heartbeat_interval=0.05)
+            simulations = coordinator.run(timeout=10)
+        self.assertEqual(coordinator._attempts, [1])
+        self.assertEqual([outcome(simulation) for simulation in simulations], expected_outcomes(self.scenarios[:4]))
+
+    def test_shard_failing_every_attempt(self):
+        coordinator = Coordinator(self.scenarios, max_attempts=1)
+        threading.Thread(target=lose_shard, args=(coordinator,), daemon=True).start()
+        with pytest.raises(ConnectionError):
+            coordinator.run(timeout=10)
+
+    def test_timeout(self):
+        with pytest.raises(TimeoutError):
+            Coordinator(self.scenarios).run(timeout=0.2)
+
+    def test_exited_local_workers(self):
+        process = Process(target=int)
+        process.start()
+        process.join()
+        with pytest.raises(ConnectionError):
+            Coordinator(self.scenarios).run(timeout=10, processes=[process])
+
+    def test_cli_timeout(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scenario.txt')
+            self.scenarios[0].save(path)
+            with patch('builtins.print') as mock_print:
+                self.assertEqual(cli(['--distribute', path, '--timeout', '0.2']), 1)
+        self.assertEqual(str(mock_print.call_args.args[0]), "Only 0 of 1 shards completed in time.")
+
+    def test_empty_batch(self):
+        self.assertEqual(Coordinator([]).run(timeout=1), [])
+
+    @patch('builtins.print')
+    def test_cli(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for index, cars in enumerate(([("A", 1, 2, 'N', "FFRFF"), ("B", 3, 3, 'S', "FF")], [("A", 0, 0, 'S', "F")])):
+                paths.append(os.path.join(directory, f'scenario{index}.txt'))
+                Scenario(5, 5, cars).save(paths[-1])
+            self.assertEqual(cli(['--distribute', *paths, '--local-workers', '1']), 0)
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        self.assertTrue(printed[0].startswith("Coordinator listening on 127.0.0.1:"))
+        self.assertEqual(printed[1:], [f"Results of {paths[0]}:", "After simulation, the result is:",
+                                       "- A , (3, 4), E", "- B , (3, 1), S", f"Results of {paths[1]}:",
+                                       "After simulation, the result is:",
+                                       "A , (0, 0), S , step(s) 1 ignored due to collided with the field boundary."])
+
+    def test_cli_invalid_address(self):
+        with patch('builtins.print') as mock_print:
+            self.assertEqual(cli(['--worker', 'localhost']), 1)
+        self.assertEqual(str(mock_print.call_args.args[0]), "localhost is not a HOST:PORT address.")
+
+
+if __name__ == '__main__':
+    unittest.main()
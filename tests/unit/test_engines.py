@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import pytest
+from src.auto_driving_car_simulation.simulation.engines import ENGINES, auto_engine, register_engine, select_engine
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.simulation.batch import VectorizedSimulation
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from src.auto_driving_car_simulation.simulation.budget import RunBudget
+from src.auto_driving_car_simulation.config.config import Config
+from src.auto_driving_car_simulation.main import cli
+from helpers import outcome, random_scenario
+
+
+# Scenarios covering every rule of the reference engine.
+SCENARIOS = [
+    Scenario(10, 10, [("A", 1, 2, 'N', "FFRFFFFRRL"), ("B", 7, 8, 'W', "FFLFFFFFFF")]),
+    Scenario(4, 1, [("A", 1, 0, 'E', "F"), ("B", 2, 0, 'W', "F")]),
+    Scenario(3, 3, [("A", 0, 1, 'E', "F"), ("B", 1, 1, 'W', "F"), ("C", 1, 0, 'N', "F")]),
+    Scenario(5, 5, [("A", 0, 0, 'S', "FFF"), ("B", 4, 4, 'N', "FFFFFFF")]),
+    Scenario(5, 5, [("A", 0, 0, 'N', "FFF"), ("B", 0, 4, 'S', "")]),
+    Scenario(50, 50, [("A", 0, 0, 'N', "1000(FFRFFR)"), ("B", 49, 49, 'S', "3(FL)")]),
+    Scenario(5, 5, [("A", 0, 0, 'E', "100(FR)")]),
+]
+
+
+class EngineConformance:
+    """Checks that an engine gives the results, metrics and state digests of the reference engine."""
+
+    engine = None
+    random_scenarios = 40
+
+    def run_engine(self, scenario, engine, digests=False, budget=None):
+        simulation = scenario.build_simulation(engine)
+        simulation.track_digests = digests
+        simulation.run_simulation(display=False, budget=budget)
+        return simulation
+
+    def test_results_match_reference(self):
+        scenarios = SCENARIOS + [random_scenario(seed) for seed in range(self.random_scenarios)]
+        for index, scenario in enumerate(scenarios):
+            self.assertEqual(outcome(self.run_engine(scenario, self.engine)),
+                             outcome(self.run_engine(scenario, Simulation)), index)
+
+    def test_step_limit_matches_reference(self):
+        for index, scenario in enumerate(SCENARIOS + [random_scenario(seed) for seed in range(4)]):
+            self.assertEqual(outcome(self.run_engine(scenario, self.engine, budget=RunBudget(max_steps=5))),
+                             outcome(self.run_engine(scenario, Simulation, budget=RunBudget(max_steps=5))), index)
+
+    def test_digests_match_reference(self):
+        for index, scenario in enumerate(SCENARIOS[:5]):
+            self.assertEqual(self.run_engine(scenario, self.engine, digests=True).digest.steps,
+                             self.run_engine(scenario, Simulation, digests=True).digest.steps, index)
+
+    @patch('builtins.print')
+    def test_display_matches_reference(self, mock_print):
+        self.run_engine(SCENARIOS[0], Simulation).display_final_results()
+        expected = mock_print.call_args_list[:]
+        mock_print.reset_mock()
+        self.run_engine(SCENARIOS[0], self.engine).display_final_results()
+        self.assertEqual(mock_print.call_args_list, expected)
+
+
+for engine_name, engine_class in ENGINES.items():
+    globals()[f"Test{engine_name.title()}Engine"] = type(
+        f"Test{engine_name.title()}Engine", (EngineConformance, unittest.TestCase),
+        {'engine': engine_class, 'random_scenarios': 4 if engine_name == 'parallel' else 40})
+
+
+class TestEngineSelection(unittest.TestCase):
+
+    def test_auto_engine(self):
+        self.assertEqual(auto_engine(1), 'reference')
+        self.assertEqual(auto_engine(50), 'vectorized')
+        with patch('os.cpu_count', return_value=8):
+            self.assertEqual(auto_engine(Config.ENGINE_PARALLEL_MIN_CARS), 'parallel')
+        with patch('os.cpu_count', return_value=1):
+            self.assertEqual(auto_engine(Config.ENGINE_PARALLEL_MIN_CARS), 'vectorized')
+
+    def test_precedence(self):
+        with patch.dict(os.environ, {Config.ENGINE_ENVIRONMENT_VARIABLE: 'incremental'}):
+            self.assertIs(select_engine('reference'), Simulation)
+            self.assertIs(select_engine(), ENGINES['incremental'])
+        with patch.dict(os.environ, clear=True), patch.object(Config, 'SIMULATION_ENGINE', 'vectorized'):
+            self.assertIs(select_engine(car_count=1), VectorizedSimulation)
+        with patch.dict(os.environ, clear=True):
+            self.assertIs(select_engine(car_count=1000), Simulation)
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError, match="Unknown engine warp"):
+            select_engine('warp')
+
+    def test_register_engine(self):
+        class CustomSimulation(Simulation):
+            pass
+        register_engine('custom', CustomSimulation)
+        try:
+            self.assertIs(select_engine('custom'), CustomSimulation)
+        finally:
+            del ENGINES['custom']
+
+    @patch('builtins.print')
+    def test_cli_engine(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scenario.txt')
+            SCENARIOS[0].save(path)
+            with patch.object(VectorizedSimulation, 'run_simulation', autospec=True,
+                              side_effect=VectorizedSimulation.run_simulation) as run:
+                self.assertEqual(cli(['--input', path, '--engine', 'vectorized']), 0)
+                run.assert_called_once()
+            with patch.dict(os.environ, {Config.ENGINE_ENVIRONMENT_VARIABLE: 'warp'}):
+                self.assertEqual(cli(['--input', path]), 1)
+        mock_print.assert_any_call("- A, collides with B at (5, 4) at step 7")
+
+
+if __name__ == '__main__':
+    unittest.main()
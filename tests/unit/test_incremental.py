@@ -0,0 +1,90 @@
+import random
+import unittest
+import pytest
+from src.auto_driving_car_simulation.simulation.incremental import IncrementalSimulation, PathIndex
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.simulation.field import Field
+from helpers import build, outcome
+
+
+class TestIncrementalSimulation(unittest.TestCase):
+
+    def test_only_nearby_cars_are_resimulated(self):
+        cars = [("Car1", 0, 0, 'N', "FFFF"), ("Car2", 0, 5, 'S', "FFFF"), ("Car3", 20, 20, 'E', "FFFF")]
+        simulation = build(IncrementalSimulation(Field(30, 30), checkpoint_interval=2), cars)
+        simulation.run_simulation(display=False)
+        resimulated = simulation.update_commands("Car1", "FFRF")
+        self.assertEqual(resimulated, {"Car1", "Car2"})
+        expected = build(Simulation(Field(30, 30)), [("Car1", 0, 0, 'N', "FFRF")] + cars[1:])
+        expected.run_simulation(display=False)
+        self.assertEqual(outcome(simulation), outcome(expected))
+
+    def test_change_after_stop_does_nothing(self):
+        cars = [("Car1", 0, 0, 'S', "FFFF")]
+        simulation = build(IncrementalSimulation(Field(5, 5)), cars)
+        simulation.run_simulation(display=False)
+        self.assertEqual(simulation.update_commands("Car1", "FRRR"), set())
+        self.assertEqual(simulation.boundary_collisions, {"Car1": [1]})
+
+    def test_unknown_car(self):
+        simulation = IncrementalSimulation(Field(5, 5))
+        with pytest.raises(ValueError):
+            simulation.update_commands("Car1", "F")
+
+    def test_matches_full_run(self):
+        rng = random.Random(3)
+        for _ in range(40):
+            width, height = rng.randint(4, 12), rng.randint(4, 12)
+            cells = rng.sample(range(width * height), rng.randint(2, 12))
+            cars = [(f"Car{index}", cell % width, cell // width, rng.choice("NESW"),
+                     "".join(rng.choice("LRFFF") for _ in range(rng.randint(0, 20))))
+                    for index, cell in enumerate(cells)]
+            simulation = build(IncrementalSimulation(Field(width, height), checkpoint_interval=3), cars)
+            simulation.run_simulation(display=False)
+            for _ in range(3):
+                changed = rng.randrange(len(cars))
+                name, x, y, direction, commands = cars[changed]
+                keep = rng.randint(0, len(commands))
+                commands = commands[:keep] + "".join(rng.choice("LRFFF") for _ in range(rng.randint(0, 10)))
+                cars[changed] = (name, x, y, direction, commands)
+                simulation.update_commands(name, commands)
+                expected = build(Simulation(Field(width, height)), cars)
+                expected.run_simulation(display=False)
+                self.assertEqual(outcome(simulation), outcome(expected))
+                self.assertEqual(list(simulation.collisions), list(expected.collisions))
+
+    def test_swap_and_same_cell_collision_are_replaced(self):
+        cars = [("A", 0, 0, 'N', "F"), ("B", 0, 1, 'S', "F"), ("C", 1, 1, 'W', "F"), ("D", 1, 0, 'W', "F")]
+        simulation = build(IncrementalSimulation(Field(5, 5)), cars)
+        simulation.run_simulation(display=False)
+        self.assertEqual(len(simulation.collisions[1]), 3)
+        simulation.update_commands("A", "L")
+        expected = build(Simulation(Field(5, 5)), [("A", 0, 0, 'N', "L")] + cars[1:])
+        expected.run_simulation(display=False)
+        self.assertEqual(simulation.collisions, {1: [(['A', 'B', 'D'], (0, 0))]})
+        self.assertEqual(outcome(simulation), outcome(expected))
+
+    def test_update_with_digests_reruns(self):
+        cars = [("Car1", 0, 0, 'N', "FFFF"), ("Car2", 0, 5, 'S', "FFFF"), ("Car3", 20, 20, 'E', "FFFF")]
+        simulation = build(IncrementalSimulation(Field(30, 30), checkpoint_interval=2), cars)
+        simulation.track_digests = True
+        simulation.run_simulation(display=False)
+        self.assertEqual(simulation.update_commands("Car1", "FFRF"), {"Car1", "Car2", "Car3"})
+        expected = build(Simulation(Field(30, 30)), [("Car1", 0, 0, 'N', "FFRF")] + cars[1:])
+        expected.track_digests = True
+        expected.run_simulation(display=False)
+        self.assertEqual(outcome(simulation), outcome(expected))
+        self.assertEqual(simulation.digest.steps, expected.digest.steps)
+
+    def test_path_index(self):
+        paths = PathIndex([(0, 3, 0, 0), None, (2, 2, 0, 9), (8, 9, 8, 9)])
+        self.assertEqual(paths.meeting((1, 2, 0, 1)), {0, 2})
+        self.assertEqual(paths.meeting((5, 6, 5, 6)), set())
+        paths.replace(3, (4, 6, 4, 6))
+        self.assertEqual(paths.meeting((5, 6, 5, 6)), {3})
+        paths.replace(1, (9, 9, 9, 9))
+        self.assertEqual(paths.meeting((9, 9, 9, 9)), {1})
+
+
+if __name__ == '__main__':
+    unittest.main()
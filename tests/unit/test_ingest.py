@@ -0,0 +1,103 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.auto_driving_car_simulation.simulation.ingest import ColumnarScenario
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from src.auto_driving_car_simulation.main import cli, load_scenario
+
+
+def random_lines(seed, cars=300, width=40, height=40):
+    rng = random.Random(seed)
+    lines = ["# generated", f"{width} {height}"]
+    for index, cell in enumerate(rng.sample(range(width * height), cars)):
+        if rng.random() < 0.1:
+            lines.append(rng.choice(["", "# comment", "   "]))
+        commands = "".join(rng.choice("LRF") for _ in range(rng.randint(0, 8)))
+        if rng.random() < 0.2:
+            commands = f"{rng.randint(1, 9)}({commands or 'F'})"
+        lines.append(f"Čar{index} {cell % width} {cell // width} {rng.choice('NESW')} {commands}".rstrip())
+    return lines
+
+
+class TestIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'scenario.txt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, lines):
+        with open(self.path, 'w') as file:
+            file.write("\n".join(lines) + "\n")
+
+    def assert_same_error(self, lines, workers=1):
+        self.write(lines)
+        with self.assertRaises(ValueError) as expected:
+            Scenario.load(self.path)
+        with self.assertRaises(ValueError) as error:
+            ColumnarScenario.load(self.path, workers=workers, chunk_bytes=256)
+        self.assertEqual(str(error.exception), str(expected.exception))
+
+    def test_matches_text_loader(self):
+        for seed in range(5):
+            lines = random_lines(seed)
+            self.write(lines)
+            expected = Scenario.load(self.path)
+            for chunk_bytes in (1, 100, 1000, 1 << 20):
+                scenario = ColumnarScenario.load(self.path, workers=1, chunk_bytes=chunk_bytes)
+                self.assertEqual((scenario.width, scenario.height), (expected.width, expected.height))
+                self.assertEqual(list(scenario.cars), expected.cars)
+                self.assertEqual(len(scenario), len(expected.cars))
+
+    def test_workers(self):
+        self.write(random_lines(7, cars=1000))
+        serial = ColumnarScenario.load(self.path, workers=1, chunk_bytes=2048)
+        parallel = ColumnarScenario.load(self.path, workers=2, chunk_bytes=2048)
+        self.assertEqual(list(parallel.cars), list(serial.cars))
+
+    def test_line_numbers(self):
+        lines = random_lines(2)
+        self.write(lines)
+        scenario = ColumnarScenario.load(self.path, workers=1, chunk_bytes=300)
+        for index in range(len(scenario)):
+            self.assertTrue(lines[scenario.line(index) - 1].startswith(f"Čar{index} "))
+
+    def test_errors_match_text_loader(self):
+        lines = random_lines(3)
+        x, y = lines[5].split()[1:3]
+        for number, line in ((200, "Bad 1 1 X F"), (250, "Bad 1 1 N FQ"), (150, "Bad 1"), (280, "Bad 99 0 N"),
+                             (220, lines[5].split()[0] + " 39 39 N"), (240, f"Bad {x} {y} N F")):
+            corrupted = lines[:number] + [line] + lines[number:]
+            self.assert_same_error(corrupted)
+        self.assert_same_error(["# nothing"])
+        self.assert_same_error(["10 0", "A 1 1 N"])
+
+    def test_duplicate_before_invalid_line(self):
+        lines = random_lines(4)
+        corrupted = lines[:100] + [lines[10]] + lines[100:250] + ["Bad 1 1 X"] + lines[250:]
+        self.assert_same_error(corrupted)
+        self.assert_same_error(corrupted, workers=2)
+
+    def test_build_simulation(self):
+        self.write(random_lines(5))
+        expected = Scenario.load(self.path).build_simulation()
+        simulation = ColumnarScenario.load(self.path, workers=1, chunk_bytes=500).build_simulation()
+        expected.run_simulation(display=False)
+        simulation.run_simulation(display=False)
+        self.assertEqual([(car.name, car.x, car.y, car.direction, car.commands) for car in simulation.cars],
+                         [(car.name, car.x, car.y, car.direction, car.commands) for car in expected.cars])
+        self.assertEqual(simulation.collisions, expected.collisions)
+
+    @patch('builtins.print')
+    def test_large_files_are_ingested_in_parallel(self, mock_print):
+        self.write(["5 5", "A 0 0 N FF", "B 0 4 S FF"])
+        with patch('src.auto_driving_car_simulation.main.Config.INGEST_PARALLEL_MIN_BYTES', 0):
+            self.assertIsInstance(load_scenario(self.path), ColumnarScenario)
+            self.assertEqual(cli(["--input", self.path]), 0)
+        printed = [str(call.args[0]) for call in mock_print.call_args_list]
+        self.assertIn("- A, collides with B at (0, 2) at step 2", printed)
+        self.assertIsInstance(load_scenario(self.path), Scenario)
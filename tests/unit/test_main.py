@@ -1,7 +1,9 @@
 import unittest
 import pytest
 from unittest.mock import patch, MagicMock
-from src.auto_driving_car_simulation.main import setup_field, add_car_to_simulation, get_valid_car_name, get_valid_car_position, get_valid_car_commands, handle_post_simulation_options, main
+import os
+import tempfile
+from src.auto_driving_car_simulation.main import setup_field, add_car_to_simulation, get_valid_car_name, get_valid_car_position, get_valid_car_commands, handle_post_simulation_options, main, cli, add_cars_in_bulk, list_cars, run_session
 from src.auto_driving_car_simulation.simulation.field import Field
 from src.auto_driving_car_simulation.simulation.car import Car
 from src.auto_driving_car_simulation.simulation.simulation import Simulation
@@ -84,13 +86,12 @@ class TestMainFunctions(unittest.TestCase):
         self.assertEqual(mock_print.call_count, 1)
 
     @patch('builtins.input', side_effect=['1'])
-    @patch('src.auto_driving_car_simulation.main.main', side_effect=StopIteration)
-    def test_handle_post_simulation_options_reset(self, mock_main, mock_input):
+    def test_handle_post_simulation_options_reset(self, mock_input):
         field = Field(5, 5)
         simulation = Simulation(field)
-        with self.assertRaises(StopIteration):
-            handle_post_simulation_options(simulation)
-        self.assertTrue(mock_main.called)
+        simulation.add_car(Car("Car1", 0, 0, 'N'))
+        self.assertTrue(handle_post_simulation_options(simulation))
+        self.assertEqual(len(simulation.cars), 0)
 
     @patch('builtins.input', side_effect=['2'])
     @patch('builtins.print')
@@ -127,7 +128,7 @@ class TestMainFunctions(unittest.TestCase):
             pass
         self.assertTrue(mock_print.called)
 
-    @patch('builtins.input', side_effect=['5 5', '3', '2'])
+    @patch('builtins.input', side_effect=['5 5', '5', '2'])
     @patch('builtins.print')
     def test_main_invalid_option(self, mock_print, mock_input):
         try:
@@ -135,7 +136,52 @@ class TestMainFunctions(unittest.TestCase):
         except StopIteration:
             pass
         self.assertTrue(mock_print.called)
-        mock_print.assert_any_call("Invalid option. Choose 1 or 2.")
+        mock_print.assert_any_call("Invalid option. Choose 1, 2, 3 or 4.")
+
+    @patch('builtins.input', side_effect=['5 5', '1', 'Car1', '0 0 N', 'F', '2', '1',
+                                          '5 5', '1', 'Car1', '0 0 N', 'F', '2', '2'])
+    @patch('builtins.print')
+    def test_main_start_over_without_recursion(self, mock_print, mock_input):
+        with patch('src.auto_driving_car_simulation.main.run_session', wraps=run_session) as session:
+            main()
+        self.assertEqual(session.call_count, 2)
+        mock_print.assert_any_call("Thank you for running the simulation. Goodbye!")
+
+    @patch('builtins.print')
+    def test_add_cars_in_bulk(self, mock_print):
+        simulation = Simulation(Field(5, 5))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cars.txt')
+            with open(path, 'w') as file:
+                file.write('# imported\nCar3 2 2 E FF\nCar4 9 9 N F\n')
+            inputs = ['Car1 0 0 N FFRFF', 'Car2 0 0 E F', 'Car2 1 1 E 2(FL)', '@' + path, 'Car5 7 7 N', '']
+            with patch('builtins.input', side_effect=inputs):
+                add_cars_in_bulk(simulation)
+        self.assertEqual([car.name for car in simulation.cars], ['Car1', 'Car2', 'Car3'])
+        mock_print.assert_any_call("Line 2: Position (0, 0) is already occupied by another car. "
+                                   "Please choose a different position.")
+        mock_print.assert_any_call(f"{path}, line 3: Car cannot be placed outside the field.")
+        mock_print.assert_any_call("Line 5: Car cannot be placed outside the field.")
+        mock_print.assert_any_call("Added 3 car(s). The simulation now has 3 car(s).")
+
+    @patch('builtins.print')
+    def test_list_cars_paginates(self, mock_print):
+        simulation = Simulation(Field(50, 50))
+        for index in range(45):
+            simulation.add_car(Car(f"Car{index}", index, 0, 'N'))
+        with patch('builtins.input', side_effect=['', 'q']) as mock_input:
+            list_cars(simulation)
+        self.assertEqual(mock_input.call_count, 2)
+        self.assertEqual(mock_print.call_count, 41)
+
+    @patch('builtins.input', side_effect=['Car1', '0 0 N', 'FF'])
+    @patch('builtins.print')
+    def test_add_car_prints_only_new_car(self, mock_print, mock_input):
+        simulation = Simulation(Field(5, 5))
+        simulation.add_car(Car("Car0", 1, 1, 'N'))
+        add_car_to_simulation(simulation)
+        mock_print.assert_any_call("- Car1, (0, 0), N,  FF")
+        self.assertNotIn(unittest.mock.call("- Car0, (1, 1), N,  "), mock_print.call_args_list)
 
     @patch('builtins.input', side_effect=["0 0 N", "1 1 E"])
     @patch('builtins.print')
@@ -148,6 +194,28 @@ class TestMainFunctions(unittest.TestCase):
         self.assertEqual((x, y, direction), (1, 1, 'E'))
         mock_print.assert_any_call("Position (0, 0) is already occupied by another car. Please choose a different position.")
 
+    @patch('builtins.input', side_effect=['3(FFR)'])
+    def test_get_valid_car_commands_repeat(self, mock_input):
+        commands = get_valid_car_commands('Car1')
+        self.assertEqual(commands, '3(FFR)')
+
+    @patch('builtins.print')
+    def test_cli_batch_input(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scenario.txt')
+            with open(path, 'w') as file:
+                file.write('5 5\nCar1 0 0 N FFRFF\n')
+            self.assertEqual(cli(['--input', path]), 0)
+        mock_print.assert_any_call("- Car1 , (2, 2), E")
+
+    @patch('builtins.print')
+    def test_cli_batch_input_invalid(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scenario.txt')
+            with open(path, 'w') as file:
+                file.write('5 5\nCar1 9 0 N FFRFF\n')
+            self.assertEqual(cli(['--input', path]), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.auto_driving_car_simulation.utils.memory import MemoryReport, deep_size
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.simulation.car import Car
+from src.auto_driving_car_simulation.simulation.field import Field
+from src.auto_driving_car_simulation.main import cli
+
+
+class TestMemoryReport(unittest.TestCase):
+
+    def test_deep_size_counts_shared_objects_once(self):
+        shared = "x" * 1000
+        seen = set()
+        first = deep_size([shared], seen)
+        second = deep_size([shared], seen)
+        self.assertGreater(first, 1000)
+        self.assertLess(second, 1000)
+
+    def test_measure(self):
+        simulation = Simulation(Field(5, 5))
+        for index in range(3):
+            car = Car(f"Car{index}", index, 0, 'N')
+            car.set_commands("FFRFF")
+            simulation.add_car(car)
+        simulation.run_simulation(display=False)
+        report = MemoryReport()
+        report.measure(simulation)
+        self.assertEqual(report.car_count, 3)
+        self.assertEqual(report.command_count, 15)
+        for name in ('cars', 'commands', 'loggers', 'stopped_cars', 'collisions', 'occupancy'):
+            self.assertGreater(report.structures[name], 0)
+
+    def test_phases(self):
+        report = MemoryReport()
+        report.start()
+        with report.phase('allocate'):
+            data = [0] * 100000
+        report.stop()
+        name, current, peak = report.phases[0]
+        self.assertEqual(name, 'allocate')
+        self.assertGreaterEqual(peak, 800000)
+        del data
+
+    @patch('builtins.print')
+    def test_cli_memory_report(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scenario.txt')
+            with open(path, 'w') as file:
+                file.write('5 5\nCar1 0 0 N FFRFF\nCar2 4 4 S FF\n')
+            self.assertEqual(cli(['--input', path, '--memory-report']), 0)
+        mock_print.assert_any_call("Memory report:")
+
+
+if __name__ == '__main__':
+    unittest.main()
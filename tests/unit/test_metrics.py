@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+import urllib.request
+from unittest.mock import patch
+from src.auto_driving_car_simulation.utils.metrics import MetricsExporter, SimulationMetrics
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.simulation.parallel import ParallelSimulation
+from src.auto_driving_car_simulation.simulation.car import Car
+from src.auto_driving_car_simulation.simulation.field import Field
+from src.auto_driving_car_simulation.main import cli
+
+
+def build(simulation):
+    for name, x, y, direction, commands in (("A", 0, 0, 'N', "FFRFF"), ("B", 4, 2, 'W', "FFFFF"),
+                                            ("C", 4, 4, 'N', "FLF")):
+        car = Car(name, x, y, direction)
+        car.set_commands(commands)
+        simulation.add_car(car)
+    return simulation
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_counters(self):
+        simulation = build(Simulation(Field(5, 5)))
+        simulation.run_simulation(display=False)
+        metrics = simulation.metrics
+        self.assertEqual(metrics.steps, 5)
+        self.assertEqual(metrics.turns, 1)
+        self.assertEqual(metrics.boundary_hits, 1)
+        self.assertEqual(metrics.collisions, 1)
+        self.assertEqual(metrics.moves, 7)
+        self.assertEqual(metrics.active_cars, 0)
+        self.assertGreater(metrics.steps_per_second, 0)
+
+    def test_car_advanced_in_one_go_is_counted(self):
+        simulation = Simulation(Field(50, 50))
+        car = Car("A", 0, 0, 'N')
+        car.set_commands("10(FFRFFL)RR")
+        simulation.add_car(car)
+        simulation.run_simulation(display=False)
+        metrics = simulation.metrics
+        self.assertEqual((metrics.steps, metrics.moves, metrics.turns), (62, 40, 22))
+
+    def test_parallel_counters_match(self):
+        serial = build(Simulation(Field(5, 5)))
+        serial.run_simulation(display=False)
+        parallel = build(ParallelSimulation(Field(5, 5), workers=2))
+        parallel.run_simulation(display=False)
+        for name in ('steps', 'active_cars', 'moves', 'turns', 'collisions', 'boundary_hits'):
+            self.assertEqual(getattr(parallel.metrics, name), getattr(serial.metrics, name), name)
+
+    def test_openmetrics_format(self):
+        metrics = SimulationMetrics()
+        metrics.moves = 3
+        text = metrics.to_openmetrics()
+        self.assertIn("# TYPE simulation_moves counter\n", text)
+        self.assertIn("simulation_moves_total 3\n", text)
+        self.assertIn("simulation_active_cars 0\n", text)
+        self.assertTrue(text.endswith("# EOF\n"))
+
+    def test_exporter_file_and_http(self):
+        metrics = SimulationMetrics()
+        metrics.steps = 42
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metrics.prom')
+            with MetricsExporter(metrics, path=path, port=0, interval=0.01) as exporter:
+                with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics") as response:
+                    self.assertIn("simulation_steps_total 42", response.read().decode())
+                    self.assertTrue(response.headers['Content-Type'].startswith('application/openmetrics-text'))
+                metrics.steps = 43
+            with open(path) as file:
+                self.assertIn("simulation_steps_total 43", file.read())
+
+    @patch('builtins.print')
+    def test_cli_metrics_file(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            scenario = os.path.join(directory, 'scenario.txt')
+            path = os.path.join(directory, 'metrics.prom')
+            with open(scenario, 'w') as file:
+                file.write("5 5\nA 0 0 N FFRFF\n")
+            self.assertEqual(cli(['--input', scenario, '--metrics-file', path]), 0)
+            with open(path) as file:
+                self.assertIn("simulation_steps_total 5", file.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import pytest
+from unittest.mock import patch
+from src.auto_driving_car_simulation.simulation.monte_carlo import MonteCarloEstimator, MonteCarloResult, run_trial
+from src.auto_driving_car_simulation.main import cli
+
+
+class TestMonteCarlo(unittest.TestCase):
+
+    def test_trial_is_deterministic(self):
+        outcomes = [run_trial(5, 5, 6, 8, 42, trial) for trial in range(20)]
+        self.assertEqual(outcomes, [run_trial(5, 5, 6, 8, 42, trial) for trial in range(20)])
+        self.assertTrue(any(outcomes))
+
+    def test_result_statistics(self):
+        result = MonteCarloResult()
+        for outcome in (0, 2, 0, 4):
+            result.add(outcome)
+        self.assertEqual(result.trials, 4)
+        self.assertEqual(result.collisions, 2)
+        self.assertEqual(result.collision_rate, 0.5)
+        self.assertEqual(result.mean_first_collision_step, 3.0)
+        low, high = result.rate_interval()
+        self.assertTrue(0 < low < 0.5 < high < 1)
+        low, high = result.step_interval()
+        self.assertTrue(low < 3.0 < high)
+
+    def test_workers_give_same_estimate(self):
+        serial = MonteCarloEstimator(6, 6, 5, 6, seed=3, workers=1).run(100)
+        parallel = MonteCarloEstimator(6, 6, 5, 6, seed=3, workers=2).run(100)
+        self.assertEqual((serial.trials, serial.collisions), (parallel.trials, parallel.collisions))
+        self.assertEqual(serial.mean_first_collision_step, parallel.mean_first_collision_step)
+
+    def test_stops_at_precision(self):
+        result = MonteCarloEstimator(3, 3, 9, 4, workers=1).run(10000, precision=0.05)
+        self.assertLess(result.trials, 10000)
+        self.assertTrue(result.is_precise(0.05))
+
+    def test_too_many_cars(self):
+        with pytest.raises(ValueError):
+            MonteCarloEstimator(2, 2, 5, 4)
+
+    @patch('builtins.print')
+    def test_cli(self, mock_print):
+        self.assertEqual(cli(['--monte-carlo', '10', '--field', '4', '4', '--cars', '3', '--workers', '1']), 0)
+        self.assertIn("After 10 trial(s)", mock_print.call_args_list[0][0][0])
+
+    @patch('sys.stderr')
+    def test_cli_rejects_non_positive_trials(self, _):
+        for trials in ('0', '-3'):
+            with pytest.raises(SystemExit):
+                cli(['--monte-carlo', trials])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import pytest
+from src.auto_driving_car_simulation.simulation.near_miss import CHEBYSHEV, MANHATTAN, NearMissDetector
+from src.auto_driving_car_simulation.simulation.engines import ENGINES
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from src.auto_driving_car_simulation.main import cli
+from helpers import random_scenario
+
+
+def brute_force(scenario, radius, metric):
+    """Returns the near misses found by comparing every pair of active cars after every step."""
+    simulation = scenario.build_simulation()
+    detector = NearMissDetector(radius, metric)
+    close = set()
+    names = [car.name for car in simulation.cars]
+
+    def pairs():
+        active = [car for car in simulation.cars if car.name not in simulation.stopped_cars]
+        return {(first.name, second.name): detector.distance((first.x, first.y), (second.x, second.y))
+                for index, first in enumerate(active) for second in active[index + 1:]
+                if detector.distance((first.x, first.y), (second.x, second.y)) <= radius}
+
+    close = set(pairs())
+    expected = {}
+    max_steps = max(len(car.program) for car in simulation.cars)
+    for step in range(max_steps):
+        simulation.process_step(step)
+        current = pairs()
+        events = [(first, second, distance) for (first, second), distance in current.items()
+                  if (first, second) not in close]
+        if events:
+            expected[step + 1] = sorted(events, key=lambda event: (names.index(event[0]), names.index(event[1])))
+        close = set(current)
+    return expected
+
+
+class TestNearMissDetector(unittest.TestCase):
+
+    def test_matches_pairwise_check(self):
+        for metric in (CHEBYSHEV, MANHATTAN):
+            for radius in (1, 2, 3):
+                for seed in range(25):
+                    scenario = random_scenario(seed, size=(4, 12), cars=(2, 15))
+                    simulation = scenario.build_simulation()
+                    simulation.near_miss = NearMissDetector(radius, metric)
+                    simulation.track_digests = True
+                    simulation.run_simulation(display=False)
+                    found = {step: [(car1, car2, distance) for car1, _, car2, _, distance in events]
+                             for step, events in simulation.near_misses.items()}
+                    self.assertEqual(found, brute_force(scenario, radius, metric), (metric, radius, seed))
+
+    def test_event(self):
+        simulation = Scenario(10, 10, [("A", 0, 0, 'E', "FFF"), ("B", 5, 0, 'W', "F")]).build_simulation()
+        simulation.near_miss = NearMissDetector(2)
+        simulation.run_simulation(display=False)
+        self.assertEqual(simulation.near_misses, {2: [("A", (2, 0), "B", (4, 0), 2)]})
+
+    def test_pairs_starting_close_are_not_reported(self):
+        simulation = Scenario(10, 10, [("A", 0, 0, 'N', "FF"), ("B", 1, 0, 'N', "FF")]).build_simulation()
+        simulation.near_miss = NearMissDetector(1)
+        simulation.run_simulation(display=False)
+        self.assertEqual(simulation.near_misses, {})
+
+    def test_distances(self):
+        self.assertEqual(NearMissDetector(1, CHEBYSHEV).distance((0, 0), (2, 3)), 3)
+        self.assertEqual(NearMissDetector(1, MANHATTAN).distance((0, 0), (2, 3)), 5)
+
+    def test_every_engine_reports_near_misses(self):
+        scenario = random_scenario(5, size=(4, 12), cars=(2, 15))
+        expected = None
+        for engine in ENGINES.values():
+            simulation = scenario.build_simulation(engine)
+            simulation.near_miss = NearMissDetector(2, MANHATTAN)
+            simulation.run_simulation(display=False)
+            expected = simulation.near_misses if expected is None else expected
+            self.assertEqual(simulation.near_misses, expected)
+
+    def test_invalid(self):
+        for radius, metric in ((0, CHEBYSHEV), (2, 'euclidean'), (1.5, CHEBYSHEV)):
+            with pytest.raises(ValueError):
+                NearMissDetector(radius, metric)
+
+    @patch('builtins.print')
+    def test_cli(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scenario.txt')
+            Scenario(10, 10, [("A", 0, 0, 'E', "FF"), ("B", 5, 0, 'W', "")]).save(path)
+            self.assertEqual(cli(['--input', path, '--near-miss', '3', '--near-miss-metric', 'manhattan']), 0)
+        mock_print.assert_any_call("- A at (2, 0) came within 3 of B at (5, 0) at step 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
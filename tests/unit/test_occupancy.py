@@ -0,0 +1,73 @@
+import unittest
+from src.auto_driving_car_simulation.simulation.occupancy import Occupancy, DenseOccupancy, SparseOccupancy
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.simulation.car import Car
+from src.auto_driving_car_simulation.simulation.field import Field
+
+
+class TestOccupancy(unittest.TestCase):
+
+    def test_small_field_uses_dense(self):
+        occupancy = Occupancy.for_field(Field(6, 6), 5)
+        self.assertIsInstance(occupancy, DenseOccupancy)
+
+    def test_field_of_many_cells_per_car_uses_sparse(self):
+        occupancy = Occupancy.for_field(Field(10, 10), 5)
+        self.assertIsInstance(occupancy, SparseOccupancy)
+
+    def test_huge_field_uses_sparse(self):
+        occupancy = Occupancy.for_field(Field(10 ** 9, 10 ** 9), 5)
+        self.assertIsInstance(occupancy, SparseOccupancy)
+
+    def test_groups_in_placement_order(self):
+        for occupancy in (DenseOccupancy(5, 5), SparseOccupancy(5, 5)):
+            occupancy.place(1, 1, 'Car1')
+            occupancy.place(0, 0, 'Car2')
+            occupancy.place(1, 1, 'Car3')
+            groups = [(occupancy.position(key), names) for key, names in occupancy.groups()]
+            self.assertEqual(groups, [((1, 1), ['Car1', 'Car3']), ((0, 0), ['Car2'])])
+
+    def test_clear(self):
+        for occupancy in (DenseOccupancy(5, 5), SparseOccupancy(5, 5)):
+            occupancy.place(2, 3, 'Car1')
+            self.assertTrue(occupancy.is_occupied(2, 3))
+            occupancy.clear()
+            self.assertFalse(occupancy.is_occupied(2, 3))
+            self.assertEqual(list(occupancy.groups()), [])
+
+    def test_generation_wraps_around(self):
+        occupancy = DenseOccupancy(5, 5)
+        occupancy.place(2, 3, 'Car1')
+        occupancy._generation = (1 << 8 * occupancy._stamps.itemsize) - 1
+        occupancy._stamps[0] = occupancy._generation
+        occupancy.clear()
+        self.assertFalse(occupancy.is_occupied(2, 3))
+        self.assertFalse(occupancy.is_occupied(0, 0))
+        occupancy.place(0, 0, 'Car2')
+        self.assertEqual([(occupancy.position(key), names) for key, names in occupancy.groups()],
+                         [((0, 0), ['Car2'])])
+
+    def test_collision_on_huge_field(self):
+        field = Field(10 ** 9, 10 ** 9)
+        simulation = Simulation(field)
+        car1 = Car("Car1", 10 ** 8, 10 ** 8, 'N')
+        car2 = Car("Car2", 10 ** 8, 10 ** 8 + 2, 'S')
+        car1.set_commands("FF")
+        car2.set_commands("FF")
+        simulation.add_car(car1)
+        simulation.add_car(car2)
+        simulation.run_simulation()
+        self.assertIsInstance(simulation.occupancy, SparseOccupancy)
+        self.assertEqual(simulation.collisions[1], [(['Car1', 'Car2'], (10 ** 8, 10 ** 8 + 1))])
+
+    def test_incomplete_occupancy_cannot_be_created(self):
+        class PlacingOccupancy(Occupancy):
+            def place(self, x, y, name):
+                pass
+
+        with self.assertRaises(TypeError):
+            PlacingOccupancy(5, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
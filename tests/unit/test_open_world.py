@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.auto_driving_car_simulation.simulation.open_world import (
+    BOUNDARY, COLLIDED, FINISHED, OpenWorldSimulation, SpawnStream)
+from src.auto_driving_car_simulation.simulation.budget import STEP_LIMIT, RunBudget
+from src.auto_driving_car_simulation.simulation.field import Field
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from src.auto_driving_car_simulation.main import cli
+from helpers import random_scenario
+
+
+def run(simulation, spawns, budget=None):
+    collisions, leaves = [], []
+    simulation.run_simulation(spawns, lambda *event: collisions.append(event), lambda *event: leaves.append(event),
+                              budget)
+    return collisions, leaves
+
+
+class TestOpenWorld(unittest.TestCase):
+
+    def test_matches_simulation(self):
+        for seed in range(100):
+            scenario = random_scenario(seed, size=(8, 8), cars=(1, 20), length=12, same_length=True)
+            reference = scenario.build_simulation()
+            reference.run_simulation(display=False)
+            simulation = OpenWorldSimulation(Field(scenario.width, scenario.height))
+            collisions, leaves = run(simulation, [(0,) + car for car in scenario.cars])
+            self.assertEqual(collisions, [(step, cars, pos) for step, events in reference.collisions.items()
+                                          for cars, pos in events])
+            reasons = {name: (reason, pos, direction) for _, name, reason, pos, direction in leaves}
+            for car in reference.cars:
+                reason, pos, direction = reasons[car.name]
+                self.assertEqual((pos, direction), ((car.x, car.y), car.direction), seed)
+                self.assertEqual(reason == BOUNDARY, car.name in reference.boundary_collisions)
+                self.assertEqual(reason != FINISHED, car.name in reference.stopped_cars)
+            self.assertEqual(simulation.metrics.collisions, reference.metrics.collisions)
+            self.assertEqual(simulation.metrics.boundary_hits, reference.metrics.boundary_hits)
+            self.assertEqual(simulation.capacity, len(scenario.cars))
+
+    def test_cars_leave(self):
+        simulation = OpenWorldSimulation(Field(5, 5))
+        collisions, leaves = run(simulation, [(0, "A", 0, 0, "N", "FF"), (0, "B", 4, 4, "E", "F"),
+                                              (1, "C", 2, 0, "W", "FF"), (1, "D", 0, 1, "E", "F"),
+                                              (3, "E", 3, 3, "N", "")])
+        self.assertEqual(collisions, [])
+        self.assertEqual(leaves, [(1, "B", BOUNDARY, (4, 4), "E"), (2, "A", FINISHED, (0, 2), "N"),
+                                  (2, "D", FINISHED, (1, 1), "E"), (3, "C", FINISHED, (0, 0), "W"),
+                                  (3, "E", FINISHED, (3, 3), "N")])
+        self.assertEqual(simulation.entered, 5)
+        self.assertEqual(simulation.left, 5)
+        self.assertEqual(list(simulation.cars()), [])
+
+    def test_collision_and_finish(self):
+        simulation = OpenWorldSimulation(Field(5, 5))
+        collisions, leaves = run(simulation, [(0, "A", 0, 0, "N", "FF"), (1, "B", 0, 3, "S", "FF"),
+                                              (2, "C", 4, 4, "S", "R")])
+        self.assertEqual(collisions, [(2, ["A", "B"], (0, 2))])
+        self.assertEqual(leaves, [(2, "A", COLLIDED, (0, 2), "N"), (2, "B", COLLIDED, (0, 2), "S"),
+                                  (3, "C", FINISHED, (4, 4), "W")])
+        self.assertEqual(simulation.metrics.steps, 3)
+
+    def test_entering_car_collides_with_a_car_in_its_cell(self):
+        simulation = OpenWorldSimulation(Field(5, 5))
+        collisions, _ = run(simulation, [(0, "A", 0, 0, "N", "FL"), (1, "B", 0, 1, "E", "L")])
+        self.assertEqual(collisions, [(2, ["A", "B"], (0, 1))])
+
+    def test_slots_and_names_are_reused(self):
+        spawns = ((step, f"Car{step % 3}", step % 10, 0, "N", "FFFF") for step in range(0, 100000, 2))
+        simulation = OpenWorldSimulation(Field(10, 10))
+        simulation.run_simulation(spawns)
+        self.assertEqual(simulation.entered, 50000)
+        self.assertEqual(simulation.left, 50000)
+        self.assertEqual(simulation.capacity, 2)
+        self.assertEqual(simulation.metrics.active_cars, 0)
+
+    def test_live_name_is_rejected(self):
+        simulation = OpenWorldSimulation(Field(5, 5))
+        with self.assertRaises(ValueError):
+            simulation.run_simulation([(0, "A", 0, 0, "N", "FF"), (1, "A", 3, 3, "N", "F")])
+        simulation.run_simulation([(0, "A", 0, 0, "N", "F"), (1, "A", 3, 3, "N", "F")])
+        self.assertEqual(simulation.entered, 2)
+
+    def test_idle_steps_are_skipped(self):
+        simulation = OpenWorldSimulation(Field(5, 5))
+        simulation.run_simulation([(0, "A", 0, 0, "N", "F"), (10 ** 9, "B", 0, 0, "N", "F")])
+        self.assertEqual(simulation.metrics.steps, 10 ** 9 + 1)
+
+    def test_step_limit(self):
+        simulation = OpenWorldSimulation(Field(5, 5))
+        _, leaves = run(simulation, [(0, "A", 0, 0, "N", "FFF"), (5, "B", 0, 0, "N", "F")], RunBudget(max_steps=2))
+        self.assertEqual(simulation.interrupted, STEP_LIMIT)
+        self.assertEqual(leaves, [])
+        self.assertEqual(list(simulation.cars()), [("A", 0, 2, "N")])
+
+    def test_stream(self):
+        stream = SpawnStream(["# open world", "5 5", "0 A 0 0 N FF", "", "3 B 1 1 E 2F"])
+        self.assertEqual((stream.width, stream.height), (5, 5))
+        self.assertEqual(list(stream), [(0, "A", 0, 0, "N", "FF"), (3, "B", 1, 1, "E", "2F")])
+
+    def test_stream_errors(self):
+        with self.assertRaises(ValueError):
+            SpawnStream(["# nothing"])
+        for line in ("2 A 0 0 N", "x A 0 0 N", "3 A 9 0 N", "3 A 0 0 Q", "4"):
+            with self.assertRaisesRegex(ValueError, "Line 3"):
+                list(SpawnStream(["5 5", "3 B 1 1 N", line]))
+
+    @patch('builtins.print')
+    def test_cli(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stream.txt")
+            with open(path, "w") as file:
+                file.write("5 5\n0 A 0 0 N FF\n1 B 0 3 S FF\n2 C 4 4 E F\n6 D 2 2 N F\n")
+            self.assertEqual(cli(["--stream", path]), 0)
+            printed = [str(call.args[0]) for call in mock_print.call_args_list]
+            self.assertIn("- A, collides with B at (0, 2) at step 2", printed)
+            self.assertIn("- D , (2, 3), N , finished at step 7", printed)
+            self.assertEqual(printed[-1],
+                             "4 car(s) entered and 4 left in 7 step(s); at most 2 were on the field at once.")
+            with open(path, "a") as file:
+                file.write("1 E 0 0 N F\n")
+            self.assertEqual(cli(["--stream", path]), 1)
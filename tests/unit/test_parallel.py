@@ -0,0 +1,33 @@
+import random
+import unittest
+from src.auto_driving_car_simulation.simulation.parallel import ParallelSimulation
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.simulation.field import Field
+from helpers import build, outcome
+
+
+class TestParallelSimulation(unittest.TestCase):
+
+    def test_two_car_collision(self):
+        cars = [("Car1", 0, 0, 'N', "FF"), ("Car2", 0, 2, 'S', "FF")]
+        simulation = build(ParallelSimulation(Field(5, 5), workers=2), cars)
+        simulation.run_simulation(display=False)
+        self.assertEqual(simulation.collisions, {1: [(['Car1', 'Car2'], (0, 1))]})
+
+    def test_matches_simulation(self):
+        rng = random.Random(5)
+        for _ in range(10):
+            width, height = rng.randint(3, 8), rng.randint(3, 8)
+            cells = rng.sample(range(width * height), rng.randint(2, 10))
+            cars = [(f"Car{index}", cell % width, cell // width, rng.choice("NESW"),
+                     "".join(rng.choice("LRFF") for _ in range(rng.randint(0, 15))))
+                    for index, cell in enumerate(cells)]
+            expected = build(Simulation(Field(width, height)), cars)
+            expected.run_simulation(display=False)
+            actual = build(ParallelSimulation(Field(width, height), workers=3), cars)
+            actual.run_simulation(display=False)
+            self.assertEqual(outcome(actual), outcome(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
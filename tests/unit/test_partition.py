@@ -0,0 +1,89 @@
+import unittest
+from src.auto_driving_car_simulation.simulation.partition import (
+    PartitionedSimulation, interaction_components, path_bounds)
+from src.auto_driving_car_simulation.simulation.program import bounds_intersect
+from src.auto_driving_car_simulation.simulation.budget import RunBudget
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from helpers import outcome, sparse_scenario
+
+
+def linked_components(simulation):
+    """Returns the components found by comparing the path boxes of every pair of cars."""
+    boxes = [path_bounds(simulation.field, car) for car in simulation.cars]
+    components = []
+    for index, bounds in enumerate(boxes):
+        linked = [component for component in components if any(bounds_intersect(bounds, boxes[other])
+                                                                for other in component)]
+        merged = sorted([index] + [other for component in linked for other in component])
+        components = [component for component in components if component not in linked] + [merged]
+    return sorted(components)
+
+
+class TestPartition(unittest.TestCase):
+
+    def test_components(self):
+        simulation = Scenario(20, 20, [("A", 0, 0, 'N', "FFF"), ("B", 10, 10, 'W', "FF"), ("C", 0, 5, 'S', "FF"),
+                                       ("D", 19, 0, 'E', "100(F)"), ("E", 18, 0, 'N', "")]).build_simulation()
+        self.assertEqual(path_bounds(simulation.field, simulation.cars[3]), (19, 19, 0, 0))
+        self.assertEqual(interaction_components(simulation.field, simulation.cars, set()), [[0, 2], [1], [3], [4]])
+        self.assertEqual(interaction_components(simulation.field, simulation.cars, {"C"}), [[0], [1], [3], [4]])
+
+    def test_components_match_pairwise_check(self):
+        for seed in range(20):
+            simulation = sparse_scenario(seed).build_simulation()
+            self.assertEqual(interaction_components(simulation.field, simulation.cars, set()),
+                             linked_components(simulation), seed)
+
+    def test_sparse_fleets_match_reference(self):
+        for seed in range(20):
+            scenario = sparse_scenario(seed, cars=150)
+            simulation = scenario.build_simulation(PartitionedSimulation)
+            simulation.run_simulation(display=False)
+            reference = scenario.build_simulation()
+            reference.run_simulation(display=False)
+            self.assertGreater(len(simulation.components), 1)
+            self.assertEqual(outcome(simulation), outcome(reference), seed)
+            self.assertEqual((simulation.metrics.collisions, simulation.metrics.boundary_hits),
+                             (reference.metrics.collisions, reference.metrics.boundary_hits))
+
+    def test_cars_alone_are_counted(self):
+        scenario = Scenario(10, 10, [("A", 0, 0, 'E', "F"), ("B", 2, 0, 'W', "F"), ("C", 5, 5, 'E', "FFFFRRRFFF")])
+        for engine in (PartitionedSimulation, Simulation):
+            simulation = scenario.build_simulation(engine)
+            simulation.run_simulation(display=False)
+            metrics = simulation.metrics
+            self.assertEqual((metrics.steps, metrics.moves, metrics.turns), (10, 9, 3), engine)
+
+    def test_step_limit(self):
+        scenario = sparse_scenario(3)
+        simulation = scenario.build_simulation(PartitionedSimulation)
+        simulation.run_simulation(display=False, budget=RunBudget(max_steps=4))
+        reference = scenario.build_simulation()
+        reference.run_simulation(display=False, budget=RunBudget(max_steps=4))
+        self.assertEqual(outcome(simulation), outcome(reference))
+        self.assertEqual(simulation.interrupted, 'max_steps')
+
+    def test_cars_starting_in_the_same_cell(self):
+        scenario = Scenario(6, 6, [("A", 1, 1, 'N', "L"), ("B", 1, 1, 'N', "L"), ("C", 4, 4, 'E', ""),
+                                   ("D", 4, 4, 'W', "")])
+        simulation = scenario.build_simulation(PartitionedSimulation)
+        simulation.run_simulation(display=False)
+        reference = scenario.build_simulation()
+        reference.run_simulation(display=False)
+        self.assertEqual(simulation.collisions, {1: [(['A', 'B'], (1, 1)), (['C', 'D'], (4, 4))]})
+        self.assertEqual(outcome(simulation), outcome(reference))
+
+    def test_whole_fleet_features_fall_back(self):
+        simulation = sparse_scenario(4).build_simulation(PartitionedSimulation)
+        simulation.track_digests = True
+        simulation.run_simulation(display=False)
+        reference = sparse_scenario(4).build_simulation(Simulation)
+        reference.track_digests = True
+        reference.run_simulation(display=False)
+        self.assertEqual(simulation.components, [])
+        self.assertEqual(simulation.digest.steps, reference.digest.steps)
+
+
+if __name__ == '__main__':
+    unittest.main()
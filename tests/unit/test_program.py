@@ -0,0 +1,159 @@
+import random
+import unittest
+import pytest
+from src.auto_driving_car_simulation.simulation.program import LiteralProgram, Program, RepeatProgram, rotate
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.simulation.car import Car
+from src.auto_driving_car_simulation.simulation.field import Field
+
+
+class TestProgram(unittest.TestCase):
+
+    def test_compile_is_shared(self):
+        car1 = Car("Car1", 0, 0, 'N')
+        car2 = Car("Car2", 3, 3, 'E')
+        car1.set_commands("FFRFF")
+        car2.set_commands("".join(["FFR", "FF"]))
+        self.assertIs(car1.program, car2.program)
+        self.assertIs(car1.commands, car2.commands)
+
+    def test_prefix_arrays(self):
+        program = Program.compile("FFRFF")
+        self.assertEqual(len(program), 5)
+        self.assertEqual(list(program.xs), [0, 0, 0, 0, 1, 2])
+        self.assertEqual(list(program.ys), [0, 1, 2, 2, 2, 2])
+        self.assertEqual(list(program.turns), [0, 0, 0, 1, 1, 1])
+        self.assertEqual(program.offset(3), (1, 0))
+
+    def test_prefix_arrays_are_built_on_demand(self):
+        program = LiteralProgram("FFRFFLLFRF" * 1000)
+        self.assertEqual(program.transform(3, 4, 1, 0, len(program)),
+                         Program.parse("1000(FFRFFLLFRF)").transform(3, 4, 1, 0, len(program)))
+        self.assertTrue(program.fits(Field(10 ** 5, 10 ** 5), 5, 5, 0, 0))
+        self.assertIsNone(program._prefixes)
+        self.assertEqual(program.displacement(3), (0, 2))
+        self.assertIsNotNone(program._prefixes)
+
+    def test_rotate(self):
+        self.assertEqual(rotate(0, 1, 1), (1, 0))
+        self.assertEqual(rotate(0, 1, 2), (0, -1))
+        self.assertEqual(rotate(0, 1, 3), (-1, 0))
+
+    def test_transform(self):
+        program = Program.compile("FFRFF")
+        self.assertEqual(program.transform(0, 0, 0, 0, 5), (2, 2, 1))
+        self.assertEqual(program.transform(4, 4, 2, 0, 5), (2, 2, 3))
+        self.assertEqual(program.transform(0, 2, 0, 2, 5), (2, 2, 1))
+
+    def test_fits(self):
+        program = Program.compile("FFRFF")
+        field = Field(5, 5)
+        self.assertTrue(program.fits(field, 0, 0, 0, 0))
+        self.assertFalse(program.fits(field, 0, 3, 0, 0))
+        self.assertFalse(program.fits(field, 0, 0, 3, 0))
+
+    def test_matches_step_by_step(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            commands = "".join(rng.choice("LRFFF") for _ in range(rng.randint(1, 20)))
+            x, y, direction = rng.randrange(8), rng.randrange(8), rng.choice("NESW")
+            fast = Car("Fast", x, y, direction)
+            fast.set_commands(commands)
+            simulation = Simulation(Field(8, 8))
+            simulation.add_car(fast)
+            simulation.run_simulation()
+
+            slow = Car("Slow", x, y, direction)
+            slow.set_commands(commands)
+            reference = Simulation(Field(8, 8))
+            reference.add_car(slow)
+            for step in range(len(commands)):
+                reference.process_step(step)
+            self.assertEqual((fast.x, fast.y, fast.direction), (slow.x, slow.y, slow.direction))
+            self.assertEqual(simulation.boundary_collisions.get("Fast"), reference.boundary_collisions.get("Slow"))
+
+    def test_parse_repeat_syntax(self):
+        program = Program.parse("2(F3R)L")
+        self.assertEqual(len(program), 9)
+        self.assertEqual("".join(program[step] for step in range(len(program))), "FRRRFRRRL")
+        self.assertEqual(str(program), "2(F3(R))L")
+
+    def test_parse_long_program_is_lazy(self):
+        program = Program.parse("1000000(FFRFFR)")
+        self.assertIsInstance(program, RepeatProgram)
+        self.assertEqual(len(program), 6000000)
+        self.assertEqual(program[5999999], 'R')
+        self.assertEqual(program.transform(0, 0, 0, 0, len(program)), (0, 0, 0))
+
+    def test_parse_invalid(self):
+        for source in ("XYZ", "3", "3(FF", "FF)", "(FF)"):
+            with pytest.raises(ValueError):
+                Program.parse(source)
+
+    def test_car_keeps_compact_commands(self):
+        car = Car("Car1", 0, 0, 'N')
+        car.set_commands("1000(FR)")
+        self.assertEqual(car.commands, "1000(FR)")
+        self.assertEqual(len(car.program), 2000)
+
+    def test_lazy_matches_expanded(self):
+        rng = random.Random(11)
+        sources = ["3(FFR)", "2(F2(RF))L", "5(FLF)FF", "4F2(R)3(FFL)", "FR10(F)"]
+        for source in sources:
+            lazy = Program.parse(source)
+            expanded = Program.compile("".join(lazy[step] for step in range(len(lazy))))
+            self.assertEqual(len(lazy), len(expanded))
+            for step in range(len(lazy) + 1):
+                self.assertEqual(lazy.turn(step), expanded.turn(step))
+                self.assertEqual(lazy.displacement(step), expanded.displacement(step))
+                self.assertEqual(lazy.suffix_bounds(step), expanded.suffix_bounds(step))
+                self.assertEqual(lazy.forward_moves(step), expanded.forward_moves(step))
+            for _ in range(20):
+                x, y, heading = rng.randrange(20), rng.randrange(20), rng.randrange(4)
+                start = rng.randrange(len(lazy) + 1)
+                self.assertEqual(lazy.fits(Field(20, 20), x, y, heading, start),
+                                 expanded.fits(Field(20, 20), x, y, heading, start))
+
+    def test_incomplete_program_cannot_be_created(self):
+        class ForwardProgram(Program):
+            def __getitem__(self, step):
+                return 'F'
+
+        with self.assertRaises(TypeError):
+            ForwardProgram()
+
+        class UnsplitProgram(Program):
+            length = 1
+
+            def __getitem__(self, step):
+                return 'F'
+
+            def turn(self, step):
+                return 0
+
+            def displacement(self, step):
+                return 0, min(step, 1)
+
+            def suffix_bounds(self, step):
+                return 0, 0, min(step, 1), 1
+
+            def forward_moves(self, step):
+                return min(step, 1)
+
+        with self.assertRaises(TypeError):
+            UnsplitProgram()
+
+    def test_runs(self):
+        self.assertEqual(list(Program.parse("FFRFFLLF").runs()), [(2, None), (1, 1), (2, None), (2, 2), (1, None)])
+        self.assertEqual(list(Program.parse("1000000(F)").runs()), [(1000000, None)])
+        self.assertEqual(list(Program.parse("2(L)3(R)FF2(F)").runs()), [(5, 1), (4, None)])
+        self.assertEqual(list(Program.parse("").runs()), [])
+        for source in ("3(FFR)", "2(F2(RF))L", "5(FLF)FF", "4F2(R)3(FFL)", "FR10(F)"):
+            program = Program.parse(source)
+            expanded = "".join(program[step] for step in range(len(program)))
+            self.assertEqual(list(program.runs()), list(Program.compile(expanded).runs()))
+            self.assertEqual(sum(length for length, _ in program.runs()), len(program))
+
+
+if __name__ == '__main__':
+    unittest.main()
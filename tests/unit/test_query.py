@@ -0,0 +1,85 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.auto_driving_car_simulation.simulation.query import causal_cone, run_query
+from src.auto_driving_car_simulation.simulation.partition import PartitionedSimulation
+from src.auto_driving_car_simulation.simulation.budget import RunBudget
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from src.auto_driving_car_simulation.main import cli
+from helpers import sparse_scenario
+
+
+def car_results(simulation, names):
+    cars = {car.name: (car.x, car.y, car.direction) for car in simulation.cars if car.name in names}
+    boundary = {name: steps for name, steps in simulation.boundary_collisions.items() if name in names}
+    return cars, boundary, simulation.stopped_cars & names
+
+
+def collisions_of(simulation, names):
+    """Returns the collisions involving the given cars, as (step, cars, position) tuples."""
+    return [(step, cars, pos) for step, events in simulation.collisions.items() for cars, pos in events
+            if names.intersection(cars)]
+
+
+class TestQuery(unittest.TestCase):
+
+    def test_cone_leaves_out_far_cars(self):
+        simulation = Scenario(20, 20, [("A", 0, 0, "N", "FF"), ("B", 0, 3, "S", "FF"),
+                                       ("C", 15, 15, "N", "FF"), ("D", 0, 8, "S", "FFFFFF")]).build_simulation()
+        self.assertEqual(causal_cone(simulation, ["A"]), [0, 1, 3])
+        self.assertEqual(causal_cone(simulation, ["A"], horizon=2), [0, 1])
+        self.assertEqual(causal_cone(simulation, ["C"]), [2])
+
+    def test_stopped_car_is_its_own_cone(self):
+        simulation = Scenario(10, 10, [("A", 0, 0, "N", "F"), ("B", 0, 1, "S", "F")]).build_simulation()
+        simulation.stopped_cars.add("A")
+        self.assertEqual(causal_cone(simulation, ["A"]), [0])
+
+    def test_results_match_full_run(self):
+        for seed in range(10):
+            scenario = sparse_scenario(seed, size=50, cars=80, length=16)
+            rng = random.Random(seed)
+            names = {f"Car{index}" for index in rng.sample(range(len(scenario.cars)), 3)}
+            for horizon in (None, 0, 3, 8):
+                full = scenario.build_simulation()
+                full.run_simulation(display=False, budget=RunBudget(max_steps=horizon) if horizon is not None else None)
+                cone = run_query(scenario.build_simulation(), sorted(names), horizon)
+                self.assertLessEqual(len(cone.cars), len(full.cars))
+                self.assertEqual(car_results(cone, names), car_results(full, names), (seed, horizon))
+                self.assertEqual(collisions_of(cone, names), collisions_of(full, names), (seed, horizon))
+
+    def test_engine(self):
+        scenario = sparse_scenario(3, size=50, cars=80, length=16)
+        names = {"Car0", "Car1"}
+        reference = run_query(scenario.build_simulation(), sorted(names), 6)
+        partitioned = run_query(scenario.build_simulation(), sorted(names), 6, PartitionedSimulation)
+        self.assertIsInstance(partitioned, PartitionedSimulation)
+        self.assertEqual(car_results(partitioned, names), car_results(reference, names))
+
+    def test_simulation_is_left_as_it_is(self):
+        simulation = sparse_scenario(1, size=50, cars=80, length=16).build_simulation()
+        run_query(simulation, ["Car0"])
+        self.assertEqual([(car.x, car.y, car.direction) for car in simulation.cars],
+                         [(x, y, direction)
+                          for _, x, y, direction, _ in sparse_scenario(1, size=50, cars=80, length=16).cars])
+        self.assertEqual(simulation.collisions, {})
+
+    def test_unknown_car(self):
+        simulation = sparse_scenario(0, size=50, cars=80, length=16).build_simulation()
+        with self.assertRaises(ValueError):
+            causal_cone(simulation, ["Car0", "Nobody"])
+
+    @patch('builtins.print')
+    def test_cli(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "scenario.txt")
+            with open(path, "w") as file:
+                file.write("20 20\nA 0 0 N FFF\nB 2 1 W FF\nC 15 15 E FF\n")
+            self.assertEqual(cli(["--input", path, "--query", "A", "--horizon", "2"]), 0)
+            printed = [str(call.args[0]) for call in mock_print.call_args_list]
+            self.assertIn("Simulated 2 of 3 cars for A.", printed)
+            self.assertIn("- A , (0, 2), N", printed)
+            self.assertFalse(any("- B" in line or "- C" in line for line in printed))
+            self.assertEqual(cli(["--input", path, "--query", "Z"]), 1)
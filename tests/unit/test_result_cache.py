@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+from src.auto_driving_car_simulation.simulation.result_cache import ResultCache
+from src.auto_driving_car_simulation.simulation.budget import RunBudget
+from src.auto_driving_car_simulation.simulation.near_miss import NearMissDetector
+from src.auto_driving_car_simulation.simulation.runner import run_in_threads
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from src.auto_driving_car_simulation.main import cli
+from helpers import outcome
+
+
+SCENARIO = Scenario(10, 10, [("A", 1, 2, 'N', "FFRFFFFRRL"), ("B", 7, 8, 'W', "FFLFFFFFFF"),
+                             ("C", 0, 0, 'S', "F"), ("D", 5, 5, 'E', "4(FR)")])
+
+
+def run_cached(directory):
+    simulation = SCENARIO.build_simulation()
+    hit = ResultCache(directory).run(simulation, display=False)
+    return hit, outcome(simulation)
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hit_restores_results(self):
+        expected = SCENARIO.build_simulation()
+        expected.run_simulation(display=False)
+        self.assertFalse(self.cache.run(SCENARIO.build_simulation(), display=False))
+        simulation = SCENARIO.build_simulation()
+        with patch.object(simulation, 'run_simulation') as run_simulation:
+            self.assertTrue(self.cache.run(simulation, display=False))
+        run_simulation.assert_not_called()
+        self.assertEqual(outcome(simulation), outcome(expected))
+
+    def test_equivalent_scenarios_share_an_entry(self):
+        renamed = Scenario(10, 10, [("W", 1, 2, 'N', "2(F)RFFFFRRL"), ("X", 7, 8, 'W', "FFL7(F)"),
+                                    ("Y", 0, 0, 'S', "F"), ("Z", 5, 5, 'E', "FRFRFRFR")])
+        self.cache.run(SCENARIO.build_simulation(), display=False)
+        expected = renamed.build_simulation()
+        expected.run_simulation(display=False)
+        simulation = renamed.build_simulation()
+        self.assertTrue(self.cache.run(simulation, display=False))
+        self.assertEqual(outcome(simulation), outcome(expected))
+
+    def test_key(self):
+        key = ResultCache.key(SCENARIO.build_simulation())
+        self.assertEqual(ResultCache.key(SCENARIO.build_simulation()), key)
+        self.assertNotEqual(ResultCache.key(SCENARIO.build_simulation(), 3), key)
+        self.assertNotEqual(ResultCache.key(Scenario(10, 11, SCENARIO.cars).build_simulation()), key)
+        self.assertNotEqual(ResultCache.key(Scenario(10, 10, SCENARIO.cars[::-1]).build_simulation()), key)
+
+    def test_translated_scenarios_share_an_entry(self):
+        cars = [("A", 1, 1, 'N', "FFRFF"), ("B", 1, 4, 'S', "FFL"), ("C", 4, 2, 'W', "F")]
+        key = ResultCache.key(Scenario(10, 10, cars).build_simulation())
+        translated = Scenario(30, 20, [(name, x + 12, y + 7, direction, commands)
+                                       for name, x, y, direction, commands in cars])
+        self.assertEqual(ResultCache.key(translated.build_simulation()), key)
+        self.cache.run(Scenario(10, 10, cars).build_simulation(), display=False)
+        simulation = translated.build_simulation()
+        self.assertTrue(self.cache.run(simulation, display=False))
+        expected = translated.build_simulation()
+        expected.run_simulation(display=False)
+        self.assertEqual(outcome(simulation), outcome(expected))
+
+    def test_paths_leaving_the_field_keep_absolute_cells(self):
+        # The first car hits the boundary, so moving the scenario would change its results.
+        cars = [("A", 0, 1, 'W', "FF"), ("B", 3, 4, 'N', "F")]
+        key = ResultCache.key(Scenario(10, 10, cars).build_simulation())
+        self.assertNotEqual(ResultCache.key(Scenario(10, 10, [(name, x + 1, y, direction, commands)
+                                                              for name, x, y, direction, commands in cars])
+                                            .build_simulation()), key)
+        self.assertNotEqual(ResultCache.key(Scenario(11, 10, cars).build_simulation()), key)
+
+    def test_step_limit(self):
+        self.cache.run(SCENARIO.build_simulation(), display=False, budget=RunBudget(max_steps=3))
+        simulation = SCENARIO.build_simulation()
+        self.assertTrue(self.cache.run(simulation, display=False, budget=RunBudget(max_steps=3)))
+        self.assertEqual(simulation.interrupted, 'max_steps')
+        self.assertFalse(self.cache.run(SCENARIO.build_simulation(), display=False))
+
+    def test_uncacheable_runs(self):
+        for _ in range(2):
+            self.assertFalse(self.cache.run(SCENARIO.build_simulation(), display=False, budget=RunBudget(max_seconds=60)))
+            simulation = SCENARIO.build_simulation()
+            simulation.near_miss = NearMissDetector(1)
+            self.assertFalse(self.cache.run(simulation, display=False))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_least_recently_used_entries_are_evicted(self):
+        scenarios = [Scenario(10, 10, [("A", 0, 0, 'N', "F" * (x + 1))]) for x in range(3)]
+        self.cache.run(scenarios[0].build_simulation(), display=False)
+        size = os.path.getsize(os.path.join(self.directory.name, os.listdir(self.directory.name)[0]))
+        self.cache.max_bytes = 2 * size
+        self.cache.run(scenarios[1].build_simulation(), display=False)
+        path = self.cache._path(ResultCache.key(scenarios[0].build_simulation()))
+        os.utime(path, ns=(0, 0))
+        path = self.cache._path(ResultCache.key(scenarios[1].build_simulation()))
+        os.utime(path, ns=(1, 1))
+        self.assertTrue(self.cache.run(scenarios[0].build_simulation(), display=False))
+        self.cache.run(scenarios[2].build_simulation(), display=False)
+        self.assertEqual(sorted(os.listdir(self.directory.name)),
+                         sorted(f"{ResultCache.key(scenarios[index].build_simulation())}.json" for index in (0, 2)))
+
+    def test_shared_by_threads_and_processes(self):
+        simulations = [SCENARIO.build_simulation() for _ in range(8)]
+        run_in_threads(simulations, workers=4, cache=self.cache)
+        expected = SCENARIO.build_simulation()
+        expected.run_simulation(display=False)
+        for simulation in simulations:
+            self.assertEqual(outcome(simulation), outcome(expected))
+        with ProcessPoolExecutor(2) as executor:
+            results = list(executor.map(run_cached, [self.directory.name] * 4))
+        self.assertEqual(results, [(True, outcome(expected))] * 4)
+
+    @patch('builtins.print')
+    def test_cli(self, mock_print):
+        path = os.path.join(self.directory.name, 'scenario.txt')
+        SCENARIO.save(path)
+        cache = os.path.join(self.directory.name, 'cache')
+        self.assertEqual(cli(['--input', path, '--cache', cache]), 0)
+        first = mock_print.call_args_list[:]
+        mock_print.reset_mock()
+        with patch.dict(os.environ, {'SIMULATION_CACHE': cache}), \
+                patch('src.auto_driving_car_simulation.simulation.simulation.Simulation.run_simulation') as run:
+            self.assertEqual(cli(['--input', path, '--engine', 'reference']), 0)
+        run.assert_not_called()
+        self.assertEqual(mock_print.call_args_list, first)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import random
+import unittest
+from src.auto_driving_car_simulation.simulation.runner import run_in_threads
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.simulation.car import Car
+from src.auto_driving_car_simulation.simulation.field import Field
+from src.auto_driving_car_simulation.utils.logger import Logger
+from helpers import outcome
+
+
+def build(seed):
+    rng = random.Random(seed)
+    width, height = rng.randint(5, 20), rng.randint(5, 20)
+    simulation = Simulation(Field(width, height))
+    for index, cell in enumerate(rng.sample(range(width * height), rng.randint(2, 30))):
+        car = Car(f"Car{index}", cell % width, cell // width, rng.choice("NESW"))
+        car.set_commands("".join(rng.choice("LRFFF") for _ in range(rng.randint(0, 40))))
+        simulation.add_car(car)
+    return simulation
+
+
+class TestRunner(unittest.TestCase):
+
+    def test_concurrent_runs_match_serial_runs(self):
+        expected = []
+        for seed in range(200):
+            simulation = build(seed)
+            simulation.run_simulation(display=False)
+            expected.append(outcome(simulation))
+        for _ in range(3):
+            simulations = run_in_threads([build(seed) for seed in range(200)], workers=16)
+            self.assertEqual([outcome(simulation) for simulation in simulations], expected)
+
+    def test_logger_handlers_do_not_grow(self):
+        logger = Logger.setup_logger('CAR')
+        handlers = list(logger.handlers)
+        for index in range(100):
+            Car(f"Car{index}", 0, 0, 'N')
+        self.assertEqual(Logger.setup_logger('CAR').handlers, handlers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+import pytest
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+
+
+class TestScenario(unittest.TestCase):
+
+    def test_parse(self):
+        scenario = Scenario.parse([
+            "# two cars",
+            "10 10",
+            "Car1 1 2 N FFRFFFFRRL",
+            "",
+            "Car2 7 8 W 2FL7F",
+        ])
+        self.assertEqual((scenario.width, scenario.height), (10, 10))
+        self.assertEqual(scenario.cars[1], ("Car2", 7, 8, 'W', "2FL7F"))
+
+    def test_build_simulation(self):
+        scenario = Scenario.parse(["10 10", "Car1 1 2 N FFRFFFFRRL", "Car2 7 8 W 2FL7F"])
+        simulation = scenario.build_simulation()
+        simulation.run_simulation()
+        self.assertIn((5, 4), [pos for events in simulation.collisions.values() for _, pos in events])
+
+    def test_car_without_commands(self):
+        scenario = Scenario.parse(["5 5", "Car1 0 0 N"])
+        self.assertEqual(scenario.cars[0][4], '')
+
+    def test_errors_carry_line_numbers(self):
+        cases = [
+            (["0 5"], "Line 1:"),
+            (["5 5", "Car1 0 0 N F", "Car1 1 1 N F"], "Line 3:"),
+            (["5 5", "Car1 0 0 N F", "Car2 0 0 N F"], "Line 3:"),
+            (["5 5", "", "Car1 5 0 N F"], "Line 3:"),
+            (["5 5", "Car1 0 0 X F"], "Line 2:"),
+            (["5 5", "Car1 0 0 N FXF"], "Line 2:"),
+            (["5 5", "Car1 0 N"], "Line 2:"),
+        ]
+        for lines, prefix in cases:
+            with pytest.raises(ValueError, match=prefix):
+                Scenario.parse(lines)
+
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            Scenario.parse(["# nothing"])
+
+    def test_save_and_load(self):
+        scenario = Scenario(5, 5, [("Car1", 0, 0, 'N', "3(FR)"), ("Car2", 1, 1, 'E', "")])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "scenario.txt")
+            scenario.save(path)
+            loaded = Scenario.load(path)
+        self.assertEqual(loaded.cars, scenario.cars)
+
+
+if __name__ == '__main__':
+    unittest.main()
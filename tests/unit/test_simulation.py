@@ -50,7 +50,7 @@ class TestSimulation(unittest.TestCase):
         simulation.add_car(car2)
         simulation.run_simulation()
         print([car for car in simulation.cars])  # Debugging output
-        self.assertIn((5, 4), [pos for _, pos in simulation.collisions.values()])
+        self.assertIn((5, 4), [pos for events in simulation.collisions.values() for _, pos in events])
 
     def test_boundary_collision(self):
         field = Field(5, 5)
@@ -118,7 +118,42 @@ class TestSimulation(unittest.TestCase):
         self.simulation.check_collisions(0)
         self.assertEqual(len(self.simulation.collisions), 1)
         self.assertIn(1, self.simulation.collisions)
-        self.assertEqual(self.simulation.collisions[1], (['Car1', 'Car2'], (0, 0)))
+        self.assertEqual(self.simulation.collisions[1], [(['Car1', 'Car2'], (0, 0))])
+
+    def test_swap_collision(self):
+        car1 = Car("Car1", 0, 0, 'N')
+        car2 = Car("Car2", 0, 1, 'S')
+        car1.set_commands("FF")
+        car2.set_commands("FF")
+        self.simulation.add_car(car1)
+        self.simulation.add_car(car2)
+        self.simulation.run_simulation()
+        self.assertEqual(self.simulation.collisions, {1: [(['Car1', 'Car2'], (0, 1))]})
+        self.assertEqual((car1.x, car1.y), (0, 1))
+        self.assertEqual((car2.x, car2.y), (0, 0))
+        self.assertEqual(self.simulation.stopped_cars, {'Car1', 'Car2'})
+
+    def test_following_cars_do_not_swap(self):
+        car1 = Car("Car1", 0, 0, 'N')
+        car2 = Car("Car2", 0, 1, 'N')
+        car1.set_commands("FF")
+        car2.set_commands("FF")
+        self.simulation.add_car(car1)
+        self.simulation.add_car(car2)
+        self.simulation.run_simulation()
+        self.assertEqual(self.simulation.collisions, {})
+        self.assertEqual((car1.x, car1.y), (0, 2))
+
+    def test_swap_and_same_cell_collision(self):
+        car1 = Car("Car1", 1, 1, 'E')
+        car2 = Car("Car2", 2, 1, 'W')
+        car3 = Car("Car3", 2, 2, 'S')
+        for car in (car1, car2, car3):
+            car.set_commands("F")
+            self.simulation.add_car(car)
+        self.simulation.run_simulation()
+        self.assertEqual(self.simulation.collisions, {1: [(['Car1', 'Car2'], (2, 1)), (['Car1', 'Car3'], (2, 1))]})
+        self.assertEqual(self.simulation.stopped_cars, {'Car1', 'Car2', 'Car3'})
 
 
 if __name__ == '__main__':
@@ -0,0 +1,92 @@
+import random
+import unittest
+from src.auto_driving_car_simulation.simulation.sweep import SweepSimulation, meeting_time
+from src.auto_driving_car_simulation.simulation.budget import RunBudget
+from src.auto_driving_car_simulation.simulation.simulation import Simulation
+from src.auto_driving_car_simulation.simulation.scenario import Scenario
+from helpers import outcome
+
+
+def long_scenario(seed, cars=120):
+    """Returns a scenario of long straight runs across tiles, written as repetitions."""
+    rng = random.Random(seed)
+    width, height = 70, 70
+    fleet = []
+    for index, cell in enumerate(rng.sample(range(width * height), cars)):
+        commands = "".join(f"{rng.randint(1, 30)}(F)" + rng.choice(["", "L", "R", "RR", "3(L)"])
+                           for _ in range(rng.randint(0, 4)))
+        fleet.append((f"Car{index}", cell % width, cell // width, rng.choice("NESW"), commands))
+    return Scenario(width, height, fleet)
+
+
+class TestSweep(unittest.TestCase):
+
+    def test_meeting_time(self):
+        # Head-on cars swapping cells meet half-way through the step.
+        self.assertEqual(meeting_time((0, 5, 0, 0, 1, 0), (0, 5, 3, 0, -1, 0)), 3)
+        # Head-on cars ending in the same cell meet at a whole step.
+        self.assertEqual(meeting_time((0, 5, 0, 0, 1, 0), (0, 5, 4, 0, -1, 0)), 4)
+        # A car running into a car standing still.
+        self.assertEqual(meeting_time((2, 9, 0, 0, 0, 1), (0, 9, 0, 5, 0, 0)), 14)
+        # Crossing paths at different steps.
+        self.assertIsNone(meeting_time((0, 5, 0, 2, 1, 0), (0, 5, 3, 0, 0, 1)))
+        self.assertEqual(meeting_time((0, 5, 0, 2, 1, 0), (0, 5, 2, 0, 0, 1)), 4)
+        # Meetings after the end of a segment do not count.
+        self.assertIsNone(meeting_time((0, 2, 0, 0, 1, 0), (0, 9, 5, 0, 0, 0)))
+        self.assertIsNone(meeting_time((0, 4, 0, 0, 1, 0), (0, 4, 0, 1, 1, 0)))
+        # Cars starting in the same cell meet at step 1 if they keep together, and never if they part.
+        self.assertEqual(meeting_time((0, 3, 1, 1, 0, 0), (0, 5, 1, 1, 0, 0)), 2)
+        self.assertIsNone(meeting_time((0, 3, 1, 1, 0, 1), (0, 5, 1, 1, 1, 0)))
+
+    def test_long_programs_match_reference(self):
+        for seed in range(10):
+            scenario = long_scenario(seed)
+            for max_steps in (None, 0, 25):
+                simulations = []
+                for engine in (SweepSimulation, Simulation):
+                    simulation = scenario.build_simulation(engine)
+                    simulation.run_simulation(display=False,
+                                              budget=RunBudget(max_steps) if max_steps is not None else None)
+                    simulations.append(simulation)
+                self.assertEqual(outcome(simulations[0]), outcome(simulations[1]), (seed, max_steps))
+
+    def test_collisions_of_one_step(self):
+        simulation = Scenario(5, 5, [("A", 0, 1, 'E', "F"), ("B", 1, 1, 'W', "F"), ("C", 1, 0, 'N', "F"),
+                                     ("D", 3, 3, 'N', "3(F)"), ("E", 4, 3, 'W', "")]).build_simulation(SweepSimulation)
+        simulation.run_simulation(display=False)
+        self.assertEqual(simulation.collisions, {1: [(["A", "B"], (1, 1)), (["A", "C"], (1, 1))]})
+        self.assertEqual(simulation.stopped_cars, {"A", "B", "C", "D"})
+        self.assertEqual(simulation.boundary_collisions, {"D": [2]})
+        self.assertEqual(simulation.metrics.collisions, 2)
+        self.assertEqual([(car.x, car.y) for car in simulation.cars], [(1, 1), (0, 1), (1, 1), (3, 4), (4, 3)])
+
+    def test_cars_starting_in_the_same_cell(self):
+        scenario = Scenario(5, 5, [("A", 1, 1, 'N', "L"), ("B", 1, 1, 'N', "L"), ("C", 3, 3, 'N', "F"),
+                                   ("D", 3, 3, 'E', "F")])
+        simulation = scenario.build_simulation(SweepSimulation)
+        simulation.run_simulation(display=False)
+        reference = scenario.build_simulation()
+        reference.run_simulation(display=False)
+        self.assertEqual(simulation.collisions, {1: [(['A', 'B'], (1, 1))]})
+        self.assertEqual(outcome(simulation), outcome(reference))
+
+    def test_stopped_car_is_no_obstacle(self):
+        simulation = Scenario(10, 1, [("A", 0, 0, 'E', "5(F)"), ("B", 3, 0, 'E', "")]).build_simulation(SweepSimulation)
+        simulation.stopped_cars.add("B")
+        simulation.run_simulation(display=False)
+        self.assertEqual((simulation.cars[0].x, simulation.collisions), (5, {}))
+        self.assertEqual(simulation.metrics.moves, 5)
+
+    def test_falls_back_with_digests(self):
+        scenario = long_scenario(3, cars=20)
+        simulation = scenario.build_simulation(SweepSimulation)
+        simulation.track_digests = True
+        simulation.run_simulation(display=False)
+        reference = scenario.build_simulation()
+        reference.track_digests = True
+        reference.run_simulation(display=False)
+        self.assertEqual(simulation.digest.steps, reference.digest.steps)
+
+
+if __name__ == '__main__':
+    unittest.main()